@@ -0,0 +1,208 @@
+from typing import Dict, List, NamedTuple, Optional
+
+
+# Terminadores de linha reconhecidos, do mais longo para o mais curto
+TERMINADORES = (b"\r\n", b"\n", b"\r")
+
+
+class AlteracaoCampo(NamedTuple):
+    """
+    Registro de uma alteração de campo feita em uma linha do DBK.
+    """
+    indice_linha: int
+    tipo: str
+    campo: str
+    inicio: int
+    fim: int
+    anterior: str
+    novo: str
+
+
+def detectar_encoding(conteudo: bytes) -> str:
+    """
+    Detecta a codificação de um arquivo DBK a partir dos bytes brutos.
+
+    Os arquivos gerados pelo programa oficial da Receita costumam estar em
+    Latin-1/CP1252; UTF-8 só é assumido quando o conteúdo é UTF-8 válido e
+    contém caracteres fora do ASCII.
+
+    Args:
+        conteudo: Conteúdo bruto do arquivo
+
+    Returns:
+        Nome da codificação detectada ('utf-8', 'cp1252' ou 'latin-1')
+    """
+    if conteudo.isascii():
+        return "cp1252"
+    try:
+        conteudo.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        conteudo.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        # Latin-1 decodifica qualquer sequência de bytes
+        return "latin-1"
+
+
+class DocumentoDBK:
+    """
+    Modelo orientado a bytes de um arquivo DBK.
+    Mantém cada linha como os bytes originais (incluindo o terminador), de forma que
+    linhas não alteradas sejam gravadas exatamente como foram lidas. Apenas as linhas
+    consultadas ou editadas são decodificadas.
+    """
+
+    def __init__(self, conteudo: bytes, encoding: Optional[str] = None):
+        """
+        Inicializa o documento a partir do conteúdo bruto.
+
+        Args:
+            conteudo: Bytes do arquivo DBK
+            encoding: Codificação a utilizar. Se None, é detectada automaticamente.
+        """
+        self.encoding = encoding or detectar_encoding(conteudo)
+        self.linhas: List[bytes] = conteudo.splitlines(keepends=True)
+        self._decodificadas: Dict[int, str] = {}
+        self._indice_tipos: Optional[Dict[bytes, List[int]]] = None
+        # Bytes originais das linhas substituídas, para gerar diffs
+        self.originais: Dict[int, bytes] = {}
+
+    @classmethod
+    def de_arquivo(cls, caminho: str) -> "DocumentoDBK":
+        """
+        Lê um arquivo DBK do disco em modo binário.
+
+        Args:
+            caminho: Caminho do arquivo DBK
+
+        Returns:
+            Instância de DocumentoDBK com o conteúdo do arquivo
+        """
+        with open(caminho, "rb") as arquivo:
+            return cls(arquivo.read())
+
+    def __len__(self) -> int:
+        return len(self.linhas)
+
+    def terminador(self, indice: int) -> bytes:
+        """
+        Retorna o terminador original da linha (b'' se a linha não tiver terminador).
+        """
+        bruta = self.linhas[indice]
+        for terminador in TERMINADORES:
+            if bruta.endswith(terminador):
+                return terminador
+        return b""
+
+    def bruta(self, indice: int) -> bytes:
+        """
+        Retorna os bytes da linha sem o terminador, sem decodificar.
+        """
+        bruta = self.linhas[indice]
+        terminador = self.terminador(indice)
+        return bruta[:len(bruta) - len(terminador)] if terminador else bruta
+
+    def tipo_igual(self, indice: int, tipo: bytes) -> bool:
+        """
+        Verifica se a linha começa com o tipo de registro informado, sem decodificá-la.
+        """
+        return self.linhas[indice].startswith(tipo)
+
+    def indices_tipo(self, tipo: bytes) -> List[int]:
+        """
+        Retorna os índices das linhas de um tipo de registro. O índice por tipo é
+        construído em uma única passagem na primeira chamada.
+        """
+        if self._indice_tipos is None:
+            indice_tipos: Dict[bytes, List[int]] = {}
+            for i, bruta in enumerate(self.linhas):
+                indice_tipos.setdefault(bruta[0:2], []).append(i)
+            self._indice_tipos = indice_tipos
+        return self._indice_tipos.get(tipo, [])
+
+    def linha(self, indice: int) -> str:
+        """
+        Retorna a linha decodificada (sem o terminador). O resultado é mantido em cache
+        até que a linha seja substituída.
+        """
+        texto = self._decodificadas.get(indice)
+        if texto is None:
+            texto = self.bruta(indice).decode(self.encoding)
+            self._decodificadas[indice] = texto
+        return texto
+
+    def substituir_linha(self, indice: int, texto: str) -> None:
+        """
+        Substitui o conteúdo de uma linha, preservando seu terminador original.
+
+        Args:
+            indice: Índice da linha a ser substituída
+            texto: Novo conteúdo da linha (sem terminador)
+        """
+        terminador = self.terminador(indice)
+        self.originais.setdefault(indice, self.linhas[indice])
+        self.linhas[indice] = texto.encode(self.encoding, errors="replace") + terminador
+        self._decodificadas[indice] = texto
+
+    def linhas_alteradas(self) -> List[int]:
+        """
+        Retorna, em ordem, os índices das linhas cujo conteúdo difere do original.
+        """
+        return sorted(i for i, original in self.originais.items() if original != self.linhas[i])
+
+    def linha_original(self, indice: int) -> str:
+        """
+        Retorna a linha decodificada como foi lida do arquivo (sem o terminador).
+        """
+        original = self.originais.get(indice)
+        if original is None:
+            return self.linha(indice)
+        return original.rstrip(b"\r\n").decode(self.encoding)
+
+    def diff_unificado(self, nome_original: str, nome_novo: str) -> str:
+        """
+        Gera um diff unificado (sem linhas de contexto) apenas com as linhas alteradas,
+        sem decodificar o restante do documento.
+
+        Args:
+            nome_original: Nome exibido no cabeçalho '---'
+            nome_novo: Nome exibido no cabeçalho '+++'
+
+        Returns:
+            Texto do diff; vazio se não houver alterações
+        """
+        alteradas = self.linhas_alteradas()
+        if not alteradas:
+            return ""
+
+        # Agrupa linhas consecutivas em um mesmo bloco
+        blocos: List[List[int]] = []
+        for indice in alteradas:
+            if blocos and blocos[-1][-1] == indice - 1:
+                blocos[-1].append(indice)
+            else:
+                blocos.append([indice])
+
+        saida = [f"--- {nome_original}\n", f"+++ {nome_novo}\n"]
+        for bloco in blocos:
+            inicio = bloco[0] + 1
+            saida.append(f"@@ -{inicio},{len(bloco)} +{inicio},{len(bloco)} @@\n")
+            saida.extend(f"-{self.linha_original(i)}\n" for i in bloco)
+            saida.extend(f"+{self.linha(i)}\n" for i in bloco)
+        return "".join(saida)
+
+    def para_bytes(self) -> bytes:
+        """
+        Reconstrói o conteúdo completo do arquivo. Linhas não editadas são
+        devolvidas como os bytes originais.
+        """
+        return b"".join(self.linhas)
+
+    def texto(self) -> str:
+        """
+        Retorna o documento completo decodificado, com os terminadores originais.
+        """
+        return self.para_bytes().decode(self.encoding)
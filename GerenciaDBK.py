@@ -1,11 +1,33 @@
+import hashlib
+import heapq
 import json
 import os
 import shutil
-from typing import Dict, List, Any, Optional, Tuple
-import unicodedata
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
 
 # Importa configurações centralizadas
-from config import DBK_ID_MAPPING, DBK_INTERVALOS, BACKUP_EXTENSION
+from config import DBK_ID_MAPPING, BACKUP_EXTENSION, NEW_FILE_PREFIX
+from DocumentoDBK import AlteracaoCampo, DocumentoDBK
+from JournalDBK import JournalDBK
+from dinheiro import Dinheiro
+from leiautes import LeiauteDBK, leiaute_do_dbk
+from acervo import acervo_padrao
+from normalizacao import normalizar_nome
+
+# Tipos de registro dos rendimentos isentos, em ordem de preferência
+TIPOS_ISENTOS = ('84', '86')
+# Tipos de registro de dívidas e contas bancárias, verificados na mesma passada
+TIPOS_DIVIDAS = ('88', '89')
+
+
+class PedidoRegistro(NamedTuple):
+    """
+    Registro a localizar no DBK: pelo nome nas linhas seguintes ao início do
+    registro (como em procurarID) ou pelo conteúdo de campos do leiaute.
+    """
+    tipos: Tuple[str, ...]
+    nome: str = ''
+    campos: Optional[Dict[str, str]] = None
 
 
 class GerenciaDBK:
@@ -25,9 +47,31 @@ class GerenciaDBK:
         self.caminho_dbk = caminho_dbk
         self.backup_path = f"{caminho_dbk}{BACKUP_EXTENSION}"
         self.nomeArquivo = os.path.basename(self.caminho_dbk)
-        self.dados = None
+        self.documento: Optional[DocumentoDBK] = None
+        # Leiaute do exercício do arquivo, definido ao carregar os dados
+        self.leiaute: Optional[LeiauteDBK] = None
+        # Log das alterações de campo feitas nesta sessão, na ordem em que ocorreram
+        self.alteracoes: List[AlteracaoCampo] = []
+        # Quantidade de alterações já consideradas por recalcular_controles
+        self.posicao_recalculo = 0
+        self.sha256_original = ""
         self.carregar_dados()
 
+    @property
+    def dados(self) -> Optional[str]:
+        """
+        Conteúdo completo do DBK decodificado. Mantido por compatibilidade;
+        prefira acessar as linhas por meio de self.documento.
+        """
+        if self.documento is None:
+            return None
+        return self.documento.texto()
+
+    @dados.setter
+    def dados(self, texto: str) -> None:
+        encoding = self.documento.encoding if self.documento else None
+        self.documento = DocumentoDBK(texto.encode(encoding or 'cp1252'), encoding)
+
     def remover_espacos(self,texto):
         """
         Remove todos os espaços em branco (inclusive tabs e quebras de linha).
@@ -39,32 +83,31 @@ class GerenciaDBK:
         
     def normalizar(self,texto):
         """
-        Remove todos os espaços e acentos para comparação robusta.
+        Remove todos os espaços e acentos para comparação robusta (com cache
+        compartilhado pelo processo, ver normalizacao.py).
         """
         if not isinstance(texto, str):
             return texto
-
-        # Remove espaços
-        texto = ''.join(texto.split())
-
-        # Remove acentos/cedilhas
-        texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
-
-        # Torna case-insensitive (opcional)
-        return texto
+        return normalizar_nome(texto)
 
     def carregar_dados(self) -> None:
         """
-        Carrega os dados do arquivo DBK para a memória.
+        Carrega os dados do arquivo DBK para a memória em modo binário, preservando
+        a codificação e os terminadores de linha originais.
         
         Raises:
             FileNotFoundError: Se o arquivo não for encontrado
             Exception: Para outros erros de leitura
         """
         try:
-            with open(self.caminho_dbk, 'r', encoding='utf-8') as arquivo:
-                self.dados = arquivo.read()  # Lê o conteúdo como texto puro
-            print(f"Dados do DBK carregados com sucesso: {self.caminho_dbk}")
+            with open(self.caminho_dbk, 'rb') as arquivo:
+                conteudo = arquivo.read()
+            self.sha256_original = hashlib.sha256(conteudo).hexdigest()
+            self.documento = DocumentoDBK(conteudo)
+            cabecalho = self.documento.bruta(0) if len(self.documento) else b""
+            self.leiaute = leiaute_do_dbk(cabecalho, self.nomeArquivo)
+            print(f"Dados do DBK carregados com sucesso: {self.caminho_dbk} "
+                  f"({self.documento.encoding}, exercício {self.leiaute.exercicio})")
         except FileNotFoundError:
             print(f"Erro: Arquivo DBK não encontrado: {self.caminho_dbk}")
             raise
@@ -83,6 +126,13 @@ class GerenciaDBK:
             Exception: Para outros erros durante a cópia
         """
         try:
+            acervo = acervo_padrao()
+            if acervo:
+                # Guarda a cópia comprimida no acervo; cópias repetidas do mesmo original não ocupam espaço
+                with open(self.caminho_dbk, 'rb') as f:
+                    acervo.guardar(self.backup_path, f.read())
+                print(f"Backup do arquivo DBK guardado no acervo como: {self.backup_path}")
+                return
             shutil.copy2(self.caminho_dbk, self.backup_path)
             print(f"Backup do arquivo DBK criado em: {self.backup_path}")
         except FileNotFoundError:
@@ -101,20 +151,20 @@ class GerenciaDBK:
         tipo_dado = id
         print(f"Procurando por {tipo_dado} com nome '{name}'...")
 
-        
-        linhas = self.dados.splitlines()
-        for i, linha in enumerate(linhas):
+        documento = self.documento
+        total_linhas = len(documento)
+        tipo = id.encode('ascii')
+        nome_busca = self.normalizar(self.remover_espacos(name))
+        for i in range(total_linhas):
             # Verifica se os dois primeiros caracteres da linha correspondem ao ID
-            if len(linha) >= 2 and linha[0:2] == id:
+            if documento.tipo_igual(i, tipo):
                 # Procura pelo nome nas próximas 7 linhas (incluindo a atual)
-                for j in range(i, min(i + 7, len(linhas))):
-
-
-                    if self.normalizar(self.remover_espacos(name)) in self.remover_espacos(linhas[j]):
+                for j in range(i, min(i + 7, total_linhas)):
+                    if nome_busca in self.remover_espacos(documento.linha(j)):
                         print(f"O nome '{name}' foi encontrado na linha {j}")
                         # Utiliza os intervalos definidos na configuração
-                        if id in DBK_INTERVALOS:
-                            intervalos_nomeados = DBK_INTERVALOS[id]
+                        if id in self.leiaute.intervalos:
+                            intervalos_nomeados = self.leiaute.intervalos[id]
                         else:
                             intervalos_nomeados = {}
                             print(f"Aviso: Não há intervalos definidos para o ID {id}")
@@ -131,6 +181,123 @@ class GerenciaDBK:
             "conteudo_linha": []
         }
         
+    @staticmethod
+    def chave_campo(valor: Any) -> str:
+        """
+        Normaliza o valor de um campo-chave (banco, agência, conta, mês) para comparação:
+        apenas letras e dígitos, em maiúsculas, sem zeros à esquerda.
+        """
+        texto = ''.join(c for c in str(valor or '') if c.isalnum()).upper()
+        return texto.lstrip('0') or ('0' if texto else '')
+
+    def localizarRegistros(self, pedidos: List[PedidoRegistro]) -> List[Optional[Tuple[str, int]]]:
+        """
+        Localiza vários registros em uma única passada pelas linhas dos tipos pedidos,
+        usando o índice por tipo do documento. Pedidos por campos (ex.: banco, agência
+        e conta) são resolvidos por um índice hash das chaves, sem comparar cada linha
+        com cada pedido. Quando um pedido aceita mais de um tipo (ex.: 84 e 86),
+        prevalece o primeiro tipo da lista que tiver correspondência, como nas buscas
+        sucessivas com procurarID.
+
+        Args:
+            pedidos: Registros a localizar
+
+        Returns:
+            Para cada pedido, (tipo, índice da linha a editar) ou None se não encontrado
+        """
+        documento = self.documento
+        total_linhas = len(documento)
+
+        # Pedidos por nome, por tipo de registro: (pedido, prioridade do tipo, nome normalizado)
+        por_nome: Dict[str, List[Tuple[int, int, str]]] = {}
+        # Pedidos por campos, por tipo e conjunto de campos: chave -> [(pedido, prioridade)]
+        por_chave: Dict[str, Dict[Tuple[str, ...], Dict[Tuple[str, ...], List[Tuple[int, int]]]]] = {}
+        for n, pedido in enumerate(pedidos):
+            if pedido.campos:
+                campos = tuple(sorted(pedido.campos))
+                chave = tuple(self.chave_campo(pedido.campos[campo]) for campo in campos)
+                for prioridade, tipo in enumerate(pedido.tipos):
+                    indice_chaves = por_chave.setdefault(tipo, {}).setdefault(campos, {})
+                    indice_chaves.setdefault(chave, []).append((n, prioridade))
+            elif pedido.nome:
+                nome_busca = self.normalizar(self.remover_espacos(pedido.nome))
+                for prioridade, tipo in enumerate(pedido.tipos):
+                    por_nome.setdefault(tipo, []).append((n, prioridade, nome_busca))
+
+        encontrados: List[Optional[Tuple[int, str, int]]] = [None] * len(pedidos)
+        # Linhas sem espaços, calculadas uma vez (as janelas de busca se sobrepõem)
+        sem_espacos: Dict[int, str] = {}
+        definitivos = 0
+
+        def registrar(n: int, prioridade: int, tipo: str, indice: int) -> None:
+            nonlocal definitivos
+            atual = encontrados[n]
+            if atual is None or prioridade < atual[0]:
+                encontrados[n] = (prioridade, tipo, indice)
+                if prioridade == 0:
+                    definitivos += 1
+
+        tipos = set(por_nome) | set(por_chave)
+        indices = heapq.merge(*(
+            [(i, tipo) for i in documento.indices_tipo(tipo.encode('ascii'))] for tipo in tipos
+        ))
+        for i, tipo in indices:
+            if tipo in por_chave:
+                fatias = self.leiaute.fatias.get(tipo, {})
+                linha = documento.linha(i)
+                for campos, indice_chaves in por_chave[tipo].items():
+                    if not all(campo in fatias for campo in campos):
+                        continue
+                    chave = tuple(self.chave_campo(linha[fatias[campo]]) for campo in campos)
+                    for n, prioridade in indice_chaves.get(chave, ()):
+                        registrar(n, prioridade, tipo, i)
+
+            for n, prioridade, nome_busca in por_nome.get(tipo, ()):
+                atual = encontrados[n]
+                if atual is not None and atual[0] <= prioridade:
+                    continue
+                # Procura pelo nome nas próximas 7 linhas (incluindo a atual)
+                for j in range(i, min(i + 7, total_linhas)):
+                    if j not in sem_espacos:
+                        sem_espacos[j] = self.remover_espacos(documento.linha(j))
+                    if nome_busca in sem_espacos[j]:
+                        registrar(n, prioridade, tipo, j)
+                        break
+            if definitivos == len(pedidos):
+                break
+
+        return [(item[1], item[2]) if item else None for item in encontrados]
+
+    def atualizarRegistros(self, pedidos: List[PedidoRegistro], substituicoes: List[Dict[str, Any]],
+                           descricao: str) -> List[bool]:
+        """
+        Localiza os registros em uma única passada e aplica as substituições de cada um.
+
+        Args:
+            pedidos: Registros a localizar
+            substituicoes: Dados a substituir em cada registro (texto ou Dinheiro)
+            descricao: Descrição dos registros usada nas mensagens
+
+        Returns:
+            Para cada pedido, True se o registro foi encontrado e editado
+        """
+        resultados = []
+        for pedido, dados, local in zip(pedidos, substituicoes, self.localizarRegistros(pedidos)):
+            identificacao = pedido.nome or ' '.join((pedido.campos or {}).values())
+            if local is None:
+                print(f"⚠️ {descricao} '{identificacao}' não encontrado no arquivo DBK")
+                resultados.append(False)
+                continue
+            tipo, indice = local
+            print(f"{descricao} '{identificacao}' encontrado na linha {indice} (registro {tipo})")
+            try:
+                self.editarID(indice, dados, self.leiaute.intervalos.get(tipo, {}))
+                resultados.append(True)
+            except Exception as e:
+                print(f"Erro ao modificar {descricao} '{identificacao}': {e}")
+                resultados.append(False)
+        return resultados
+
     def procuraBensDBK(self) -> List[Dict[str, Any]]:
         """
         Percorre todas as linhas do arquivo DBK e encontra todas as linhas com ID '27' (Bens e Direitos).
@@ -141,19 +308,20 @@ class GerenciaDBK:
         print("Procurando por todas as linhas de Bens e Direitos (ID 27)...")
         
         resultado = []
-        linhas = self.dados.splitlines()
+        documento = self.documento
         
         # Obter os intervalos definidos para o ID '27'
-        if "27" in DBK_INTERVALOS:
-            intervalos_nomeados = DBK_INTERVALOS["27"]
+        if "27" in self.leiaute.intervalos:
+            intervalos_nomeados = self.leiaute.intervalos["27"]
         else:
             intervalos_nomeados = {}
             print("Aviso: Não há intervalos definidos para o ID 27")
         
         # Percorrer todas as linhas do arquivo
-        for i, linha in enumerate(linhas):
-            # Verificar se a linha começa com '27'
-            if len(linha) >= 2 and linha[0:2] == "27":
+        for i in range(len(documento)):
+            # Verificar se a linha começa com '27' (sem decodificar as demais linhas)
+            if documento.tipo_igual(i, b"27"):
+                linha = documento.linha(i)
                 print(f"Encontrada linha com ID 27 no índice {i}: {linha[:30]}...")
                 
                 # Adicionar índice e intervalos ao resultado
@@ -167,39 +335,67 @@ class GerenciaDBK:
         return resultado
                      
     
-    def editarID(self, indice_linha: int, substituicoes: Dict[str, str], intervalos_nomeados: Dict[str, Tuple[int, int]]) -> str:
+    def editarID(self, indice_linha: int, substituicoes: Dict[str, Any], intervalos_nomeados: Dict[str, Tuple[int, int]]) -> str:
+        """
+        Substitui campos de uma linha do DBK. Apenas a linha editada é decodificada
+        e recodificada; as demais permanecem com os bytes originais.
+
+        Args:
+            indice_linha: Índice da linha a ser editada
+            substituicoes: Dicionário campo -> novo valor (texto ou Dinheiro, formatado
+                diretamente na largura do campo)
+            intervalos_nomeados: Dicionário campo -> (início, fim) na linha
+
+        Returns:
+            Conteúdo da linha após a edição
+        """
         try:
-            linhas = self.dados.splitlines()
-            
-            if indice_linha is None or indice_linha >= len(linhas):
+            if indice_linha is None or indice_linha >= len(self.documento):
                 raise IndexError(f"Índice de linha inválido: {indice_linha}")
                 
-            linha_original = linhas[indice_linha]
+            linha_original = self.documento.linha(indice_linha)
             linha_lista = list(linha_original)
             
             print("LINHA:", linha_original)
             print("SUBSTITUIÇÕES:", substituicoes)
 
+            # Formata e valida todos os valores antes de alterar a linha: se algum for
+            # inválido, nada é aplicado nem registrado no log
+            formatados = []
             for categoria, novo_valor in substituicoes.items():
-                if categoria in intervalos_nomeados:
-                    inicio, fim = intervalos_nomeados[categoria]
-
-                    # Verifica se o valor novo tem o tamanho certo
-                    tamanho_intervalo = fim - inicio
-                    if len(novo_valor) != tamanho_intervalo:
-                        print(f"⚠️ Valor para '{categoria}' deve ter {tamanho_intervalo} caracteres. Ajustando com zeros à esquerda.")
-                        novo_valor = novo_valor.zfill(tamanho_intervalo)
-
-                    if fim <= len(linha_lista):
-                        linha_lista[inicio:fim] = list(novo_valor)
-                    else:
-                        print(f"❌ Índices {inicio}-{fim} fora dos limites da linha {indice_linha}")
-                else:
+                if categoria not in intervalos_nomeados:
                     print(f"❌ Categoria '{categoria}' não está nos intervalos nomeados.")
+                    continue
+                inicio, fim = intervalos_nomeados[categoria]
+
+                # Verifica se o valor novo tem o tamanho certo
+                tamanho_intervalo = fim - inicio
+                if isinstance(novo_valor, Dinheiro):
+                    novo_valor = novo_valor.para_dbk(tamanho_intervalo)
+                elif len(novo_valor) != tamanho_intervalo:
+                    print(f"⚠️ Valor para '{categoria}' deve ter {tamanho_intervalo} caracteres. Ajustando com zeros à esquerda.")
+                    novo_valor = novo_valor.zfill(tamanho_intervalo)
+
+                if fim > len(linha_lista):
+                    print(f"❌ Índices {inicio}-{fim} fora dos limites da linha {indice_linha}")
+                    continue
+                formatados.append((categoria, inicio, fim, novo_valor))
 
-            linhas[indice_linha] = ''.join(linha_lista)
-            self.dados = '\n'.join(linhas)
-            return self.dados
+            alteracoes = []
+            for categoria, inicio, fim, novo_valor in formatados:
+                valor_anterior = ''.join(linha_lista[inicio:fim])
+                linha_lista[inicio:fim] = list(novo_valor)
+                if valor_anterior != novo_valor:
+                    alteracoes.append(AlteracaoCampo(
+                        indice_linha, linha_original[0:2], categoria,
+                        inicio, fim, valor_anterior, novo_valor
+                    ))
+
+            linha_editada = ''.join(linha_lista)
+            self.documento.substituir_linha(indice_linha, linha_editada)
+            # Só entra no log o que de fato foi gravado na linha
+            self.alteracoes.extend(alteracoes)
+            return linha_editada
             
         except Exception as e:
             print(f"Erro ao editar linha {indice_linha}: {e}")
@@ -211,13 +407,48 @@ class GerenciaDBK:
         
        
 
+    def recalcular_controles(self) -> Dict[str, Any]:
+        """
+        Recalcula os campos de controle das linhas alteradas, a partir do log de
+        alterações. Deve ser chamado uma vez por declaração, antes de salvar o arquivo.
+
+        Returns:
+            Dicionário com o resumo do recálculo (controles atualizados e ignorados)
+        """
+        from RecalculoDBK import RecalculadorDBK
+        return RecalculadorDBK(self).recalcular()
+
+    def journal(self) -> JournalDBK:
+        """
+        Retorna o journal com as alterações de campo feitas até o momento.
+        """
+        return JournalDBK.de_gerenciador(self)
+
+    def aplicar_journal(self, journal: JournalDBK) -> Dict[str, Any]:
+        """
+        Reaplica um journal salvo anteriormente, sem repetir a extração do PDF.
+
+        Args:
+            journal: Journal a ser aplicado
+
+        Returns:
+            Dicionário com as quantidades de alterações aplicadas e em conflito
+        """
+        return journal.aplicar(self)
+
+    def diff_unificado(self) -> str:
+        """
+        Gera um diff unificado entre o DBK original e o conteúdo atual em memória.
+        """
+        return self.documento.diff_unificado(f"a/{self.nomeArquivo}", f"b/{NEW_FILE_PREFIX}{self.nomeArquivo}")
+
     def dependentesSubs(self, name: str, dados: Dict[str, str]) -> bool:
         """
         Modifica a seção de dependentes no arquivo DBK.
         
         Args:
             name: Nome do dependente a ser modificado
-            dados: Dicionário com os dados a serem substituídos
+            dados: Dicionário com os dados a serem substituídos (texto ou Dinheiro)
             
         Returns:
             True se a modificação foi bem-sucedida, False caso contrário
@@ -237,98 +468,114 @@ class GerenciaDBK:
             print(f"Erro ao modificar seção de dependentes: {e}")
             return False
 
-    def rendimentosPJ(self, name: str, dados: Dict[str, str]) -> bool:
+    def rendimentosPJ(self, name: str, dados: Dict[str, Any]) -> bool:
         """
         Modifica a seção de rendimentos PJ no arquivo DBK.
         
         Args:
             name: Nome da fonte pagadora a ser modificada
-            dados: Dicionário com os dados a serem substituídos
+            dados: Dicionário com os dados a serem substituídos (texto ou Dinheiro)
             
         Returns:
             True se a modificação foi bem-sucedida, False caso contrário
         """
-        id = '21'  # ID para rendimentos PJ (definido em DBK_ID_MAPPING)
-        try:
-            print(f"Preparando para modificar seção de rendimentos PJ no DBK")
-            resposta = self.procurarID(id, name)
-           
-            indice = resposta["indice_linha"]
-            intervalos = resposta["posicoes"]
-
-            if indice is not None:
-                self.editarID(indice, dados, intervalos)
-                return True
-            else:
-                print(f"⚠️ Fonte pagadora '{name}' não encontrada no arquivo DBK")
-                return False
-        except Exception as e:
-            print(f"Erro ao modificar seção de rendimentos PJ: {e}")
-            return False
+        return self.rendimentosPJLote([(name, dados)])[0]
+
+    def rendimentosPJLote(self, fontes: List[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        """
+        Modifica os rendimentos PJ de várias fontes pagadoras com uma única busca no DBK.
+        
+        Args:
+            fontes: Lista de (nome da fonte pagadora, dados a substituir)
+            
+        Returns:
+            Para cada fonte, True se a modificação foi bem-sucedida
+        """
+        print(f"Preparando para modificar seção de rendimentos PJ no DBK")
+        pedidos = [PedidoRegistro(('21',), nome) for nome, _ in fontes]
+        return self.atualizarRegistros(pedidos, [dados for _, dados in fontes], "Fonte pagadora")
 
     
-    def rendimentosPF(self, name: str, dados: Dict[str, str]) -> bool:
+    def rendimentosPF(self, name: str, dados: Dict[str, Any]) -> bool:
         """
         Modifica a seção de rendimentos PF no arquivo DBK.
         
         Args:
             name: Nome da fonte pagadora a ser modificada
-            dados: Dicionário com os dados a serem substituídos
+            dados: Dicionário com os dados a serem substituídos (texto ou Dinheiro)
             
         Returns:
             True se a modificação foi bem-sucedida, False caso contrário
         """
-        id = '26'  # ID para rendimentos PF (definido em DBK_ID_MAPPING)
-        try:
-            print(f"Preparando para modificar seção de rendimentos PF no DBK")
-            resposta = self.procurarID(id, name)
-            
-            indice = resposta["indice_linha"]
-            intervalos = resposta["posicoes"]
+        print(f"Preparando para modificar seção de rendimentos PF no DBK")
+        return self.atualizarRegistros([PedidoRegistro(('26',), name)], [dados], "Fonte pagadora")[0]
+
+    def rendimentosPFLote(self, meses: List[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        """
+        Modifica os rendimentos PF e do exterior mês a mês, com uma única busca no DBK.
+        Cada mês é localizado pelo campo 'mes' do registro 26.
+        
+        Args:
+            meses: Lista de (mês com dois dígitos, dados a substituir)
             
-            if indice is not None:
-                self.editarID(indice, dados, intervalos)
-                return True
-            else:
-                print(f"⚠️ Fonte pagadora '{name}' não encontrada no arquivo DBK")
-                return False
-        except Exception as e:
-            print(f"Erro ao modificar seção de rendimentos PF: {e}")
-            return False
+        Returns:
+            Para cada mês, True se a modificação foi bem-sucedida
+        """
+        print(f"Preparando para modificar seção de rendimentos PF no DBK")
+        pedidos = [PedidoRegistro(('26',), campos={"mes": mes}) for mes, _ in meses]
+        return self.atualizarRegistros(pedidos, [dados for _, dados in meses], "Rendimento PF do mês")
 
-    def rendimentosIsentos(self, name: str, dados: Dict[str, str]) -> bool:
+    def rendimentosIsentos(self, name: str, dados: Dict[str, Any]) -> bool:
         
         """
         Modifica a seção de rendimentos isentos no arquivo DBK.
         
         Args:
             name: Nome do rendimento a ser modificado
-            dados: Dicionário com os dados a serem substituídos
+            dados: Dicionário com os dados a serem substituídos (texto ou Dinheiro)
             
         Returns:
             True se a modificação foi bem-sucedida, False caso contrário
         """
-        id = '84'  # ID para rendimentos isentos (definido em DBK_ID_MAPPING)
-        try:
-            print(f"Preparando para modificar seção de Rendimentos Isentos no DBK")
-            response = self.procurarID(id, name)
-            
-            if response["indice_linha"] is None:
-                # Tenta com o ID alternativo
-                id = '86'  # ID alternativo para rendimentos isentos
-                response = self.procurarID(id, name)
+        return self.rendimentosIsentosLote([(name, dados)])[0]
+
+    def rendimentosIsentosLote(self, fontes: List[Tuple[str, Dict[str, Any]]]) -> List[bool]:
+        """
+        Modifica os rendimentos isentos de várias fontes. Os registros 84 e 86 são
+        verificados na mesma passada (84 tem preferência).
+        
+        Args:
+            fontes: Lista de (nome da fonte pagadora, dados a substituir)
             
-            if response["indice_linha"] is not None:
-                self.editarID(response["indice_linha"], dados, response['posicoes'])
-                return True
-            else:
-                print(f"⚠️ Rendimento isento '{name}' não encontrado no arquivo DBK")
-                return False
-        except Exception as e:
-            print(f"Erro ao modificar seção de rendimentos isentos: {e}")
-            return False
+        Returns:
+            Para cada fonte, True se a modificação foi bem-sucedida
+        """
+        print(f"Preparando para modificar seção de Rendimentos Isentos no DBK")
+        pedidos = [PedidoRegistro(TIPOS_ISENTOS, nome) for nome, _ in fontes]
+        return self.atualizarRegistros(pedidos, [dados for _, dados in fontes], "Rendimento isento")
 
 
+    def dividasContasLote(self, dividas: List[Tuple[str, Dict[str, Any]]],
+                          contas: List[Tuple[Dict[str, str], Dict[str, Any]]]) -> Tuple[List[bool], List[bool]]:
+        """
+        Modifica dívidas e contas bancárias com uma única passada pelos registros 88 e 89.
+        As dívidas são localizadas pela discriminação; as contas, pelo índice de
+        banco, agência e conta.
+        
+        Args:
+            dividas: Lista de (discriminação da dívida, dados a substituir)
+            contas: Lista de ({"banco", "agencia", "conta"}, dados a substituir)
+            
+        Returns:
+            Tupla (resultado de cada dívida, resultado de cada conta)
+        """
+        print(f"Preparando para modificar seções de Dívidas e Contas Bancárias no DBK")
+        pedidos = [PedidoRegistro(TIPOS_DIVIDAS, descricao) for descricao, _ in dividas]
+        pedidos += [PedidoRegistro(TIPOS_DIVIDAS, campos=chaves) for chaves, _ in contas]
+        substituicoes = [dados for _, dados in dividas] + [dados for _, dados in contas]
+        resultados = self.atualizarRegistros(pedidos, substituicoes, "Dívida ou conta bancária")
+        return resultados[:len(dividas)], resultados[len(dividas):]
+
     def bensDireitos(self, nome: str, dados: Dict[str, str]) -> bool:
         id = '27'  # ID para bens e direitos (definido em DBK_ID_MAPPING)
         try:
@@ -340,8 +587,7 @@ class GerenciaDBK:
                 return False
             
             # Obter a linha específica do DBK
-            linhas = self.dados.splitlines()
-            linha_atual = linhas[response["indice_linha"]]
+            linha_atual = self.documento.linha(response["indice_linha"])
             
             # Extrair o valor da posição específica (531-544)
             if len(linha_atual) >= 544:
@@ -0,0 +1,114 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from DocumentoDBK import AlteracaoCampo
+
+# Extensão dos arquivos de journal (uma alteração por linha, em JSON)
+JOURNAL_EXTENSION = ".journal.jsonl"
+
+
+class JournalDBK:
+    """
+    Classe responsável por registrar, salvar e reaplicar o journal de alterações de
+    campo de um arquivo DBK. Cada entrada guarda linha, tipo de registro, campo,
+    posição, valor anterior e valor novo, permitindo revisar as edições e aplicá-las
+    depois sem repetir a extração do PDF.
+    """
+
+    def __init__(self, arquivo_dbk: str = "", sha256: str = "", entradas: Optional[List[AlteracaoCampo]] = None):
+        """
+        Inicializa o journal.
+
+        Args:
+            arquivo_dbk: Caminho do arquivo DBK ao qual o journal se refere
+            sha256: Hash SHA-256 do DBK original, usado para conferência na aplicação
+            entradas: Lista de alterações de campo
+        """
+        self.arquivo_dbk = arquivo_dbk
+        self.sha256 = sha256
+        self.entradas: List[AlteracaoCampo] = list(entradas or [])
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    @classmethod
+    def de_gerenciador(cls, gerenciador) -> "JournalDBK":
+        """
+        Cria um journal a partir do log de alterações de um GerenciaDBK. O caminho do
+        DBK é gravado absoluto, para que o journal possa ser aplicado de outra pasta.
+        """
+        return cls(os.path.abspath(gerenciador.caminho_dbk), gerenciador.sha256_original, gerenciador.alteracoes)
+
+    def salvar(self, caminho: str) -> str:
+        """
+        Salva o journal em JSON Lines: um cabeçalho seguido de uma alteração por linha.
+
+        Args:
+            caminho: Caminho do arquivo de saída
+
+        Returns:
+            Caminho do arquivo salvo
+        """
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"arquivo_dbk": self.arquivo_dbk, "sha256": self.sha256}, ensure_ascii=False) + "\n")
+            for entrada in self.entradas:
+                f.write(json.dumps(list(entrada), ensure_ascii=False, separators=(',', ':')) + "\n")
+        print(f"Journal com {len(self.entradas)} alterações salvo em: {caminho}")
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "JournalDBK":
+        """
+        Carrega um journal salvo por salvar().
+
+        Raises:
+            ValueError: Se o arquivo não estiver no formato esperado
+        """
+        with open(caminho, 'r', encoding='utf-8') as f:
+            primeira = f.readline()
+            if not primeira:
+                raise ValueError(f"Journal vazio: {caminho}")
+            cabecalho = json.loads(primeira)
+            entradas = [AlteracaoCampo(*json.loads(linha)) for linha in f if linha.strip()]
+        return cls(cabecalho.get("arquivo_dbk", ""), cabecalho.get("sha256", ""), entradas)
+
+    def aplicar(self, gerenciador) -> Dict[str, Any]:
+        """
+        Reaplica as alterações do journal em um GerenciaDBK. Cada campo só é alterado se
+        o valor atual do arquivo for igual ao valor anterior registrado.
+
+        Args:
+            gerenciador: Instância de GerenciaDBK a ser alterada
+
+        Returns:
+            Dicionário com as alterações aplicadas, as em conflito e se o DBK difere
+            do arquivo em que o journal foi gerado ("divergente")
+        """
+        divergente = bool(self.sha256) and gerenciador.sha256_original != self.sha256
+        if divergente:
+            print(f"⚠️ O DBK {gerenciador.nomeArquivo} difere do arquivo em que o journal foi gerado (SHA-256 diferente)")
+
+        documento = gerenciador.documento
+        aplicadas = 0
+        conflitos = []
+        for entrada in self.entradas:
+            if entrada.indice_linha >= len(documento):
+                conflitos.append(entrada)
+                continue
+            atual = documento.linha(entrada.indice_linha)[entrada.inicio:entrada.fim]
+            if atual != entrada.anterior:
+                print(f"❌ Conflito na linha {entrada.indice_linha} ({entrada.tipo}/{entrada.campo}): esperado '{entrada.anterior}', encontrado '{atual}'")
+                conflitos.append(entrada)
+                continue
+            gerenciador.editarID(entrada.indice_linha, {entrada.campo: entrada.novo},
+                                 {entrada.campo: (entrada.inicio, entrada.fim)})
+            aplicadas += 1
+
+        print(f"Journal aplicado: {aplicadas} alterações, {len(conflitos)} conflitos")
+        return {"aplicadas": aplicadas, "conflitos": conflitos, "divergente": divergente}
+
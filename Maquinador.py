@@ -1,10 +1,15 @@
 import hashlib
 import os
+import threading
+from typing import TYPE_CHECKING
 
 from GerenciaDBK import GerenciaDBK
-from pdf_2024_dados import PDF2024Dados
+from acervo import acervo_padrao
 from config import NEW_FILE_PREFIX, WEBHOOK_URL
 
+if TYPE_CHECKING:
+    from pdf_2024_dados import PDF2024Dados
+
 class Maquinador:
     """
     Classe responsável por coordenar a extração de dados de PDFs e a atualização de arquivos DBK.
@@ -65,15 +70,47 @@ class Maquinador:
             arquivo: Caminho para o arquivo PDF
             
         Returns:
-            True se o vínculo foi bem-sucedido, False caso contrário
+            True se a extração foi bem-sucedida e válida, False caso contrário
         """
+        # Importado aqui para que o subcomando dbk-only não carregue a pilha de extração
+        from pdf_2024_dados import PDF2024Dados
         try:
-            self.pdfObjeto = PDF2024Dados(arquivo)
-            return True if self.pdfObjeto.dados else False
+            return self.vincularExtracao(PDF2024Dados(arquivo))
         except Exception as e:
             print(f"Erro ao vincular arquivo PDF: {e}")
             return False
 
+    def vincularExtracao(self, pdf_objeto: "PDF2024Dados") -> bool:
+        """
+        Vincula uma extração de PDF já realizada (ex.: pela pré-busca do pipeline),
+        sem nova chamada ao webhook.
+        
+        Args:
+            pdf_objeto: Instância de PDF2024Dados já carregada
+            
+        Returns:
+            True se a extração é válida, False caso contrário
+        """
+        self.pdfObjeto = pdf_objeto
+        if not self.pdfObjeto.valido:
+            print(f"Extração do PDF inválida: {self.pdfObjeto.erro}")
+            return False
+        return True
+
+    def liberar(self) -> None:
+        """
+        Descarta o DBK e a extração vinculados, para que os buffers sejam liberados
+        assim que a declaração termina, e não quando o coletor encontrar o objeto.
+        """
+        if self.dbkObjeto is not None:
+            self.dbkObjeto.documento = None
+            self.dbkObjeto.alteracoes = []
+        if self.pdfObjeto is not None:
+            self.pdfObjeto.dados = None
+            self.pdfObjeto.extracao = None
+        self.dbkObjeto = None
+        self.pdfObjeto = None
+
     def salvarBKP(self, diretorio_saida: str = None) -> str:
         """
         Salva o arquivo DBK modificado com um novo nome.
@@ -93,7 +130,8 @@ class Maquinador:
             
         try:
             nome_arquivo = self.dbkObjeto.nomeArquivo
-            novo_nome = nome_arquivo.replace("2024-2023", "2025-2024").replace(".DEC", ".DBK")
+            # O exercício de destino vem do leiaute detectado no DBK (ex.: 2024-2023 -> 2025-2024)
+            novo_nome = self.dbkObjeto.leiaute.nome_saida(nome_arquivo)
             
             
             caminho_saida = f"{NEW_FILE_PREFIX}{novo_nome}"
@@ -101,8 +139,29 @@ class Maquinador:
                 os.makedirs(diretorio_saida, exist_ok=True)
                 caminho_saida = os.path.join(diretorio_saida, f"{NEW_FILE_PREFIX}{novo_nome}")
                 
-            with open(caminho_saida, 'w', encoding='utf-8') as f:
-                f.write(self.dbkObjeto.dados)
+            dados = self.dbkObjeto.documento.para_bytes()
+            acervo = acervo_padrao()
+            if acervo:
+                # Com o acervo ativo, cada versão gerada fica guardada comprimida; uma
+                # reexecução que produz o mesmo DBK não regrava a saída
+                anterior = acervo.ultima_versao(caminho_saida)
+                entrada = acervo.guardar(caminho_saida, dados)
+                if (anterior and anterior["sha256"] == entrada["sha256"] and os.path.exists(caminho_saida)
+                        and os.path.getsize(caminho_saida) == len(dados)):
+                    print(f"Arquivo DBK inalterado desde a última execução: {caminho_saida}")
+                    return caminho_saida
+
+            # Grava em binário para preservar codificação e terminadores originais, em um
+            # arquivo temporário renomeado ao final: quem lê a saída nunca vê um DBK pela metade
+            temporario = f"{caminho_saida}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(temporario, 'wb') as f:
+                    f.write(dados)
+                os.replace(temporario, caminho_saida)
+            except BaseException:
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+                raise
                 
             print(f"Arquivo DBK salvo com sucesso em: {caminho_saida}")
             return caminho_saida
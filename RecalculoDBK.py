@@ -0,0 +1,99 @@
+import zlib
+from typing import Any, Dict, List
+
+from config import DBK_CONTROLE_TAMANHO
+from DocumentoDBK import AlteracaoCampo
+
+
+def calcular_controle(conteudo: bytes, tamanho: int = DBK_CONTROLE_TAMANHO) -> str:
+    """
+    Calcula o número de controle de um registro (CRC32 em decimal, com zeros à esquerda).
+
+    Args:
+        conteudo: Bytes do registro que antecedem o campo de controle
+        tamanho: Quantidade de dígitos do campo de controle
+
+    Returns:
+        Número de controle formatado
+    """
+    return str(zlib.crc32(conteudo)).zfill(tamanho)
+
+
+class RecalculadorDBK:
+    """
+    Classe responsável por recalcular, após as edições de campos, os números de
+    controle dos registros alterados de um arquivo DBK.
+    Trabalha de forma incremental: usa as linhas registradas no log de alterações
+    do GerenciaDBK em vez de varrer o arquivo inteiro.
+
+    Os totais da declaração não são recalculados: as posições dos registros
+    totalizadores do leiaute oficial não estão definidas em DBK_INTERVALOS.
+    """
+
+    def __init__(self, gerenciador, tamanho_controle: int = DBK_CONTROLE_TAMANHO):
+        """
+        Inicializa o recalculador.
+
+        Args:
+            gerenciador: Instância de GerenciaDBK com o documento e o log de alterações
+            tamanho_controle: Tamanho do número de controle ao final de cada registro
+        """
+        self.gerenciador = gerenciador
+        self.documento = gerenciador.documento
+        self.tamanho_controle = tamanho_controle
+
+    def _linha_original(self, indice: int, alteracoes: List[AlteracaoCampo]) -> str:
+        """
+        Reconstrói o conteúdo da linha antes das alterações, desfazendo-as em ordem inversa.
+        """
+        linha = list(self.documento.linha(indice))
+        for alteracao in reversed(alteracoes):
+            if alteracao.indice_linha == indice:
+                linha[alteracao.inicio:alteracao.fim] = list(alteracao.anterior)
+        return ''.join(linha)
+
+    def _atualizar_controle(self, indice: int, alteracoes: List[AlteracaoCampo]) -> bool:
+        """
+        Atualiza o número de controle de uma linha alterada. O controle só é reescrito se
+        o controle original conferir com o conteúdo original, o que confirma que o
+        registro usa esse esquema.
+        """
+        tamanho = self.tamanho_controle
+        encoding = self.documento.encoding
+        original = self._linha_original(indice, alteracoes)
+        if len(original) <= tamanho:
+            return False
+        if original[-tamanho:] != calcular_controle(original[:-tamanho].encode(encoding, errors="replace"), tamanho):
+            return False
+
+        atual = self.documento.linha(indice)
+        conteudo = atual[:-tamanho]
+        self.documento.substituir_linha(indice, conteudo + calcular_controle(conteudo.encode(encoding, errors="replace"), tamanho))
+        return True
+
+    def recalcular(self) -> Dict[str, Any]:
+        """
+        Recalcula os números de controle a partir das alterações ainda não processadas do log.
+
+        Returns:
+            Dicionário com a quantidade de controles atualizados/ignorados
+        """
+        alteracoes = self.gerenciador.alteracoes
+        inicio = self.gerenciador.posicao_recalculo
+
+        controles_atualizados = 0
+        controles_ignorados = 0
+        pendentes = alteracoes[inicio:]
+        if self.tamanho_controle:
+            for indice in sorted({alteracao.indice_linha for alteracao in pendentes}):
+                if self._atualizar_controle(indice, pendentes):
+                    controles_atualizados += 1
+                else:
+                    controles_ignorados += 1
+
+        self.gerenciador.posicao_recalculo = len(alteracoes)
+        print(f"Recálculo concluído: {controles_atualizados} controles atualizados, {controles_ignorados} ignorados")
+        return {
+            "controles_atualizados": controles_atualizados,
+            "controles_ignorados": controles_ignorados
+        }
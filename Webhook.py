@@ -1,24 +1,113 @@
 import requests
 import os
 import json
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Dict, Any, Optional
 
 # Importa configurações centralizadas
-from config import WEBHOOK_URL, HTTP_TIMEOUT
+from config import WEBHOOK_URL, HTTP_TIMEOUT, HTTP_TENTATIVAS
+from controle_fluxo import (LimitadorTaxa, ControladorConcorrencia, Disjuntor,
+                            limitador_compartilhado, controlador_compartilhado,
+                            disjuntor_compartilhado)
+
+# Códigos HTTP que indicam sobrecarga do servidor e justificam nova tentativa
+STATUS_SOBRECARGA = {429, 500, 502, 503, 504}
+
+# Uma sessão por thread mantém as conexões HTTP abertas (keep-alive) entre envios
+_sessoes = threading.local()
+
+
+def sessao_http() -> requests.Session:
+    """
+    Retorna a sessão HTTP da thread atual, criando-a no primeiro uso.
+    """
+    sessao = getattr(_sessoes, 'sessao', None)
+    if sessao is None:
+        sessao = _sessoes.sessao = requests.Session()
+    return sessao
 
 class Webhook:
     """
     Classe responsável por enviar arquivos PDF para um webhook externo e processar as respostas.
     """
     
-    def __init__(self, url: str):
+    def __init__(self, url: str, limitador: Optional[LimitadorTaxa] = None,
+                 controlador: Optional[ControladorConcorrencia] = None,
+                 disjuntor: Optional[Disjuntor] = None):
         """
         Inicializa a classe com a URL do webhook.
         
         Args:
             url: URL do webhook para onde os arquivos serão enviados
+            limitador: Limitador de taxa. Se None, usa o compartilhado pelo processo.
+            controlador: Controlador de concorrência. Se None, usa o compartilhado pelo processo.
+            disjuntor: Disjuntor (circuit breaker). Se None, usa o compartilhado pelo processo.
         """
         self.url = url
+        self.limitador = limitador or limitador_compartilhado()
+        self.controlador = controlador or controlador_compartilhado()
+        self.disjuntor = disjuntor or disjuntor_compartilhado()
+
+    @staticmethod
+    def _retry_after(resposta: requests.Response) -> float:
+        """
+        Lê o cabeçalho Retry-After, se presente, em segundos a partir de agora. O
+        cabeçalho pode trazer segundos ou uma data HTTP (ex.: "Wed, 21 Oct 2015 07:28:00 GMT").
+        """
+        valor = (resposta.headers.get('Retry-After') or '').strip()
+        if not valor:
+            return 0.0
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            pass
+        try:
+            data = parsedate_to_datetime(valor)
+        except (TypeError, ValueError):
+            return 0.0
+        if data.tzinfo is None:
+            data = data.replace(tzinfo=timezone.utc)
+        return max(0.0, (data - datetime.now(timezone.utc)).total_seconds())
+
+    def _postar(self, caminho_pdf: str) -> requests.Response:
+        """
+        Envia o PDF respeitando o limitador de taxa e o limite de concorrência,
+        repetindo o envio quando o servidor sinaliza sobrecarga.
+        """
+        nome_arquivo = os.path.basename(caminho_pdf)
+        for tentativa in range(1, HTTP_TENTATIVAS + 1):
+            self.limitador.adquirir()
+            self.controlador.adquirir()
+            inicio = time.monotonic()
+            sucesso = False
+            sobrecarga = False
+            try:
+                with open(caminho_pdf, 'rb') as f:
+                    # Prepara o arquivo para envio
+                    files = {'file': (nome_arquivo, f, 'application/pdf')}
+                    print(f"Enviando arquivo {nome_arquivo} para {self.url}...")
+                    resposta = sessao_http().post(self.url, files=files, timeout=HTTP_TIMEOUT)
+                sobrecarga = resposta.status_code in STATUS_SOBRECARGA
+                sucesso = resposta.ok
+            except requests.exceptions.Timeout:
+                sobrecarga = True
+                if tentativa == HTTP_TENTATIVAS:
+                    raise
+                print(f"⚠️ Tempo limite ao enviar {nome_arquivo} (tentativa {tentativa}/{HTTP_TENTATIVAS})")
+                continue
+            finally:
+                self.controlador.liberar(time.monotonic() - inicio, sucesso, sobrecarga)
+
+            if sobrecarga and tentativa < HTTP_TENTATIVAS:
+                espera = self._retry_after(resposta)
+                if espera:
+                    self.limitador.pausar(espera)
+                print(f"⚠️ Webhook sobrecarregado (HTTP {resposta.status_code}) ao enviar {nome_arquivo} (tentativa {tentativa}/{HTTP_TENTATIVAS})")
+                continue
+            return resposta
 
     def enviar_pdf(self, caminho_pdf: str) -> Dict[str, Any]:
         """
@@ -35,20 +124,26 @@ class Webhook:
             if not os.path.exists(caminho_pdf):
                 return {"erro": f"Arquivo PDF não encontrado: {caminho_pdf}"}
                 
-            with open(caminho_pdf, 'rb') as f:
-                # Prepara o arquivo para envio
-                nome_arquivo = os.path.basename(caminho_pdf)
-                files = {'file': (nome_arquivo, f, 'application/pdf')}
-                
-                # Envia o arquivo para o webhook
-                print(f"Enviando arquivo {nome_arquivo} para {self.url}...")
-                resposta = requests.post(self.url, files=files, timeout=HTTP_TIMEOUT)
-                resposta.raise_for_status()  # Levanta exceção para códigos de erro HTTP
-                
-                # Processa a resposta
-                dados_json = resposta.json()
-                print(f"Resposta recebida com sucesso: {len(str(dados_json))} caracteres")
-                return dados_json
+            # Falha imediatamente enquanto o serviço estiver indisponível
+            if not self.disjuntor.permitir():
+                return {"erro": "Webhook indisponível (disjuntor aberto); envio não realizado."}
+
+            try:
+                resposta = self._postar(caminho_pdf)
+            except Exception:
+                # Timeouts, falhas de conexão ou erros inesperados contam como indisponibilidade
+                self.disjuntor.registrar_falha()
+                raise
+            if resposta.status_code in STATUS_SOBRECARGA:
+                self.disjuntor.registrar_falha()
+            else:
+                self.disjuntor.registrar_sucesso()
+            resposta.raise_for_status()  # Levanta exceção para códigos de erro HTTP
+            
+            # Processa a resposta
+            dados_json = resposta.json()
+            print(f"Resposta recebida com sucesso: {len(str(dados_json))} caracteres")
+            return dados_json
                 
         except FileNotFoundError:
             return {"erro": f"Arquivo PDF não encontrado: {caminho_pdf}"}
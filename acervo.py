@@ -0,0 +1,309 @@
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import ACERVO_ATIVO, ACERVO_DIRETORIO, ACERVO_NIVEL_ZSTD, ACERVO_NIVEL_GZIP
+
+# Estrutura do acervo:
+#   objetos/ab/<sha256>.zst|.gz  conteúdo comprimido, endereçado pelo SHA-256 do original
+#   indice.jsonl                 uma linha por versão guardada: nome, sha256, tamanhos, codec, data
+# Conteúdos iguais (ex.: o mesmo DBK gerado em várias execuções) ocupam um único objeto,
+# e uma versão igual à última do mesmo nome não gera nova linha no índice.
+ARQUIVO_INDICE = "indice.jsonl"
+
+
+def _codecs() -> Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    """
+    Compressores disponíveis por extensão: zstd (stdlib no Python 3.14+ ou pacote
+    zstandard), se houver, e gzip.
+    """
+    codecs = {'gz': (lambda dados: gzip.compress(dados, ACERVO_NIVEL_GZIP, mtime=0), gzip.decompress)}
+    try:
+        from compression import zstd
+        codecs['zst'] = (lambda dados: zstd.compress(dados, ACERVO_NIVEL_ZSTD), zstd.decompress)
+    except ImportError:
+        try:
+            import zstandard
+            codecs['zst'] = (zstandard.ZstdCompressor(level=ACERVO_NIVEL_ZSTD).compress,
+                             lambda dados: zstandard.ZstdDecompressor().decompress(dados))
+        except ImportError:
+            pass
+    return codecs
+
+
+class Acervo:
+    """
+    Armazenamento comprimido e endereçado por conteúdo para os DBKs gerados e os logs.
+    """
+
+    def __init__(self, diretorio: str = ACERVO_DIRETORIO):
+        """
+        Args:
+            diretorio: Pasta do acervo (criada se não existir)
+        """
+        self.diretorio = diretorio
+        self.caminho_indice = os.path.join(diretorio, ARQUIVO_INDICE)
+        self._codecs = _codecs()
+        self.codec = 'zst' if 'zst' in self._codecs else 'gz'
+        self._trava = threading.Lock()
+        self._versoes: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        os.makedirs(os.path.join(diretorio, 'objetos'), exist_ok=True)
+
+    @staticmethod
+    def nome_logico(caminho: str) -> str:
+        """
+        Nome sob o qual um arquivo é registrado: o caminho normalizado, com barras.
+        """
+        return os.path.normpath(caminho).replace(os.sep, '/')
+
+    def _indice(self) -> Dict[str, List[Dict[str, Any]]]:
+        if self._versoes is None:
+            versoes: Dict[str, List[Dict[str, Any]]] = {}
+            if os.path.exists(self.caminho_indice):
+                with open(self.caminho_indice, 'r', encoding='utf-8') as f:
+                    for linha in f:
+                        try:
+                            entrada = json.loads(linha)
+                        except ValueError:
+                            continue  # linha incompleta de uma gravação interrompida
+                        versoes.setdefault(entrada['nome'], []).append(entrada)
+            self._versoes = versoes
+        return self._versoes
+
+    def _caminho_objeto(self, sha256: str, codec: str) -> str:
+        return os.path.join(self.diretorio, 'objetos', sha256[:2], f"{sha256}.{codec}")
+
+    def _objeto_existente(self, sha256: str) -> Optional[str]:
+        for codec in self._codecs:
+            caminho = self._caminho_objeto(sha256, codec)
+            if os.path.exists(caminho):
+                return caminho
+        return None
+
+    def ultima_versao(self, caminho: str) -> Optional[Dict[str, Any]]:
+        with self._trava:
+            versoes = self._indice().get(self.nome_logico(caminho))
+            return versoes[-1] if versoes else None
+
+    def versoes(self, caminho: str) -> List[Dict[str, Any]]:
+        with self._trava:
+            return list(self._indice().get(self.nome_logico(caminho), []))
+
+    def nomes(self) -> List[str]:
+        with self._trava:
+            return sorted(self._indice())
+
+    def guardar(self, caminho: str, dados: bytes) -> Dict[str, Any]:
+        """
+        Guarda uma versão do conteúdo sob o nome do caminho.
+
+        Returns:
+            Entrada do índice da versão (com "novo_objeto": se o conteúdo ainda não existia)
+        """
+        sha256 = hashlib.sha256(dados).hexdigest()
+        nome = self.nome_logico(caminho)
+        objeto = self._objeto_existente(sha256)
+        novo_objeto = objeto is None
+        if novo_objeto:
+            comprimido = self._codecs[self.codec][0](dados)
+            objeto = self._caminho_objeto(sha256, self.codec)
+            os.makedirs(os.path.dirname(objeto), exist_ok=True)
+            # Grava em arquivo temporário e renomeia: processos concorrentes que guardem o
+            # mesmo conteúdo apenas substituem um objeto idêntico
+            descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(objeto), suffix='.tmp')
+            with os.fdopen(descritor, 'wb') as f:
+                f.write(comprimido)
+            os.replace(temporario, objeto)
+
+        entrada = {
+            "nome": nome,
+            "sha256": sha256,
+            "tamanho": len(dados),
+            "comprimido": os.path.getsize(objeto),
+            "codec": objeto.rsplit('.', 1)[1],
+            "data": datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        with self._trava:
+            versoes = self._indice().setdefault(nome, [])
+            if not versoes or versoes[-1]["sha256"] != sha256:
+                versoes.append(entrada)
+                with open(self.caminho_indice, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            else:
+                entrada = versoes[-1]
+        return {**entrada, "novo_objeto": novo_objeto}
+
+    def guardar_arquivo(self, caminho: str, remover: bool = False) -> Dict[str, Any]:
+        """
+        Guarda o conteúdo de um arquivo; com `remover`, apaga o original depois.
+        """
+        with open(caminho, 'rb') as f:
+            entrada = self.guardar(caminho, f.read())
+        if remover:
+            os.remove(caminho)
+        return entrada
+
+    def ler(self, caminho: str, versao: Optional[str] = None) -> bytes:
+        """
+        Lê uma versão guardada.
+
+        Args:
+            caminho: Nome do arquivo no acervo (caminho original)
+            versao: Número da versão (1 = mais antiga, -1 = mais recente) ou prefixo do SHA-256
+                com 8 caracteres ou mais; se None, a mais recente
+
+        Raises:
+            KeyError: Se o nome ou a versão não existirem no acervo
+        """
+        versoes = self.versoes(caminho)
+        if not versoes:
+            raise KeyError(f"Arquivo não encontrado no acervo: {caminho}")
+        if versao is None:
+            entrada = versoes[-1]
+        elif versao.lstrip('-').isdigit() and len(versao) < 8:
+            numero = int(versao)
+            try:
+                entrada = versoes[numero - 1 if numero > 0 else numero]
+            except IndexError:
+                raise KeyError(f"Versão {versao} não existe ({len(versoes)} versões de {caminho})")
+        else:
+            candidatas = [v for v in versoes if v["sha256"].startswith(versao)]
+            if not candidatas:
+                raise KeyError(f"Versão {versao} não encontrada para {caminho}")
+            entrada = candidatas[-1]
+        with open(self._caminho_objeto(entrada["sha256"], entrada["codec"]), 'rb') as f:
+            return self._codecs[entrada["codec"]][1](f.read())
+
+    def restaurar(self, caminho: str, destino: Optional[str] = None, versao: Optional[str] = None) -> str:
+        """
+        Grava uma versão guardada no destino (padrão: o caminho original).
+
+        Returns:
+            Caminho gravado
+        """
+        dados = self.ler(caminho, versao)
+        destino = destino or caminho
+        diretorio = os.path.dirname(destino)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with open(destino, 'wb') as f:
+            f.write(dados)
+        return destino
+
+    def estatisticas(self) -> Dict[str, int]:
+        """
+        Totais do acervo: versões registradas, bytes originais e bytes ocupados pelos objetos.
+        """
+        with self._trava:
+            entradas = [v for versoes in self._indice().values() for v in versoes]
+        objetos = {v["sha256"]: v["comprimido"] for v in entradas}
+        return {
+            "arquivos": len(self.nomes()),
+            "versoes": len(entradas),
+            "objetos": len(objetos),
+            "bytes_originais": sum(v["tamanho"] for v in entradas),
+            "bytes_armazenados": sum(objetos.values()),
+        }
+
+
+_trava_padrao = threading.Lock()
+_diretorio_padrao: Optional[str] = ACERVO_DIRETORIO if ACERVO_ATIVO else None
+_acervo_padrao: Optional[Acervo] = None
+
+
+def definir_acervo_padrao(diretorio: Optional[str]) -> None:
+    """
+    Ativa o acervo usado pelo Maquinador e pelo Logger (ex.: a partir da opção --acervo);
+    None desativa.
+    """
+    global _diretorio_padrao, _acervo_padrao
+    with _trava_padrao:
+        _diretorio_padrao = diretorio
+        _acervo_padrao = None
+
+
+def acervo_padrao() -> Optional[Acervo]:
+    """
+    Retorna o acervo ativo, compartilhado pelas threads do processo, ou None.
+    """
+    global _acervo_padrao
+    with _trava_padrao:
+        if _acervo_padrao is None and _diretorio_padrao:
+            _acervo_padrao = Acervo(_diretorio_padrao)
+        return _acervo_padrao
+
+
+def main() -> int:
+    """
+    Uso:
+        python acervo.py listar [ARQUIVO] [--acervo PASTA]
+        python acervo.py restaurar ARQUIVO [--versao N|SHA256] [--destino CAMINHO] [--acervo PASTA]
+        python acervo.py guardar ARQUIVO... [--remover] [--acervo PASTA]
+    """
+    argumentos = sys.argv[1:]
+    opcoes: Dict[str, str] = {}
+    posicionais: List[str] = []
+    i = 0
+    while i < len(argumentos):
+        if argumentos[i] in ('--acervo', '--versao', '--destino') and i + 1 < len(argumentos):
+            opcoes[argumentos[i]] = argumentos[i + 1]
+            i += 2
+            continue
+        if not argumentos[i].startswith('--'):
+            posicionais.append(argumentos[i])
+        i += 1
+    if not posicionais:
+        print(main.__doc__)
+        return 1
+
+    acervo = Acervo(opcoes.get('--acervo', ACERVO_DIRETORIO))
+    comando, arquivos = posicionais[0], posicionais[1:]
+
+    if comando == 'listar':
+        if arquivos:
+            for numero, versao in enumerate(acervo.versoes(arquivos[0]), 1):
+                print(f"  {numero}. {versao['data']}  {versao['sha256'][:12]}  {versao['tamanho']} bytes")
+            return 0
+        for nome in acervo.nomes():
+            print(f"  {nome} ({len(acervo.versoes(nome))} versões)")
+        estatisticas = acervo.estatisticas()
+        if estatisticas["bytes_originais"]:
+            proporcao = estatisticas["bytes_armazenados"] / estatisticas["bytes_originais"]
+            print(f"\n{estatisticas['versoes']} versões em {estatisticas['objetos']} objetos: "
+                  f"{estatisticas['bytes_originais']} bytes originais, {estatisticas['bytes_armazenados']} "
+                  f"armazenados ({proporcao:.1%})")
+        return 0
+
+    if comando == 'restaurar' and arquivos:
+        try:
+            destino = acervo.restaurar(arquivos[0], opcoes.get('--destino'), opcoes.get('--versao'))
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+        print(f"✅ Restaurado em: {destino}")
+        return 0
+
+    if comando == 'guardar' and arquivos:
+        remover = '--remover' in argumentos
+        for caminho in arquivos:
+            try:
+                entrada = acervo.guardar_arquivo(caminho, remover)
+            except OSError as e:
+                print(f"❌ {caminho}: {e}")
+                continue
+            situacao = "novo" if entrada["novo_objeto"] else "já existente"
+            print(f"✅ {caminho}: {entrada['sha256'][:12]} ({situacao}, {entrada['comprimido']} bytes)")
+        return 0
+
+    print(main.__doc__)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import datetime
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import AGENDADOR_CLASSES, AGENDADOR_CLASSE_PADRAO, AGENDADOR_FOLGA_PRAZO
+
+
+class Trabalho:
+    """
+    Um par PDF/DBK na fila do agendador, com os tempos de espera e processamento.
+    """
+
+    __slots__ = ('pdf', 'dbk', 'escritorio', 'classe', 'prazo', 'tamanho', 'chegada', 'inicio', 'fim', 'sucesso')
+
+    def __init__(self, pdf: str, dbk: str, escritorio: str, classe: str, prazo: Optional[float], tamanho: int):
+        self.pdf = pdf
+        self.dbk = dbk
+        self.escritorio = escritorio
+        self.classe = classe
+        self.prazo = prazo
+        self.tamanho = tamanho
+        self.chegada = time.time()
+        self.inicio: Optional[float] = None
+        self.fim: Optional[float] = None
+        self.sucesso: Optional[bool] = None
+
+    @property
+    def espera(self) -> float:
+        return (self.inicio or time.time()) - self.chegada
+
+    @property
+    def processamento(self) -> float:
+        if self.inicio is None:
+            return 0.0
+        return (self.fim or time.time()) - self.inicio
+
+
+def escritorio_do_par(caminho_pdf: str) -> str:
+    """
+    Escritório de um par: o prefixo da pasta da declaração, como no organiza.py.
+    """
+    from organiza import prefixo_arquivo
+
+    return prefixo_arquivo(os.path.basename(os.path.dirname(os.path.abspath(caminho_pdf))))
+
+
+def interpretar_prazo(texto: str) -> float:
+    """
+    Converte um prazo "AAAA-MM-DD" (fim do dia) ou "AAAA-MM-DDTHH:MM" em timestamp.
+
+    Raises:
+        ValueError: Se o texto não estiver em um dos formatos aceitos
+    """
+    texto = texto.strip()
+    if len(texto) == 10:
+        data = datetime.datetime.strptime(texto, '%Y-%m-%d') + datetime.timedelta(days=1, seconds=-1)
+    else:
+        data = datetime.datetime.fromisoformat(texto)
+    return data.timestamp()
+
+
+def carregar_preferencias(caminho_manifesto: str) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """
+    Lê as chaves opcionais "prioridade" e "prazo" das pastas de um manifesto do organiza.py.
+
+    Returns:
+        Tupla (classe por pasta, prazo por pasta), com as pastas pelo nome
+    """
+    with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+        manifesto = json.load(f)
+
+    classes: Dict[str, str] = {}
+    prazos: Dict[str, float] = {}
+    for item in manifesto.get('pastas', []):
+        nome = os.path.basename(item.get('pasta', ''))
+        if item.get('prioridade'):
+            classes[nome] = item['prioridade']
+        if item.get('prazo'):
+            try:
+                prazos[nome] = interpretar_prazo(item['prazo'])
+            except ValueError:
+                print(f"⚠️ Prazo inválido no manifesto para {nome}: {item['prazo']}")
+    return classes, prazos
+
+
+class Agendador:
+    """
+    Define a ordem de processamento dos pares de um lote:
+
+    - declarações cujo prazo está a menos de `folga` segundos passam à frente de
+      todas, na ordem do prazo;
+    - depois, a menor classe de prioridade disponível;
+    - dentro da classe, os escritórios se alternam pela fatia já consumida (em bytes
+      de PDF despachados), para que um escritório com milhares de declarações não
+      atrase os demais;
+    - dentro do escritório, prazo mais próximo e, em seguida, o menor PDF primeiro
+      (o tamanho estima o tempo de processamento).
+
+    A ordem é decidida a cada despacho, por isso o agendador deve ser consumido
+    como iterador, à medida que os pares são processados.
+    """
+
+    def __init__(self, pares: Iterable[Tuple[str, str]], classes: Optional[Dict[str, str]] = None,
+                 prazos: Optional[Dict[str, float]] = None, folga: float = AGENDADOR_FOLGA_PRAZO):
+        """
+        Args:
+            pares: Pares (PDF, DBK) do lote
+            classes: Classe de prioridade por pasta ou escritório (nomes de AGENDADOR_CLASSES)
+            prazos: Prazo (timestamp) por pasta ou escritório
+            folga: Segundos antes do prazo em que a declaração é antecipada
+        """
+        classes = classes or {}
+        prazos = prazos or {}
+        self.folga = folga
+        self._trava = threading.Lock()
+        self._sequencia = itertools.count()
+        self.trabalhos: List[Trabalho] = []
+        self._por_dbk: Dict[str, Trabalho] = {}
+        # Fila de cada escritório e fila global dos que têm prazo
+        self._filas: Dict[str, list] = {}
+        self._prazos: list = []
+        self._consumo: Dict[str, int] = {}
+        self._versao: Dict[str, int] = {}
+        self._escritorios: list = []
+
+        for pdf, dbk in pares:
+            pasta = os.path.basename(os.path.dirname(os.path.abspath(pdf)))
+            escritorio = escritorio_do_par(pdf)
+            classe = classes.get(pasta) or classes.get(escritorio) or AGENDADOR_CLASSE_PADRAO
+            if classe not in AGENDADOR_CLASSES:
+                print(f"⚠️ Classe de prioridade desconhecida para {pasta}: {classe}; usando {AGENDADOR_CLASSE_PADRAO}")
+                classe = AGENDADOR_CLASSE_PADRAO
+            prazo = prazos.get(pasta, prazos.get(escritorio))
+            try:
+                tamanho = os.path.getsize(pdf)
+            except OSError:
+                tamanho = 0
+            trabalho = Trabalho(pdf, dbk, escritorio, classe, prazo, tamanho)
+            self.trabalhos.append(trabalho)
+            self._por_dbk[dbk] = trabalho
+            chave = (AGENDADOR_CLASSES[classe], prazo if prazo is not None else math.inf, tamanho, next(self._sequencia))
+            heapq.heappush(self._filas.setdefault(escritorio, []), (chave, trabalho))
+            if prazo is not None:
+                heapq.heappush(self._prazos, (prazo, chave[3], trabalho))
+
+        for escritorio in self._filas:
+            self._consumo[escritorio] = 0
+            self._versao[escritorio] = 0
+            self._publicar(escritorio)
+
+    def __len__(self) -> int:
+        return len(self.trabalhos)
+
+    def _publicar(self, escritorio: str) -> None:
+        """
+        Recoloca o escritório na fila de escritórios com a chave da sua próxima declaração.
+        """
+        fila = self._filas[escritorio]
+        while fila and fila[0][1].inicio is not None:
+            heapq.heappop(fila)  # já despachada pela fila de prazos
+        self._versao[escritorio] += 1
+        if fila:
+            chave = fila[0][0]
+            heapq.heappush(self._escritorios, (chave[0], self._consumo[escritorio], chave[1:], escritorio,
+                                               self._versao[escritorio]))
+
+    def _despachar(self, trabalho: Trabalho) -> Trabalho:
+        trabalho.inicio = time.time()
+        self._consumo[trabalho.escritorio] += trabalho.tamanho
+        self._publicar(trabalho.escritorio)
+        return trabalho
+
+    def proximo(self) -> Optional[Trabalho]:
+        """
+        Retira o próximo trabalho a processar, ou None se a fila estiver vazia.
+        """
+        with self._trava:
+            agora = time.time()
+            while self._prazos and self._prazos[0][2].inicio is not None:
+                heapq.heappop(self._prazos)
+            if self._prazos and self._prazos[0][0] - agora <= self.folga:
+                return self._despachar(heapq.heappop(self._prazos)[2])
+
+            while self._escritorios:
+                *_, escritorio, versao = heapq.heappop(self._escritorios)
+                if versao != self._versao[escritorio]:
+                    continue
+                _, trabalho = heapq.heappop(self._filas[escritorio])
+                return self._despachar(trabalho)
+            return None
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        while True:
+            trabalho = self.proximo()
+            if trabalho is None:
+                return
+            yield trabalho.pdf, trabalho.dbk
+
+    def concluir(self, caminho_dbk: str, sucesso: bool) -> None:
+        """
+        Registra o fim do processamento de um par.
+        """
+        trabalho = self._por_dbk.get(caminho_dbk)
+        if trabalho is not None:
+            trabalho.fim = time.time()
+            trabalho.sucesso = sucesso
+
+    def envolver(self, processar: Callable[..., bool]) -> Callable[..., bool]:
+        """
+        Envolve a função de processamento (caminho_dbk, caminho_pdf, ...) para medir o
+        início real de cada par. Usado quando os pares são despachados de uma vez a
+        um pool de workers, em que o despacho não coincide com o início.
+        """
+        def processar_medindo(caminho_dbk: str, caminho_pdf: str, *args, **kwargs) -> bool:
+            trabalho = self._por_dbk.get(caminho_dbk)
+            if trabalho is not None:
+                trabalho.inicio = time.time()
+            sucesso = False
+            try:
+                sucesso = processar(caminho_dbk, caminho_pdf, *args, **kwargs)
+                return sucesso
+            finally:
+                self.concluir(caminho_dbk, bool(sucesso))
+
+        return processar_medindo
+
+    def relatorio(self) -> None:
+        """
+        Imprime os tempos de espera na fila e de processamento por classe, os prazos
+        cumpridos e os escritórios com maior espera média.
+        """
+        concluidos = [t for t in self.trabalhos if t.fim is not None]
+        if not concluidos:
+            return
+
+        def media(valores: List[float]) -> float:
+            return sum(valores) / len(valores) if valores else 0.0
+
+        print("\n=== AGENDAMENTO ===")
+        for classe in sorted(AGENDADOR_CLASSES, key=AGENDADOR_CLASSES.get):
+            grupo = [t for t in concluidos if t.classe == classe]
+            if grupo:
+                print(f"{classe}: {len(grupo)} declarações - espera média {media([t.espera for t in grupo]):.1f}s"
+                      f" (máx. {max(t.espera for t in grupo):.1f}s) - processamento médio"
+                      f" {media([t.processamento for t in grupo]):.1f}s")
+
+        com_prazo = [t for t in concluidos if t.prazo is not None]
+        if com_prazo:
+            perdidos = [t for t in com_prazo if t.fim > t.prazo]
+            print(f"Prazos cumpridos: {len(com_prazo) - len(perdidos)} de {len(com_prazo)}")
+            for t in perdidos:
+                print(f"  ⚠️ {os.path.basename(t.dbk)}: concluída {t.fim - t.prazo:.0f}s após o prazo")
+
+        por_escritorio: Dict[str, List[Trabalho]] = {}
+        for t in concluidos:
+            por_escritorio.setdefault(t.escritorio, []).append(t)
+        if len(por_escritorio) > 1:
+            maiores = sorted(por_escritorio.items(), key=lambda item: media([t.espera for t in item[1]]), reverse=True)
+            print("Escritórios com maior espera média:")
+            for escritorio, grupo in maiores[:5]:
+                print(f"  {escritorio}: {len(grupo)} declarações - espera média {media([t.espera for t in grupo]):.1f}s")
+        print("===================")
+
+
+def interpretar_opcoes(argumentos: List[str]) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """
+    Lê as opções de prioridade da linha de comando:
+        --prioridade urgente=PASTA1,PASTA2   (pastas ou prefixos de escritório)
+        --prazo PASTA=AAAA-MM-DD[THH:MM]
+
+    Returns:
+        Tupla (classe por pasta, prazo por pasta)
+
+    Raises:
+        ValueError: Se alguma opção estiver mal formada
+    """
+    classes: Dict[str, str] = {}
+    prazos: Dict[str, float] = {}
+    for i, arg in enumerate(argumentos[:-1]):
+        valor = argumentos[i + 1]
+        if arg not in ('--prioridade', '--prazo'):
+            continue
+        if '=' not in valor:
+            raise ValueError(f"Opção {arg} deve ter o formato CHAVE=VALOR: {valor}")
+        chave, conteudo = valor.split('=', 1)
+        if arg == '--prioridade':
+            if chave not in AGENDADOR_CLASSES:
+                raise ValueError(f"Classe de prioridade desconhecida: {chave} (use {', '.join(AGENDADOR_CLASSES)})")
+            for pasta in filter(None, conteudo.split(',')):
+                classes[pasta] = chave
+        else:
+            prazos[chave] = interpretar_prazo(conteudo)
+    return classes, prazos
@@ -0,0 +1,82 @@
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Sequence
+
+from config import ORCAMENTO_IMPORTACAO_MS
+
+# Módulos que não podem ser carregados por um simples "import main"
+MODULOS_PESADOS = ('requests', 'Maquinador', 'pdf_2024_dados', 'extratores', 'Webhook')
+
+
+def medir(codigo: str, repeticoes: int) -> float:
+    """
+    Executa o código em interpretadores novos e retorna a mediana do tempo, em ms.
+    """
+    tempos: List[float] = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', codigo], check=True)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def codigo_importacao(modulos: Sequence[str]) -> str:
+    return '; '.join(f"import {modulo}" for modulo in ('main',) + tuple(modulos)) or 'pass'
+
+
+def verificar_modulos_pesados() -> List[str]:
+    """
+    Retorna os módulos pesados carregados por "import main".
+    """
+    codigo = (f"import main, sys; print(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))")
+    saida = subprocess.run([sys.executable, '-c', codigo], check=True, capture_output=True, text=True)
+    return [modulo for modulo in saida.stdout.strip().split(',') if modulo]
+
+
+def executar(repeticoes: int = 7) -> Dict[str, float]:
+    """
+    Mede o tempo de importação de cada subcomando e compara com ORCAMENTO_IMPORTACAO_MS.
+
+    Returns:
+        Tempo medido (ms, descontada a inicialização do interpretador) por subcomando
+    """
+    from main import MODULOS_SUBCOMANDO
+
+    base = medir('pass', repeticoes)
+    print(f"Inicialização do interpretador: {base:.1f} ms (mediana de {repeticoes})")
+    resultados = {}
+    for subcomando, modulos in MODULOS_SUBCOMANDO.items():
+        resultados[subcomando] = max(0.0, medir(codigo_importacao(modulos), repeticoes) - base)
+    return resultados
+
+
+def main() -> int:
+    repeticoes = 7
+    for i, arg in enumerate(sys.argv):
+        if arg == '--repeticoes' and i + 1 < len(sys.argv):
+            try:
+                repeticoes = max(1, int(sys.argv[i + 1]))
+            except ValueError:
+                pass
+
+    falhas = 0
+    pesados = verificar_modulos_pesados()
+    if pesados:
+        falhas += 1
+        print(f"❌ 'import main' carrega módulos pesados: {', '.join(pesados)}")
+
+    for subcomando, tempo in executar(repeticoes).items():
+        orcamento = ORCAMENTO_IMPORTACAO_MS.get(subcomando)
+        if orcamento is not None and tempo > orcamento:
+            falhas += 1
+            print(f"❌ {subcomando}: {tempo:.1f} ms (orçamento {orcamento} ms)")
+        else:
+            print(f"✅ {subcomando}: {tempo:.1f} ms (orçamento {orcamento} ms)")
+
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -29,22 +29,163 @@ DBK_INTERVALOS = {
         "decimoterceiro": (126, 139),
         "irpfdecimoterceiro": (147, 160)
     },
+    "26": {  # Rendimentos PF e do exterior (um registro por mês)
+        "mes": (13, 15),
+        "trabalho": (15, 28),
+        "alugueis": (28, 41),
+        "outros": (41, 54),
+        "exterior": (54, 67),
+        "previdencia": (67, 80),
+        "dependentes": (80, 93),
+        "pensao": (93, 106),
+        "livrocaixa": (106, 119),
+        "impostopago": (119, 132)
+    },
     "27": {
         "valor": (544, 557)
     },
-    #89 e 88 mesma categoria
+    #84 e 86 mesma categoria (rendimentos isentos)
+    "84": {
+        "codigo": (13, 17),
+        "beneficiario": (17, 18),
+        "cpfbeneficiario": (18, 29),
+        "cnpj": (29, 43),
+        "nome": (43, 103),
+        "valor": (103, 116)
+    },
+    "86": {
+        "codigo": (13, 17),
+        "beneficiario": (17, 18),
+        "cpfbeneficiario": (18, 29),
+        "cnpj": (29, 43),
+        "nome": (43, 103),
+        "valor": (103, 116)
+    },
+    #89 e 88 mesma categoria (dívidas e contas bancárias); banco, agência e conta
+    # identificam o registro no índice por chave do GerenciaDBK.localizarRegistros
     "88": {
+        "banco": (13, 16),
+        "agencia": (16, 20),
+        "conta": (20, 40),
         "valor": (103, 116)
     },
     "89": {
+        "banco": (13, 16),
+        "agencia": (16, 20),
+        "conta": (20, 40),
         "valor": (103, 116)
     }
     # Adicione outros intervalos conforme necessu00e1rio
 }
+
+# Leiautes do DBK por exercício (ano de entrega da declaração). O exercício de
+# cada arquivo é detectado pelo cabeçalho ou pelo nome (ex.: "...-2024-2023-...");
+# exercícios sem leiaute próprio usam o de EXERCICIO_PADRAO. Para um novo ano,
+# acrescente uma entrada com os tipos que mudaram, ex.:
+# 2025: {**DBK_INTERVALOS, "27": {"valor": (557, 570)}},
+DBK_LEIAUTES = {
+    2024: DBK_INTERVALOS,
+}
+EXERCICIO_PADRAO = 2024
+
+# Tamanho do número de controle ao final de cada registro (CRC32 do conteúdo
+# anterior, em decimal com zeros à esquerda). Use 0 para desativar o recálculo.
+DBK_CONTROLE_TAMANHO = 10
  
 # Configurau00e7u00f5es de arquivos
 BACKUP_EXTENSION = ".bak"  # Extensão para arquivos de backup
 NEW_FILE_PREFIX = "NEW-"   # Prefixo para novos arquivos gerados
+DIRETORIO_SIMULACAO = "simulacao"  # Destino de journals e diffs no modo --simular
+DIRETORIO_EXTRACOES = "extracoes"  # Respostas de extração salvas (usadas pelo --relatorio)
+EXTENSAO_EXTRACAO_BINARIA = ".irx"  # Extrações do anel salvas no formato binário, sem decodificar
 
 # Configurau00e7u00f5es de timeout para requisiu00e7u00f5es HTTP
 HTTP_TIMEOUT = 30  # segundos
+HTTP_TENTATIVAS = 3  # Tentativas por PDF quando o webhook sinaliza sobrecarga (429/5xx/timeout)
+
+# Controle de fluxo do webhook, compartilhado pelas threads de um processo. Taxa,
+# rajada e concorrência valem para o lote todo: com vários processos (ex.: workers do
+# distribuido.py), informe a quantidade com --webhook-processos e cada processo usa
+# a sua fração (ver controle_fluxo.definir_processos)
+WEBHOOK_TAXA_MAXIMA = 2.0          # Requisições por segundo (0 desativa o limite)
+WEBHOOK_RAJADA = 4                 # Requisições que podem ser emitidas de uma vez
+WEBHOOK_CONCORRENCIA_INICIAL = 2   # Requisições simultâneas no início do lote
+WEBHOOK_CONCORRENCIA_MINIMA = 1    # Por processo
+WEBHOOK_CONCORRENCIA_MAXIMA = 16
+WEBHOOK_LATENCIA_ALVO = 15.0       # Segundos; acima disso a concorrência para de crescer
+WEBHOOK_TAXA_ERRO_MAXIMA = 0.2     # Fração de erros recentes que provoca redução
+WEBHOOK_LIMIAR_FALHAS = 5          # Falhas consecutivas que abrem o disjuntor
+WEBHOOK_TEMPO_RECUPERACAO = 60.0   # Segundos com o disjuntor aberto antes de testar o serviço
+
+# Fila persistente de pares PDF/DBK que falharam (reprocessados com --reprocessar-falhas)
+ARQUIVO_FILA_FALHAS = "falhas.jsonl"
+
+# Pipeline de pré-busca: extrações de PDF adiantadas enquanto os DBKs são reescritos
+PREFETCH_PROFUNDIDADE = 4  # Extrações em andamento ou aguardando consumo (0 desativa)
+
+# Backend de extração de PDF: "webhook" (n8n) ou "local" (camada de texto, requer pypdf)
+EXTRATOR_PDF = "webhook"
+EXTRATOR_LOCAL_PROCESSOS = None  # Processos do extrator local (None usa a quantidade de CPUs)
+EXTRATOR_MEMORIA_COMPARTILHADA = True  # Respostas do extrator local voltam por memória compartilhada, sem pickle
+ANEL_TAMANHO_SLOT = 1 << 20      # Bytes por resposta no anel (respostas maiores voltam pelo pickle)
+PDF_PAGINAS_POR_TRECHO = 8       # PDFs maiores são lidos em trechos de páginas em paralelo (0 desativa)
+PDF_TRECHOS_PARALELOS = 4        # Trechos enviados simultaneamente ao webhook
+WEBHOOK_DIVIDIR_PDF = False      # Envia PDFs grandes ao webhook em trechos alinhados às seções
+
+# Serviço residente (servico.py): API HTTP local para envio de jobs
+SERVICO_HOST = "127.0.0.1"
+SERVICO_PORTA = 8765
+SERVICO_WORKERS = 2                # Jobs processados simultaneamente
+CACHE_EXTRACOES_CAPACIDADE = 256   # Extrações mantidas em memória pelo serviço (0 desativa)
+
+# Modo monitoramento (--monitorar): pastas de clientes processadas conforme chegam
+WATCH_INTERVALO = 2.0   # Segundos entre verificações
+WATCH_DEBOUNCE = 5.0    # Segundos sem alterações nos arquivos para considerar a cópia concluída
+
+# Organização dos arquivos em pastas por prefixo (organiza.py)
+ORGANIZA_WORKERS = 16  # Movimentos simultâneos (útil em compartilhamentos de rede)
+
+# Orçamento de tempo de importação por subcomando do main.py, em milissegundos acima
+# da inicialização do interpretador (verificado pelo benchmark_inicializacao.py)
+ORCAMENTO_IMPORTACAO_MS = {
+    "scan": 40,
+    "report": 80,
+    "dbk-only": 80,
+    "process": 300,
+}
+
+# Execução distribuída (distribuido.py): coordenador TCP e workers em outras máquinas.
+# Os caminhos dos PDFs e DBKs precisam ser os mesmos em todos os nós (sistema de arquivos compartilhado)
+DISTRIBUIDO_HOST = "127.0.0.1"   # Use "0.0.0.0" para aceitar workers de outras máquinas
+DISTRIBUIDO_PORTA = 8766
+DISTRIBUIDO_HEARTBEAT = 5.0      # Segundos entre heartbeats de cada worker
+DISTRIBUIDO_LEASE = 30.0         # Segundos sem heartbeat até a tarefa voltar para a fila
+DISTRIBUIDO_TENTATIVAS = 3       # Atribuições por tarefa antes de considerá-la falha
+DISTRIBUIDO_TEMPO_MAXIMO = 1800.0  # Segundos de processamento por tarefa; depois disso o heartbeat não
+                                  # renova mais o lease e a tarefa volta para a fila (worker travado)
+DISTRIBUIDO_TENTATIVAS_DIR = ".tentativas"  # Saídas de cada tentativa, publicadas só se o resultado for aceito
+
+# Agendador do lote (agendador.py): classes de prioridade, menor número primeiro
+AGENDADOR_CLASSES = {"urgente": 0, "alta": 1, "normal": 2, "baixa": 3}
+AGENDADOR_CLASSE_PADRAO = "normal"
+AGENDADOR_FOLGA_PRAZO = 3600.0  # Segundos antes do prazo em que a declaração passa à frente de todas
+
+# Perfil por declaração (--perfil): alocações listadas no relatório do tracemalloc
+PERFIL_TOP_ALOCACOES = 25
+
+# Orçamento de memória por processo de worker (--memoria-limite): declarações só
+# começam quando a memória estimada cabe no limite (0 desativa)
+MEMORIA_LIMITE_MB = 0
+MEMORIA_FATOR_DBK = 4   # Memória estimada por byte de DBK (documento, índices e edições)
+MEMORIA_FATOR_PDF = 1   # Memória estimada por byte de PDF (resposta da extração)
+MEMORIA_INTERVALO = 0.5  # Segundos entre verificações enquanto uma declaração aguarda admissão
+
+# Acervo comprimido e deduplicado (acervo.py) para DBKs gerados e logs (--acervo)
+ACERVO_ATIVO = False
+ACERVO_DIRETORIO = "acervo"
+ACERVO_NIVEL_ZSTD = 10  # Usado quando há zstd (Python 3.14+ ou pacote zstandard)
+ACERVO_NIVEL_GZIP = 6   # Alternativa da biblioteca padrão
+
+# Cache de normalização de nomes (normalizacao.py), compartilhado por todo o processo
+NORMALIZACAO_CACHE_CAPACIDADE = 65536  # Nomes mantidos (LRU)
+NORMALIZACAO_TAMANHO_MAXIMO = 512      # Textos maiores (ex.: páginas inteiras) não entram no cache
@@ -0,0 +1,271 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from config import (WEBHOOK_TAXA_MAXIMA, WEBHOOK_RAJADA, WEBHOOK_CONCORRENCIA_INICIAL,
+                    WEBHOOK_CONCORRENCIA_MINIMA, WEBHOOK_CONCORRENCIA_MAXIMA,
+                    WEBHOOK_LATENCIA_ALVO, WEBHOOK_TAXA_ERRO_MAXIMA,
+                    WEBHOOK_LIMIAR_FALHAS, WEBHOOK_TEMPO_RECUPERACAO)
+
+
+class LimitadorTaxa:
+    """
+    Limitador de taxa do tipo token bucket, seguro para uso entre threads.
+    Cada requisição consome um token; os tokens são repostos à taxa configurada
+    até o limite da rajada.
+    """
+
+    def __init__(self, taxa: float = WEBHOOK_TAXA_MAXIMA, rajada: int = WEBHOOK_RAJADA):
+        """
+        Inicializa o limitador.
+
+        Args:
+            taxa: Requisições por segundo permitidas (0 desativa o limite)
+            rajada: Quantidade máxima de tokens acumulados
+        """
+        self.taxa = taxa
+        self.rajada = max(1, rajada)
+        self._tokens = float(self.rajada)
+        self._ultimo = time.monotonic()
+        self._pausado_ate = 0.0
+        self._trava = threading.Lock()
+
+    def _repor(self, agora: float) -> None:
+        self._tokens = min(self.rajada, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def adquirir(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda até haver um token disponível e o consome.
+
+        Args:
+            timeout: Tempo máximo de espera em segundos (None espera indefinidamente)
+
+        Returns:
+            True se o token foi obtido, False se o tempo esgotou
+        """
+        if self.taxa <= 0:
+            return True
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._repor(agora)
+                if agora >= self._pausado_ate and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                espera = max(self._pausado_ate - agora, (1 - self._tokens) / self.taxa)
+            if limite is not None:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                espera = min(espera, restante)
+            time.sleep(espera)
+
+    def pausar(self, segundos: float) -> None:
+        """
+        Suspende a emissão de tokens (ex.: ao receber um cabeçalho Retry-After).
+        """
+        with self._trava:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+            self._tokens = 0.0
+
+
+class ControladorConcorrencia:
+    """
+    Controlador adaptativo de requisições simultâneas no estilo AIMD (aumento aditivo,
+    redução multiplicativa). Aumenta o limite enquanto a latência e a taxa de erros
+    estão saudáveis e reduz pela metade ao receber 429/5xx ou timeouts.
+    """
+
+    def __init__(self, inicial: int = WEBHOOK_CONCORRENCIA_INICIAL, minimo: int = WEBHOOK_CONCORRENCIA_MINIMA,
+                 maximo: int = WEBHOOK_CONCORRENCIA_MAXIMA, latencia_alvo: float = WEBHOOK_LATENCIA_ALVO,
+                 taxa_erro_maxima: float = WEBHOOK_TAXA_ERRO_MAXIMA, janela: int = 20,
+                 fator_reducao: float = 0.5):
+        """
+        Inicializa o controlador.
+
+        Args:
+            inicial: Limite inicial de requisições simultâneas
+            minimo: Limite mínimo
+            maximo: Limite máximo
+            latencia_alvo: Latência (s) acima da qual o limite deixa de crescer
+            taxa_erro_maxima: Fração de erros na janela acima da qual o limite é reduzido
+            janela: Quantidade de resultados recentes considerados na taxa de erros
+            fator_reducao: Fator aplicado ao limite em caso de sobrecarga
+        """
+        self.minimo = max(1, minimo)
+        self.maximo = max(self.minimo, maximo)
+        self.limite = float(min(max(inicial, self.minimo), self.maximo))
+        self.latencia_alvo = latencia_alvo
+        self.taxa_erro_maxima = taxa_erro_maxima
+        self.fator_reducao = fator_reducao
+        self.em_voo = 0
+        self._resultados = deque(maxlen=janela)
+        self._ultima_reducao = 0.0
+        self._condicao = threading.Condition()
+
+    def adquirir(self) -> None:
+        """
+        Aguarda até haver vaga dentro do limite atual de requisições simultâneas.
+        """
+        with self._condicao:
+            while self.em_voo >= int(self.limite):
+                self._condicao.wait()
+            self.em_voo += 1
+
+    def liberar(self, latencia: float, sucesso: bool, sobrecarga: bool = False) -> None:
+        """
+        Registra o resultado de uma requisição e ajusta o limite.
+
+        Args:
+            latencia: Duração da requisição em segundos
+            sucesso: Se a requisição foi bem-sucedida
+            sobrecarga: Se o servidor sinalizou sobrecarga (429, 5xx ou timeout)
+        """
+        with self._condicao:
+            self.em_voo = max(0, self.em_voo - 1)
+            self._resultados.append(sucesso)
+            erros = self._resultados.count(False)
+            taxa_erro = erros / len(self._resultados)
+
+            agora = time.monotonic()
+            if sobrecarga or taxa_erro > self.taxa_erro_maxima:
+                # Uma redução por intervalo de latência evita cortes em cascata
+                # causados por várias respostas da mesma rajada
+                if agora - self._ultima_reducao >= max(latencia, self.latencia_alvo):
+                    self.limite = max(self.minimo, self.limite * self.fator_reducao)
+                    self._ultima_reducao = agora
+                    print(f"⚠️ Sobrecarga no webhook: limite de concorrência reduzido para {int(self.limite)}")
+            elif sucesso and latencia <= self.latencia_alvo:
+                # Aumento aditivo: cerca de +1 a cada rodada completa de requisições em voo
+                self.limite = min(self.maximo, self.limite + 1 / self.limite)
+            self._condicao.notify_all()
+
+
+class Disjuntor:
+    """
+    Disjuntor (circuit breaker) para o webhook. Após uma sequência de falhas o circuito
+    abre e as chamadas falham imediatamente, sem esperar o timeout HTTP; depois do
+    tempo de recuperação, uma única chamada de teste é liberada (semiaberto) e o
+    circuito fecha novamente se ela for bem-sucedida.
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    SEMIABERTO = "semiaberto"
+
+    def __init__(self, limiar_falhas: int = WEBHOOK_LIMIAR_FALHAS,
+                 tempo_recuperacao: float = WEBHOOK_TEMPO_RECUPERACAO):
+        """
+        Inicializa o disjuntor.
+
+        Args:
+            limiar_falhas: Falhas consecutivas que abrem o circuito
+            tempo_recuperacao: Segundos com o circuito aberto antes de liberar uma chamada de teste
+        """
+        self.limiar_falhas = max(1, limiar_falhas)
+        self.tempo_recuperacao = tempo_recuperacao
+        self.estado = self.FECHADO
+        self.falhas_consecutivas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._trava = threading.Lock()
+
+    def permitir(self) -> bool:
+        """
+        Indica se uma chamada pode ser feita agora.
+        """
+        with self._trava:
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.ABERTO and time.monotonic() - self._aberto_em >= self.tempo_recuperacao:
+                self.estado = self.SEMIABERTO
+                self._teste_em_andamento = False
+            if self.estado == self.SEMIABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                print("Disjuntor do webhook semiaberto: enviando chamada de teste")
+                return True
+            return False
+
+    def registrar_sucesso(self) -> None:
+        with self._trava:
+            if self.estado != self.FECHADO:
+                print("✅ Disjuntor do webhook fechado: serviço recuperado")
+            self.estado = self.FECHADO
+            self.falhas_consecutivas = 0
+            self._teste_em_andamento = False
+
+    def registrar_falha(self) -> None:
+        with self._trava:
+            self.falhas_consecutivas += 1
+            if self.estado == self.SEMIABERTO or self.falhas_consecutivas >= self.limiar_falhas:
+                if self.estado != self.ABERTO:
+                    print(f"⚠️ Disjuntor do webhook aberto após {self.falhas_consecutivas} falhas; "
+                          f"nova tentativa em {self.tempo_recuperacao:.0f}s")
+                self.estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+                self._teste_em_andamento = False
+
+
+_trava_compartilhada = threading.Lock()
+_limitador_compartilhado: Optional[LimitadorTaxa] = None
+_controlador_compartilhado: Optional[ControladorConcorrencia] = None
+_disjuntor_compartilhado: Optional[Disjuntor] = None
+# Processos que usam o mesmo webhook; cada um recebe esta fração dos limites do lote
+_processos = 1
+
+
+def definir_processos(quantidade: int) -> None:
+    """
+    Informa quantos processos enviam ao mesmo webhook. Os objetos compartilhados
+    valem apenas dentro de um processo, então a taxa, a rajada e a concorrência
+    configuradas são divididas entre os processos para que a soma respeite o limite
+    do lote. Deve ser chamada antes do primeiro envio.
+
+    Args:
+        quantidade: Quantidade de processos (1 usa os limites inteiros)
+    """
+    global _processos, _limitador_compartilhado, _controlador_compartilhado
+    with _trava_compartilhada:
+        _processos = max(1, quantidade)
+        # Recriados com os novos limites no próximo uso
+        _limitador_compartilhado = None
+        _controlador_compartilhado = None
+
+
+def limitador_compartilhado() -> LimitadorTaxa:
+    """
+    Retorna o limitador de taxa compartilhado por todos os workers do processo.
+    """
+    global _limitador_compartilhado
+    with _trava_compartilhada:
+        if _limitador_compartilhado is None:
+            _limitador_compartilhado = LimitadorTaxa(WEBHOOK_TAXA_MAXIMA / _processos,
+                                                     max(1, WEBHOOK_RAJADA // _processos))
+        return _limitador_compartilhado
+
+
+def controlador_compartilhado() -> ControladorConcorrencia:
+    """
+    Retorna o controlador de concorrência compartilhado por todos os workers do processo.
+    """
+    global _controlador_compartilhado
+    with _trava_compartilhada:
+        if _controlador_compartilhado is None:
+            _controlador_compartilhado = ControladorConcorrencia(
+                inicial=max(1, WEBHOOK_CONCORRENCIA_INICIAL // _processos),
+                maximo=max(1, WEBHOOK_CONCORRENCIA_MAXIMA // _processos))
+        return _controlador_compartilhado
+
+
+def disjuntor_compartilhado() -> Disjuntor:
+    """
+    Retorna o disjuntor compartilhado por todos os workers do processo.
+    """
+    global _disjuntor_compartilhado
+    with _trava_compartilhada:
+        if _disjuntor_compartilhado is None:
+            _disjuntor_compartilhado = Disjuntor()
+        return _disjuntor_compartilhado
@@ -0,0 +1,204 @@
+import re
+from array import array
+from decimal import Decimal, InvalidOperation
+from functools import total_ordering
+from typing import Any, Iterable, Union
+
+from config import VALOR_TAMANHO_PADRAO
+
+# Textos aceitos no modo estrito: formato brasileiro ("1.234,56", "1234,5", "1500")
+# ou ponto decimal com até duas casas ("1234.56"). Formas ambíguas como "1.500"
+# (mil e quinhentos ou um e meio?) e "1,234.56" são recusadas.
+_TEXTO_ESTRITO = re.compile(r'-?(?:\d{1,3}(?:\.\d{3})+,\d{1,2}|\d+(?:,\d{1,2})?|\d+\.\d{1,2})')
+
+
+@total_ordering
+class Dinheiro:
+    """
+    Valor monetário em ponto fixo, armazenado como inteiro de centavos.
+    Converte tanto os valores da resposta JSON do PDF (números ou texto no formato
+    brasileiro) quanto os campos de largura fixa do DBK (dígitos com 2 casas
+    decimais implícitas), sem passar por float.
+    """
+
+    __slots__ = ('centavos',)
+
+    def __init__(self, centavos: int = 0):
+        self.centavos = int(centavos)
+
+    @classmethod
+    def de_json(cls, valor: Any, estrito: bool = False) -> "Dinheiro":
+        """
+        Converte um valor da resposta JSON (ex.: 1234.56, "1.234,56", "R$ 10,00").
+        Valores vazios resultam em zero; valores inválidos também, exceto no modo estrito,
+        que recusa ainda textos ambíguos ("1.500", "1,234.56"). Use o modo estrito para
+        tudo o que vai para o DBK; o modo tolerante serve apenas aos relatórios impressos.
+
+        Raises:
+            ValueError: No modo estrito, se o valor não puder ser convertido
+        """
+        if isinstance(valor, Dinheiro):
+            return valor
+        if valor is None or valor == '' or isinstance(valor, bool):
+            return cls()
+        if isinstance(valor, int):
+            return cls(valor * 100)
+        if isinstance(valor, float):
+            # str() usa a menor representação exata do float, evitando 0.1 -> 0.1000000000000000055
+            texto = str(valor)
+        else:
+            texto = str(valor).strip().replace('R$', '').replace(' ', '')
+            if estrito and not _TEXTO_ESTRITO.fullmatch(texto):
+                raise ValueError(f"Valor monetário inválido: {valor!r}")
+            if ',' in texto:
+                texto = texto.replace('.', '').replace(',', '.')
+        try:
+            return cls(int((Decimal(texto) * 100).to_integral_value()))
+        except (InvalidOperation, ValueError):
+            if estrito:
+                raise ValueError(f"Valor monetário inválido: {valor!r}")
+            return cls()
+
+    @classmethod
+    def de_dbk(cls, campo: str) -> "Dinheiro":
+        """
+        Converte um campo monetário do DBK (ex.: "0000000123456" -> R$ 1.234,56).
+
+        Raises:
+            ValueError: Se o campo não for composto apenas de dígitos
+        """
+        campo = campo.strip()
+        if campo and not (campo.isascii() and campo.isdigit()):
+            raise ValueError(f"Campo monetário do DBK inválido: {campo!r}")
+        return cls(int(campo) if campo else 0)
+
+    def para_dbk(self, tamanho: int = VALOR_TAMANHO_PADRAO) -> str:
+        """
+        Formata o valor como campo de largura fixa do DBK.
+
+        Raises:
+            ValueError: Se o valor for negativo ou não couber no campo
+        """
+        if self.centavos < 0:
+            raise ValueError(f"Valor negativo não pode ser gravado no DBK: {self}")
+        texto = str(self.centavos)
+        if len(texto) > tamanho:
+            raise ValueError(f"Valor {self} excede o campo de {tamanho} posições")
+        return texto.zfill(tamanho)
+
+    def __add__(self, outro: Any) -> "Dinheiro":
+        if isinstance(outro, Dinheiro):
+            return Dinheiro(self.centavos + outro.centavos)
+        if outro == 0:
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, outro: Any) -> "Dinheiro":
+        if isinstance(outro, Dinheiro):
+            return Dinheiro(self.centavos - outro.centavos)
+        return NotImplemented
+
+    def __neg__(self) -> "Dinheiro":
+        return Dinheiro(-self.centavos)
+
+    def __abs__(self) -> "Dinheiro":
+        return Dinheiro(abs(self.centavos))
+
+    def __truediv__(self, outro: "Dinheiro") -> float:
+        """
+        Razão entre dois valores (ex.: variação percentual).
+        """
+        if isinstance(outro, Dinheiro):
+            return self.centavos / outro.centavos
+        return NotImplemented
+
+    def __eq__(self, outro: Any) -> bool:
+        if isinstance(outro, Dinheiro):
+            return self.centavos == outro.centavos
+        return NotImplemented
+
+    def __lt__(self, outro: Any) -> bool:
+        if isinstance(outro, Dinheiro):
+            return self.centavos < outro.centavos
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.centavos)
+
+    def __bool__(self) -> bool:
+        return self.centavos != 0
+
+    def __float__(self) -> float:
+        return self.centavos / 100
+
+    def decimal(self) -> Decimal:
+        """
+        Retorna o valor exato como Decimal (em reais).
+        """
+        return Decimal(self.centavos).scaleb(-2)
+
+    def __format__(self, especificacao: str) -> str:
+        # Formata a partir do Decimal para não perder precisão (ex.: f"{valor:.2f}")
+        return format(self.decimal(), especificacao or '.2f')
+
+    def __str__(self) -> str:
+        return format(self, '.2f')
+
+    def __repr__(self) -> str:
+        return f"Dinheiro({self})"
+
+
+class ColunaDinheiro:
+    """
+    Coluna de valores monetários armazenados de forma contígua em centavos
+    (array de inteiros de 64 bits), permitindo somas sem criar objetos por valor.
+    Recebe apenas Dinheiro: a conversão (de_json ou de_dbk) fica com quem conhece
+    a origem do valor.
+    """
+
+    __slots__ = ('centavos',)
+
+    def __init__(self, valores: Iterable[Dinheiro] = ()):
+        self.centavos = array('q')
+        self.extend(valores)
+
+    def append(self, valor: Dinheiro) -> None:
+        self.centavos.append(_centavos(valor))
+
+    def extend(self, valores: Iterable[Dinheiro]) -> None:
+        self.centavos.extend(_centavos(valor) for valor in valores)
+
+    def __len__(self) -> int:
+        return len(self.centavos)
+
+    def __getitem__(self, indice: int) -> Dinheiro:
+        return Dinheiro(self.centavos[indice])
+
+    def total(self) -> Dinheiro:
+        """
+        Soma todos os valores da coluna.
+        """
+        return Dinheiro(sum(self.centavos))
+
+
+def _centavos(valor: Dinheiro) -> int:
+    if not isinstance(valor, Dinheiro):
+        raise TypeError(f"Esperado Dinheiro, recebido {type(valor).__name__}: converta com de_json ou de_dbk")
+    return valor.centavos
+
+
+def somar(valores: Union[ColunaDinheiro, Iterable[Dinheiro]]) -> Dinheiro:
+    """
+    Soma valores monetários já convertidos para Dinheiro.
+
+    Args:
+        valores: ColunaDinheiro ou iterável de valores
+
+    Returns:
+        Total como Dinheiro
+    """
+    if isinstance(valores, ColunaDinheiro):
+        return valores.total()
+    return Dinheiro(sum(_centavos(valor) for valor in valores))
@@ -0,0 +1,546 @@
+import json
+import os
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from config import (ARQUIVO_FILA_FALHAS, DISTRIBUIDO_HOST, DISTRIBUIDO_PORTA, DISTRIBUIDO_HEARTBEAT,
+                    DISTRIBUIDO_LEASE, DISTRIBUIDO_TENTATIVAS, DISTRIBUIDO_TEMPO_MAXIMO,
+                    DISTRIBUIDO_TENTATIVAS_DIR, MEMORIA_LIMITE_MB)
+
+# Protocolo: uma mensagem JSON por linha, sempre no formato requisição -> resposta.
+#   {"tipo": "registrar", "worker": id}                    -> {"ok": true, "heartbeat": s, "lease": s}
+#   {"tipo": "pedir", "worker": id}                        -> {"tarefa": {...}} ou {"tarefa": null, "fim": bool}
+#   {"tipo": "heartbeat", "worker": id, "tarefa": id|null} -> {"ok": bool}
+#   {"tipo": "concluir", "worker": id, "tarefa": id, "sucesso": bool} -> {"ok": bool}
+
+ESTADOS_FINAIS = ("concluida", "falhou")
+
+
+class Tarefa:
+    """
+    Um par PDF/DBK do lote e sua atribuição atual (lease).
+    """
+
+    def __init__(self, id_tarefa: int, pdf: str, dbk: str):
+        self.id = id_tarefa
+        self.pdf = pdf
+        self.dbk = dbk
+        self.estado = "pendente"
+        self.worker: Optional[str] = None
+        self.prazo = 0.0
+        self.atribuida_em = 0.0
+        self.tentativas = 0
+
+    def para_dict(self, simular: bool = False, saida: Optional[str] = None) -> Dict[str, Any]:
+        return {"id": self.id, "pdf": self.pdf, "dbk": self.dbk, "simular": simular,
+                "tentativa": self.tentativas, "saida": saida}
+
+
+class Coordenador:
+    """
+    Distribui os pares de um lote entre workers conectados por TCP. Cada tarefa
+    entregue fica reservada ao worker por um lease, renovado pelos heartbeats; se o
+    worker para de responder, o lease expira e a tarefa volta para a fila. Um worker
+    que responde mas está travado no processamento deixa de ter o lease renovado
+    depois de tempo_maximo segundos com a mesma tarefa.
+    """
+
+    def __init__(self, pares: List[Tuple[str, str]], simular: bool = False,
+                 lease: float = DISTRIBUIDO_LEASE, tentativas: int = DISTRIBUIDO_TENTATIVAS,
+                 tempo_maximo: float = DISTRIBUIDO_TEMPO_MAXIMO, saida: Optional[str] = None):
+        """
+        Args:
+            pares: Pares (PDF, DBK) a processar
+            simular: Repassado para processar_declaracao nos workers
+            lease: Segundos sem heartbeat até a tarefa ser reatribuída
+            tentativas: Atribuições por tarefa antes de considerá-la falha
+            tempo_maximo: Segundos de processamento por atribuição antes de o lease deixar de ser renovado
+            saida: Pasta de saída comum aos workers (padrão: a pasta atual do coordenador)
+        """
+        self.simular = simular
+        self.lease = lease
+        self.tentativas = max(1, tentativas)
+        self.tempo_maximo = tempo_maximo
+        self.saida = os.path.abspath(saida or os.getcwd())
+        self.tarefas: "OrderedDict[int, Tarefa]" = OrderedDict(
+            (i, Tarefa(i, pdf, dbk)) for i, (pdf, dbk) in enumerate(pares)
+        )
+        self._pendentes: Deque[int] = deque(self.tarefas)
+        self._workers: Dict[str, float] = {}
+        self._trava = threading.Lock()
+        self._concluido = threading.Event()
+        if not self.tarefas:
+            self._concluido.set()
+
+    def _finalizar(self, tarefa: Tarefa, estado: str) -> None:
+        tarefa.estado = estado
+        tarefa.worker = None
+        if all(t.estado in ESTADOS_FINAIS for t in self.tarefas.values()):
+            self._concluido.set()
+
+    def registrar(self, worker: str) -> None:
+        with self._trava:
+            self._workers[worker] = time.monotonic()
+        print(f"Worker conectado: {worker}")
+
+    def heartbeat(self, worker: str, id_tarefa: Optional[int]) -> bool:
+        """
+        Renova o lease da tarefa que o worker informa estar processando, desde que
+        ainda esteja dentro do tempo máximo de processamento.
+
+        Returns:
+            False se a tarefa não está mais com o worker ou excedeu o tempo máximo
+        """
+        agora = time.monotonic()
+        with self._trava:
+            self._workers[worker] = agora
+            tarefa = self.tarefas.get(id_tarefa) if id_tarefa is not None else None
+            if tarefa is None or tarefa.worker != worker or tarefa.estado != "atribuida":
+                return id_tarefa is None
+            if agora - tarefa.atribuida_em >= self.tempo_maximo:
+                return False
+            tarefa.prazo = agora + self.lease
+            return True
+
+    def pedir(self, worker: str) -> Optional[Tarefa]:
+        """
+        Entrega a próxima tarefa pendente ao worker, ou None se não houver.
+        """
+        with self._trava:
+            self._workers[worker] = time.monotonic()
+            while self._pendentes:
+                tarefa = self.tarefas[self._pendentes.popleft()]
+                if tarefa.estado != "pendente":
+                    continue
+                tarefa.estado = "atribuida"
+                tarefa.worker = worker
+                tarefa.tentativas += 1
+                tarefa.atribuida_em = time.monotonic()
+                tarefa.prazo = tarefa.atribuida_em + self.lease
+                return tarefa
+        return None
+
+    def concluir(self, worker: str, id_tarefa: int, sucesso: bool) -> bool:
+        """
+        Registra o resultado de uma tarefa.
+
+        Returns:
+            False se a tarefa não estava mais com este worker (lease expirado e reatribuída)
+        """
+        with self._trava:
+            tarefa = self.tarefas.get(id_tarefa)
+            if tarefa is None or tarefa.worker != worker or tarefa.estado != "atribuida":
+                return False
+            self._finalizar(tarefa, "concluida" if sucesso else "falhou")
+        marca = "✅" if sucesso else "❌"
+        print(f"{marca} {os.path.basename(tarefa.dbk)} ({worker})")
+        return True
+
+    def verificar_leases(self) -> int:
+        """
+        Devolve à fila as tarefas com lease expirado (worker sem heartbeat ou travado
+        além do tempo máximo).
+
+        Returns:
+            Quantidade de tarefas reatribuídas ou encerradas como falha
+        """
+        agora = time.monotonic()
+        expiradas = 0
+        with self._trava:
+            for tarefa in self.tarefas.values():
+                if tarefa.estado != "atribuida" or tarefa.prazo > agora:
+                    continue
+                expiradas += 1
+                worker = tarefa.worker
+                motivo = ("tempo máximo excedido" if agora - tarefa.atribuida_em >= self.tempo_maximo
+                          else "lease expirado")
+                if tarefa.tentativas >= self.tentativas:
+                    print(f"❌ {os.path.basename(tarefa.dbk)}: {motivo} em {worker}; "
+                          f"{tarefa.tentativas} tentativas esgotadas")
+                    self._finalizar(tarefa, "falhou")
+                else:
+                    print(f"⚠️ {os.path.basename(tarefa.dbk)}: {motivo} em {worker}; voltando para a fila")
+                    tarefa.estado = "pendente"
+                    tarefa.worker = None
+                    # Reatribuições vão para o início da fila
+                    self._pendentes.appendleft(tarefa.id)
+        return expiradas
+
+    @property
+    def concluido(self) -> bool:
+        return self._concluido.is_set()
+
+    def aguardar(self, intervalo: float = 1.0) -> None:
+        """
+        Bloqueia até todas as tarefas terminarem, verificando os leases periodicamente.
+        """
+        while not self._concluido.wait(intervalo):
+            self.verificar_leases()
+
+    def resumo(self) -> Dict[str, int]:
+        with self._trava:
+            resumo: Dict[str, int] = {}
+            for tarefa in self.tarefas.values():
+                resumo[tarefa.estado] = resumo.get(tarefa.estado, 0) + 1
+            resumo["workers"] = len(self._workers)
+            return resumo
+
+
+class ManipuladorCoordenador(socketserver.StreamRequestHandler):
+    """
+    Atende uma conexão de worker: lê requisições JSON, uma por linha, e responde na mesma ordem.
+    """
+
+    coordenador: Coordenador = None
+
+    def _responder(self, dados: Dict[str, Any]) -> None:
+        self.wfile.write((json.dumps(dados, ensure_ascii=False) + "\n").encode('utf-8'))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        coordenador = self.coordenador
+        for linha in self.rfile:
+            try:
+                mensagem = json.loads(linha)
+                tipo = mensagem.get("tipo")
+                worker = str(mensagem.get("worker") or self.client_address[0])
+            except (ValueError, AttributeError):
+                self._responder({"erro": "Mensagem inválida"})
+                continue
+            try:
+                if tipo == "registrar":
+                    coordenador.registrar(worker)
+                    self._responder({"ok": True, "heartbeat": DISTRIBUIDO_HEARTBEAT, "lease": coordenador.lease})
+                elif tipo == "pedir":
+                    tarefa = coordenador.pedir(worker)
+                    if tarefa is None:
+                        self._responder({"tarefa": None, "fim": coordenador.concluido})
+                    else:
+                        self._responder({"tarefa": tarefa.para_dict(coordenador.simular, coordenador.saida)})
+                elif tipo == "heartbeat":
+                    id_tarefa = mensagem.get("tarefa")
+                    renovado = coordenador.heartbeat(worker, int(id_tarefa) if id_tarefa is not None else None)
+                    self._responder({"ok": renovado})
+                elif tipo == "concluir":
+                    aceito = coordenador.concluir(worker, int(mensagem["tarefa"]), bool(mensagem.get("sucesso")))
+                    self._responder({"ok": aceito})
+                else:
+                    self._responder({"erro": f"Tipo de mensagem desconhecido: {tipo}"})
+            except (KeyError, ValueError) as e:
+                self._responder({"erro": f"Mensagem inválida: {e}"})
+
+
+def iniciar_coordenador(coordenador: Coordenador, host: str = DISTRIBUIDO_HOST,
+                        porta: int = DISTRIBUIDO_PORTA) -> socketserver.ThreadingTCPServer:
+    """
+    Cria o servidor TCP do coordenador e o atende em segundo plano.
+
+    Returns:
+        Servidor em execução (encerre com shutdown() e server_close())
+    """
+    manipulador = type('Manipulador', (ManipuladorCoordenador,), {'coordenador': coordenador})
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    servidor = socketserver.ThreadingTCPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="coordenador", daemon=True).start()
+    return servidor
+
+
+class ConexaoCoordenador:
+    """
+    Conexão de um worker com o coordenador. Compartilhada entre a thread principal e
+    a de heartbeat; cada requisição e sua resposta são trocadas sob uma trava.
+    """
+
+    def __init__(self, host: str, porta: int, worker: str, timeout: float = 30.0):
+        self.worker = worker
+        self._socket = socket.create_connection((host, porta), timeout=timeout)
+        self._leitor = self._socket.makefile('rb')
+        self._trava = threading.Lock()
+
+    def enviar(self, tipo: str, **dados: Any) -> Dict[str, Any]:
+        """
+        Raises:
+            ConnectionError: Se o coordenador encerrar a conexão
+        """
+        mensagem = json.dumps({"tipo": tipo, "worker": self.worker, **dados}) + "\n"
+        with self._trava:
+            self._socket.sendall(mensagem.encode('utf-8'))
+            linha = self._leitor.readline()
+        if not linha:
+            raise ConnectionError("Conexão encerrada pelo coordenador")
+        return json.loads(linha)
+
+    def fechar(self) -> None:
+        try:
+            self._leitor.close()
+            self._socket.close()
+        except OSError:
+            pass
+
+
+def publicar_tentativa(pasta_tentativa: str, saida: str) -> None:
+    """
+    Move as saídas de uma tentativa aceita para a pasta de saída do lote. Cada arquivo
+    é trocado com os.replace (atômico no mesmo sistema de arquivos); a fila de falhas
+    da tentativa é acrescentada à fila do lote em vez de substituí-la.
+
+    Args:
+        pasta_tentativa: Pasta onde a tentativa gravou backup/, extrações etc.
+        saida: Pasta de saída do lote
+    """
+    falhas = os.path.join(pasta_tentativa, ARQUIVO_FILA_FALHAS)
+    if os.path.exists(falhas):
+        with open(falhas, 'rb') as origem, open(os.path.join(saida, ARQUIVO_FILA_FALHAS), 'ab') as destino:
+            shutil.copyfileobj(origem, destino)
+        os.remove(falhas)
+    for raiz, _, arquivos in os.walk(pasta_tentativa):
+        destino_raiz = os.path.join(saida, os.path.relpath(raiz, pasta_tentativa))
+        for nome in arquivos:
+            os.makedirs(destino_raiz, exist_ok=True)
+            os.replace(os.path.join(raiz, nome), os.path.join(destino_raiz, nome))
+    shutil.rmtree(pasta_tentativa, ignore_errors=True)
+
+
+def executar_worker(host: str = DISTRIBUIDO_HOST, porta: int = DISTRIBUIDO_PORTA,
+                    processar: Optional[Callable[..., bool]] = None, worker: Optional[str] = None,
+                    espera: float = 2.0, limite_memoria: int = MEMORIA_LIMITE_MB) -> int:
+    """
+    Pede tarefas ao coordenador e as processa até o lote terminar.
+
+    Args:
+        host: Endereço do coordenador
+        porta: Porta do coordenador
+        processar: Função chamada com (caminho_dbk, caminho_pdf, simular=..., diretorio_saida=...);
+            padrão: processar_declaracao
+        worker: Identificação do worker (padrão: máquina-pid)
+        espera: Segundos entre pedidos quando não há tarefa disponível
+        limite_memoria: RSS máximo deste worker em MiB (0 desativa; ver memoria.OrcamentoMemoria)
+
+    Returns:
+        Quantidade de tarefas processadas com sucesso
+
+    Cada tentativa grava em uma pasta própria dentro da saída do coordenador e só é
+    publicada se o coordenador aceitar o resultado: um worker cujo lease expirou não
+    sobrescreve o que o novo dono da tarefa gravou.
+    """
+    if processar is None:
+        from main import processar_declaracao
+        processar = processar_declaracao
+    orcamento = None
+    if limite_memoria > 0:
+        from memoria import OrcamentoMemoria
+        orcamento = OrcamentoMemoria(limite_memoria)
+        processar = orcamento.envolver(processar)
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+
+    try:
+        conexao = ConexaoCoordenador(host, porta, worker)
+        intervalo = float(conexao.enviar("registrar").get("heartbeat", DISTRIBUIDO_HEARTBEAT))
+    except OSError as e:
+        print(f"❌ Coordenador indisponível em {host}:{porta}: {e}")
+        return 0
+
+    parar = threading.Event()
+    # Tarefa em processamento, informada em cada heartbeat
+    atual: List[Optional[int]] = [None]
+
+    def enviar_heartbeats() -> None:
+        while not parar.wait(intervalo):
+            try:
+                conexao.enviar("heartbeat", tarefa=atual[0])
+            except (OSError, ValueError):
+                return
+
+    threading.Thread(target=enviar_heartbeats, name="heartbeat", daemon=True).start()
+    sucessos = 0
+    try:
+        while True:
+            resposta = conexao.enviar("pedir")
+            tarefa = resposta.get("tarefa")
+            if tarefa is None:
+                if resposta.get("fim"):
+                    break
+                # Tarefas restantes estão com outros workers; uma delas pode voltar para a fila
+                time.sleep(espera)
+                continue
+            print(f"[{worker}] Processando {tarefa['dbk']} (tentativa {tarefa['tentativa']})")
+            saida = tarefa.get("saida") or os.getcwd()
+            pasta_tentativa = os.path.join(saida, DISTRIBUIDO_TENTATIVAS_DIR,
+                                           f"{worker}-{tarefa['id']}-{tarefa['tentativa']}")
+            atual[0] = tarefa["id"]
+            try:
+                sucesso = bool(processar(tarefa["dbk"], tarefa["pdf"], simular=tarefa.get("simular", False),
+                                         diretorio_saida=pasta_tentativa))
+            except Exception as e:
+                print(f"❌ Erro inesperado ao processar {tarefa['dbk']}: {e}")
+                sucesso = False
+            finally:
+                atual[0] = None
+            if not conexao.enviar("concluir", tarefa=tarefa["id"], sucesso=sucesso).get("ok"):
+                print(f"⚠️ [{worker}] Resultado de {tarefa['dbk']} recusado: a tarefa foi reatribuída")
+                shutil.rmtree(pasta_tentativa, ignore_errors=True)
+                continue
+            if os.path.isdir(pasta_tentativa):
+                publicar_tentativa(pasta_tentativa, saida)
+            if sucesso:
+                sucessos += 1
+    except (OSError, ValueError) as e:
+        print(f"❌ [{worker}] Conexão com o coordenador perdida: {e}")
+    finally:
+        parar.set()
+        conexao.fechar()
+    print(f"[{worker}] Encerrado: {sucessos} tarefas concluídas com sucesso")
+    if orcamento:
+        from memoria import relatorio_memoria
+        relatorio_memoria(orcamento)
+    return sucessos
+
+
+def iniciar_workers_locais(quantidade: int, host: str, porta: int, extras: List[str]) -> List[subprocess.Popen]:
+    """
+    Inicia workers em processos locais (útil para testar a distribuição em uma só máquina).
+    """
+    comando = [sys.executable, os.path.abspath(__file__), 'trabalhar', '--host', host, '--porta', str(porta)] + extras
+    return [subprocess.Popen(comando) for _ in range(quantidade)]
+
+
+def coordenar(pares: List[Tuple[str, str]], host: str, porta: int, simular: bool = False,
+              workers_locais: int = 0, extras: Optional[List[str]] = None, saida: Optional[str] = None) -> int:
+    """
+    Executa o coordenador até o lote terminar. As saídas dos workers (backup/, extrações,
+    simulação e fila de falhas) vão para a pasta saida, que deve ser acessível a todos os nós.
+
+    Returns:
+        0 se todas as tarefas foram concluídas com sucesso, 1 caso contrário
+    """
+    coordenador = Coordenador(pares, simular, saida=saida)
+    servidor = iniciar_coordenador(coordenador, host, porta)
+    print(f"Coordenador aguardando workers em {host}:{porta} ({len(pares)} pares; saída em {coordenador.saida})")
+    locais = iniciar_workers_locais(workers_locais, host, porta, extras or []) if workers_locais else []
+    try:
+        coordenador.aguardar()
+    except KeyboardInterrupt:
+        print("\nEncerrando coordenador...")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        for processo in locais:
+            try:
+                processo.wait(timeout=DISTRIBUIDO_LEASE)
+            except subprocess.TimeoutExpired:
+                processo.terminate()
+
+    resumo = coordenador.resumo()
+    print("\n=== RELATÓRIO DISTRIBUÍDO ===")
+    print(f"Pares: {len(pares)} - concluídos: {resumo.get('concluida', 0)} - falhas: {resumo.get('falhou', 0)}"
+          f" - pendentes: {resumo.get('pendente', 0) + resumo.get('atribuida', 0)}")
+    print(f"Workers que participaram: {resumo['workers']}")
+    print("=============================")
+    return 0 if resumo.get('concluida', 0) == len(pares) else 1
+
+
+def main() -> int:
+    """
+    Uso:
+        python distribuido.py coordenar --pasta dados [--saida PASTA] [--host 0.0.0.0] [--porta N] [--locais N] [--simular]
+        python distribuido.py trabalhar --host coordenador [--porta N] [--extrator local] [--memoria-limite MB]
+                                        [--webhook-processos N]
+
+    Com --locais, --extrator e --memoria-limite são repassados aos workers locais.
+    --webhook-processos informa quantos processos dividem os limites do webhook
+    (config.WEBHOOK_TAXA_MAXIMA etc.); para os workers locais, o padrão é --locais.
+    Workers em outras máquinas precisam recebê-lo com o total de workers do lote.
+    """
+    modo = sys.argv[1] if len(sys.argv) > 1 else ''
+    host = DISTRIBUIDO_HOST
+    porta = DISTRIBUIDO_PORTA
+    pasta = 'dadosT'
+    caminho_manifesto = None
+    saida = None
+    locais = 0
+    simular = '--simular' in sys.argv
+    extras: List[str] = []
+    limite_memoria = MEMORIA_LIMITE_MB
+    extrator = None
+    processos_webhook = 0
+
+    for i, arg in enumerate(sys.argv):
+        proximo = sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+        if proximo is None:
+            continue
+        if arg == '--host':
+            host = proximo
+        elif arg == '--pasta':
+            pasta = proximo
+        elif arg == '--manifesto':
+            caminho_manifesto = proximo
+        elif arg == '--saida':
+            saida = proximo
+        elif arg in ('--porta', '--locais'):
+            try:
+                valor = int(proximo)
+            except ValueError:
+                continue
+            if arg == '--porta':
+                porta = valor
+            else:
+                locais = valor
+        elif arg == '--extrator':
+            extrator = proximo
+            extras += ['--extrator', proximo]
+        elif arg == '--memoria-limite':
+            try:
+                limite_memoria = int(proximo)
+            except ValueError:
+                continue
+            extras += ['--memoria-limite', proximo]
+        elif arg == '--webhook-processos':
+            try:
+                processos_webhook = int(proximo)
+            except ValueError:
+                continue
+
+    if modo == 'trabalhar':
+        if processos_webhook:
+            from controle_fluxo import definir_processos
+            definir_processos(processos_webhook)
+        if extrator:
+            from extratores import definir_extrator_padrao
+            try:
+                definir_extrator_padrao(extrator)
+            except ValueError as e:
+                print(f"[!] {e}")
+                return 1
+        executar_worker(host, porta, limite_memoria=limite_memoria)
+        return 0
+
+    if modo == 'coordenar':
+        if caminho_manifesto:
+            from organiza import carregar_manifesto
+            pares, _ = carregar_manifesto(caminho_manifesto)
+        else:
+            from main import buscar_pares
+            pares, _ = buscar_pares(pasta)
+        if not pares:
+            print(f"[!] Nenhum par de arquivos PDF/DBK encontrado na pasta {pasta}")
+            return 1
+        # Caminhos absolutos, para que workers iniciados em outro diretório os encontrem
+        pares = [(os.path.abspath(pdf), os.path.abspath(dbk)) for pdf, dbk in pares]
+        if locais:
+            extras += ['--webhook-processos', str(processos_webhook or locais)]
+        return coordenar(pares, host, porta, simular, locais, extras, saida)
+
+    print(main.__doc__)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import marshal
+import struct
+import sys
+import threading
+from collections import deque
+from collections.abc import Mapping
+from typing import Any, Deque, Dict, Iterator, Tuple
+
+# Formato binário de uma resposta de extração:
+#   cabeçalho: MAGICO, quantidade de seções
+#   tabela: para cada seção, tamanho do nome, nome (UTF-8), tipo, início e tamanho do conteúdo
+#   conteúdo: cada seção serializada com marshal, na ordem da tabela
+# A tabela permite ler uma seção sem decodificar as demais.
+MAGICO = b'IRX1'
+_CABECALHO = struct.Struct('<4sH')
+_ENTRADA = struct.Struct('<BII')
+
+# Tipo do valor de cada seção, consultado na validação sem decodificar o conteúdo
+TIPO_NULO, TIPO_LISTA, TIPO_OBJETO, TIPO_OUTRO = range(4)
+_TIPOS = {TIPO_NULO: type(None), TIPO_LISTA: list, TIPO_OBJETO: dict}
+
+
+def _tipo(valor: Any) -> int:
+    if valor is None:
+        return TIPO_NULO
+    if isinstance(valor, list):
+        return TIPO_LISTA
+    if isinstance(valor, dict):
+        return TIPO_OBJETO
+    return TIPO_OUTRO
+
+
+def serializar(resposta: Dict[str, Any]) -> bytes:
+    """
+    Serializa uma resposta de extração (dicionário de seções) no formato binário.
+
+    Raises:
+        ValueError: Se algum valor não puder ser serializado
+    """
+    conteudos = [(str(nome).encode('utf-8'), _tipo(valor), marshal.dumps(valor)) for nome, valor in resposta.items()]
+    for nome, _, _ in conteudos:
+        if len(nome) > 255:
+            raise ValueError(f"Nome de seção muito longo: {nome[:40]!r}...")
+    tamanho_tabela = sum(1 + len(nome) + _ENTRADA.size for nome, _, _ in conteudos)
+    partes = [_CABECALHO.pack(MAGICO, len(conteudos))]
+    inicio = _CABECALHO.size + tamanho_tabela
+    for nome, tipo, conteudo in conteudos:
+        partes.append(bytes([len(nome)]) + nome + _ENTRADA.pack(tipo, inicio, len(conteudo)))
+        inicio += len(conteudo)
+    partes.extend(conteudo for _, _, conteudo in conteudos)
+    return b''.join(partes)
+
+
+class ExtracaoBinaria(Mapping):
+    """
+    Resposta de extração no formato binário, com a interface de um dicionário somente
+    leitura. Cada seção é decodificada apenas no primeiro acesso.
+    """
+
+    def __init__(self, dados: bytes):
+        """
+        Args:
+            dados: Bytes gerados por serializar()
+
+        Raises:
+            ValueError: Se os bytes não estiverem no formato esperado
+        """
+        if len(dados) < _CABECALHO.size:
+            raise ValueError("Extração binária truncada")
+        magico, quantidade = _CABECALHO.unpack_from(dados, 0)
+        if magico != MAGICO:
+            raise ValueError("Extração binária com assinatura inválida")
+        self._dados = dados
+        self._tabela: Dict[str, Tuple[int, int, int]] = {}
+        posicao = _CABECALHO.size
+        for _ in range(quantidade):
+            tamanho_nome = dados[posicao]
+            nome = bytes(dados[posicao + 1:posicao + 1 + tamanho_nome]).decode('utf-8')
+            posicao += 1 + tamanho_nome
+            self._tabela[nome] = _ENTRADA.unpack_from(dados, posicao)
+            posicao += _ENTRADA.size
+        self._secoes: Dict[str, Any] = {}
+
+    @property
+    def conteudo(self) -> bytes:
+        """
+        Bytes no formato binário, para gravar a extração sem decodificar as seções.
+        """
+        return bytes(self._dados)
+
+    def tipo_secao(self, nome: str) -> type:
+        """
+        Tipo do valor de uma seção (list, dict, NoneType ou object), sem decodificá-la.
+        """
+        return _TIPOS.get(self._tabela[nome][0], object)
+
+    def __getitem__(self, nome: str) -> Any:
+        if nome not in self._secoes:
+            _, inicio, tamanho = self._tabela[nome]
+            self._secoes[nome] = marshal.loads(self._dados[inicio:inicio + tamanho])
+        return self._secoes[nome]
+
+    def __contains__(self, nome: object) -> bool:
+        return nome in self._tabela
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tabela)
+
+    def __len__(self) -> int:
+        return len(self._tabela)
+
+    def __repr__(self) -> str:
+        return f"ExtracaoBinaria({len(self._dados)} bytes, seções: {', '.join(self._tabela)})"
+
+
+def para_dict(resposta: Any) -> Any:
+    """
+    Converte uma ExtracaoBinaria em dicionário (ex.: para gravar em JSON); outros valores
+    são retornados sem alteração.
+    """
+    return dict(resposta) if isinstance(resposta, ExtracaoBinaria) else resposta
+
+
+# Memória compartilhada já anexada por este processo (nos workers do pool): nome -> SharedMemory
+_anexados: Dict[str, Any] = {}
+
+
+def _anexar(nome: str):
+    from multiprocessing import resource_tracker, shared_memory
+
+    if nome not in _anexados:
+        # Quem criou o segmento é responsável por removê-lo, então o worker não o registra
+        # no rastreador de recursos. O rastreador é o mesmo do processo principal: registrar
+        # e depois cancelar aqui apagaria também o registro de quem criou o segmento.
+        if sys.version_info >= (3, 13):
+            memoria = shared_memory.SharedMemory(name=nome, track=False)
+        else:
+            registrar = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                memoria = shared_memory.SharedMemory(name=nome)
+            finally:
+                resource_tracker.register = registrar
+        _anexados[nome] = memoria
+    return _anexados[nome]
+
+
+class AnelCompartilhado:
+    """
+    Buffer circular de slots de tamanho fixo em multiprocessing.shared_memory, para
+    devolver respostas de extração dos processos do pool sem serializá-las com pickle.
+    O processo principal reserva um slot antes de enviar a tarefa; o worker grava a
+    resposta binária no slot e devolve apenas o tamanho; o processo principal copia os
+    bytes e libera o slot para a próxima tarefa.
+    """
+
+    def __init__(self, slots: int, tamanho_slot: int):
+        """
+        Args:
+            slots: Quantidade de slots (respostas em trânsito ao mesmo tempo)
+            tamanho_slot: Tamanho máximo de uma resposta, em bytes
+        """
+        from multiprocessing import shared_memory
+
+        self.slots = max(1, slots)
+        self.tamanho_slot = tamanho_slot
+        self._memoria = shared_memory.SharedMemory(create=True, size=self.slots * tamanho_slot)
+        self._livres: Deque[int] = deque(range(self.slots))
+        self._vagas = threading.Semaphore(self.slots)
+        self._trava = threading.Lock()
+
+    @property
+    def nome(self) -> str:
+        return self._memoria.name
+
+    def reservar(self) -> int:
+        """
+        Reserva o próximo slot livre, aguardando se todos estiverem em uso.
+        """
+        self._vagas.acquire()
+        with self._trava:
+            return self._livres.popleft()
+
+    def ler(self, slot: int, tamanho: int) -> bytes:
+        """
+        Copia o conteúdo gravado em um slot.
+        """
+        inicio = slot * self.tamanho_slot
+        return bytes(self._memoria.buf[inicio:inicio + tamanho])
+
+    def liberar(self, slot: int) -> None:
+        with self._trava:
+            self._livres.append(slot)
+        self._vagas.release()
+
+    @staticmethod
+    def gravar(nome: str, slot: int, tamanho_slot: int, dados: bytes) -> bool:
+        """
+        Executada nos workers: grava os dados no slot do anel indicado pelo nome.
+
+        Returns:
+            False se os dados não couberem no slot
+        """
+        if len(dados) > tamanho_slot:
+            return False
+        memoria = _anexar(nome)
+        inicio = slot * tamanho_slot
+        memoria.buf[inicio:inicio + len(dados)] = dados
+        return True
+
+    def fechar(self) -> None:
+        """
+        Libera e remove o segmento de memória compartilhada.
+        """
+        self._memoria.close()
+        try:
+            self._memoria.unlink()
+        except FileNotFoundError:
+            pass
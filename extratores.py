@@ -0,0 +1,398 @@
+import abc
+import atexit
+import hashlib
+import marshal
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from config import (WEBHOOK_URL, EXTRATOR_PDF, EXTRATOR_LOCAL_PROCESSOS, PDF_PAGINAS_POR_TRECHO,
+                    PDF_TRECHOS_PARALELOS, WEBHOOK_DIVIDIR_PDF, CACHE_EXTRACOES_CAPACIDADE,
+                    EXTRATOR_MEMORIA_COMPARTILHADA, ANEL_TAMANHO_SLOT)
+from extracao_binaria import AnelCompartilhado, ExtracaoBinaria, serializar
+from leitor_receita import (ler_declaracao, contar_paginas, extrair_texto_paginas, gravar_trecho_pdf,
+                            interpretar_declaracao, mesclar_respostas, planejar_trechos_pdf)
+
+
+class Extrator(abc.ABC):
+    """
+    Interface dos backends de extração de PDF. Cada implementação recebe o caminho
+    de um PDF de declaração e retorna a resposta no formato do webhook (seções
+    'declarante', 'dependentes', 'rendimentos_tributaveis_pj', ...), ou {"erro": ...}.
+    """
+
+    nome = ""
+
+    @abc.abstractmethod
+    def extrair(self, caminho_pdf: str) -> Dict[str, Any]:
+        """
+        Extrai os dados da declaração do PDF.
+
+        Args:
+            caminho_pdf: Caminho do PDF da declaração
+
+        Returns:
+            Resposta no formato do webhook, ou {"erro": ...}
+        """
+
+
+class ExtratorWebhook(Extrator):
+    """
+    Extração remota: envia o PDF ao webhook do n8n. Com WEBHOOK_DIVIDIR_PDF, PDFs
+    grandes são divididos em trechos alinhados às seções e enviados em paralelo.
+    """
+
+    nome = "webhook"
+
+    def __init__(self, url: str = WEBHOOK_URL, dividir: bool = WEBHOOK_DIVIDIR_PDF,
+                 paginas_por_trecho: int = PDF_PAGINAS_POR_TRECHO,
+                 trechos_paralelos: int = PDF_TRECHOS_PARALELOS):
+        """
+        Args:
+            url: URL do webhook
+            dividir: Se True, divide PDFs grandes em trechos (requer pypdf)
+            paginas_por_trecho: Tamanho mínimo de cada trecho
+            trechos_paralelos: Trechos enviados simultaneamente
+        """
+        # Importado aqui para que os processos do extrator local não carreguem o requests
+        from Webhook import Webhook
+        self.webhook = Webhook(url)
+        self.dividir = dividir and paginas_por_trecho > 0
+        self.paginas_por_trecho = paginas_por_trecho
+        self.trechos_paralelos = max(1, trechos_paralelos)
+
+    def _planejar(self, caminho_pdf: str) -> List[Tuple[int, int]]:
+        """
+        Retorna os trechos do PDF, ou lista vazia se ele deve ser enviado inteiro.
+        Só o texto das páginas candidatas a corte é extraído, não o do PDF inteiro.
+        """
+        if not self.dividir or not os.path.exists(caminho_pdf):
+            return []
+        try:
+            trechos = planejar_trechos_pdf(caminho_pdf, self.paginas_por_trecho)
+        except Exception as e:
+            print(f"⚠️ Não foi possível dividir {os.path.basename(caminho_pdf)}; enviando inteiro: {e}")
+            return []
+        return trechos if len(trechos) > 1 else []
+
+    def extrair(self, caminho_pdf: str) -> Dict[str, Any]:
+        trechos = self._planejar(caminho_pdf)
+        if not trechos:
+            return self.webhook.enviar_pdf(caminho_pdf)
+
+        base = os.path.splitext(os.path.basename(caminho_pdf))[0]
+        print(f"Enviando {base} em {len(trechos)} trechos: {', '.join(f'{i + 1}-{f}' for i, f in trechos)}")
+        with tempfile.TemporaryDirectory(prefix="trechos_") as pasta:
+            caminhos = [
+                gravar_trecho_pdf(caminho_pdf, inicio, fim, os.path.join(pasta, f"{base}_p{inicio + 1}-{fim}.pdf"))
+                for inicio, fim in trechos
+            ]
+            with ThreadPoolExecutor(max_workers=self.trechos_paralelos, thread_name_prefix="trecho") as executor:
+                # map preserva a ordem dos trechos, o que torna a mesclagem determinística
+                partes = list(executor.map(self.webhook.enviar_pdf, caminhos))
+        return mesclar_respostas(partes)
+
+
+def _extrair_texto_trecho(caminho_pdf: str, inicio: int, fim: int) -> List[str]:
+    """
+    Executada nos processos do pool: extrai o texto de um trecho de páginas.
+    """
+    return extrair_texto_paginas(caminho_pdf, inicio, fim)
+
+
+def _extrair_trecho_no_anel(caminho_pdf: str, inicio: int, fim: int, nome_anel: str, slot: int,
+                            tamanho_slot: int) -> Any:
+    """
+    Executada nos processos do pool: grava o texto das páginas do trecho (marshal) no
+    slot reservado do anel e devolve apenas o tamanho gravado. Trechos maiores que o
+    slot voltam como lista (pickle).
+    """
+    paginas = extrair_texto_paginas(caminho_pdf, inicio, fim)
+    dados = marshal.dumps(paginas)
+    if AnelCompartilhado.gravar(nome_anel, slot, tamanho_slot, dados):
+        return len(dados)
+    return paginas
+
+
+def _ler_declaracao_segura(caminho_pdf: str) -> Dict[str, Any]:
+    """
+    Executada nos processos do pool: converte exceções na resposta de erro do webhook.
+    """
+    if not os.path.exists(caminho_pdf):
+        return {"erro": f"Arquivo PDF não encontrado: {caminho_pdf}"}
+    try:
+        return ler_declaracao(caminho_pdf)
+    except ImportError as e:
+        return {"erro": str(e)}
+    except Exception as e:
+        return {"erro": f"Erro ao ler o PDF localmente: {e}"}
+
+
+def _ler_declaracao_no_anel(caminho_pdf: str, nome_anel: str, slot: int, tamanho_slot: int) -> Any:
+    """
+    Executada nos processos do pool: grava a resposta, no formato binário, no slot
+    reservado do anel e devolve apenas o tamanho gravado. Respostas de erro ou
+    maiores que o slot voltam inteiras (pickle).
+    """
+    resposta = _ler_declaracao_segura(caminho_pdf)
+    if 'erro' in resposta:
+        return resposta
+    dados = serializar(resposta)
+    if AnelCompartilhado.gravar(nome_anel, slot, tamanho_slot, dados):
+        return len(dados)
+    return resposta
+
+
+class ExtratorLocal(Extrator):
+    """
+    Extração local pela camada de texto do PDF, no leiaute impresso da declaração da
+    Receita Federal. O trabalho de CPU roda em um pool de processos compartilhado,
+    de modo que várias threads (ex.: a pré-busca do main) extraiam em paralelo.
+    PDFs grandes têm o texto extraído por trechos de páginas em processos distintos.
+    Com EXTRATOR_MEMORIA_COMPARTILHADA, as respostas voltam ao processo principal por
+    um anel em memória compartilhada, no formato binário de extracao_binaria.
+    """
+
+    nome = "local"
+
+    _trava = threading.Lock()
+    _pool: Optional[ProcessPoolExecutor] = None
+    _anel: Optional[AnelCompartilhado] = None
+
+    def __init__(self, processos: Optional[int] = EXTRATOR_LOCAL_PROCESSOS,
+                 paginas_por_trecho: int = PDF_PAGINAS_POR_TRECHO,
+                 memoria_compartilhada: bool = EXTRATOR_MEMORIA_COMPARTILHADA):
+        """
+        Args:
+            processos: Quantidade de processos do pool (None usa a quantidade de CPUs)
+            paginas_por_trecho: Páginas por trecho em PDFs grandes (0 lê sempre o PDF inteiro)
+            memoria_compartilhada: Se True, as respostas voltam pelo anel em memória compartilhada
+        """
+        self.processos = processos
+        self.paginas_por_trecho = paginas_por_trecho
+        self.memoria_compartilhada = memoria_compartilhada
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with ExtratorLocal._trava:
+            if ExtratorLocal._pool is None:
+                ExtratorLocal._pool = ProcessPoolExecutor(max_workers=self.processos)
+                atexit.register(ExtratorLocal.encerrar)
+            if self.memoria_compartilhada and ExtratorLocal._anel is None:
+                try:
+                    # Dois slots por processo: um em uso pelo worker e outro aguardando leitura
+                    slots = 2 * (self.processos or os.cpu_count() or 1)
+                    ExtratorLocal._anel = AnelCompartilhado(slots, ANEL_TAMANHO_SLOT)
+                except OSError as e:
+                    print(f"⚠️ Memória compartilhada indisponível; respostas voltarão por pickle: {e}")
+                    self.memoria_compartilhada = False
+            return ExtratorLocal._pool
+
+    def _ler_inteiro(self, executor: ProcessPoolExecutor, caminho_pdf: str) -> Any:
+        """
+        Lê o PDF inteiro em um processo do pool, recebendo a resposta pelo anel quando disponível.
+        """
+        anel = ExtratorLocal._anel if self.memoria_compartilhada else None
+        if anel is None:
+            return executor.submit(_ler_declaracao_segura, caminho_pdf).result()
+        slot = anel.reservar()
+        try:
+            resultado = executor.submit(_ler_declaracao_no_anel, caminho_pdf, anel.nome, slot,
+                                        anel.tamanho_slot).result()
+            if isinstance(resultado, int):
+                return ExtracaoBinaria(anel.ler(slot, resultado))
+            return resultado
+        finally:
+            anel.liberar(slot)
+
+    def _ler_trechos(self, executor: ProcessPoolExecutor, caminho_pdf: str, total: int) -> List[str]:
+        """
+        Extrai o texto do PDF por trechos em processos do pool, na ordem das páginas,
+        recebendo cada trecho pelo anel quando disponível.
+        """
+        trechos = [(inicio, min(inicio + self.paginas_por_trecho, total))
+                   for inicio in range(0, total, self.paginas_por_trecho)]
+        anel = ExtratorLocal._anel if self.memoria_compartilhada else None
+        paginas: List[str] = []
+        if anel is None:
+            futuros = [executor.submit(_extrair_texto_trecho, caminho_pdf, inicio, fim) for inicio, fim in trechos]
+            for futuro in futuros:
+                paginas.extend(futuro.result())
+            return paginas
+
+        # Cada trecho ocupa um slot até ser lido; a janela limita os slots desta
+        # extração para que outras threads continuem conseguindo reservar
+        janela = max(1, anel.slots // 2)
+        em_transito: Deque[Tuple[int, Any]] = deque()
+
+        def receber() -> None:
+            slot, futuro = em_transito.popleft()
+            try:
+                resultado = futuro.result()
+                paginas.extend(marshal.loads(anel.ler(slot, resultado)) if isinstance(resultado, int) else resultado)
+            finally:
+                anel.liberar(slot)
+
+        try:
+            for inicio, fim in trechos:
+                if len(em_transito) >= janela:
+                    receber()
+                slot = anel.reservar()
+                em_transito.append((slot, executor.submit(_extrair_trecho_no_anel, caminho_pdf, inicio, fim,
+                                                          anel.nome, slot, anel.tamanho_slot)))
+            while em_transito:
+                receber()
+        finally:
+            # Em caso de erro, aguarda os trechos restantes antes de devolver seus slots
+            for slot, futuro in em_transito:
+                futuro.exception()
+                anel.liberar(slot)
+        return paginas
+
+    def extrair(self, caminho_pdf: str) -> Dict[str, Any]:
+        executor = self._executor()
+        if self.paginas_por_trecho <= 0 or not os.path.exists(caminho_pdf):
+            return self._ler_inteiro(executor, caminho_pdf)
+        try:
+            total = contar_paginas(caminho_pdf)
+            if total <= self.paginas_por_trecho:
+                return self._ler_inteiro(executor, caminho_pdf)
+
+            # O texto é extraído por trechos em paralelo e interpretado de uma vez,
+            # na ordem das páginas, para que itens entre páginas não sejam divididos
+            return interpretar_declaracao(self._ler_trechos(executor, caminho_pdf, total), caminho_pdf)
+        except ImportError as e:
+            return {"erro": str(e)}
+        except Exception as e:
+            return {"erro": f"Erro ao ler o PDF localmente: {e}"}
+
+    @classmethod
+    def encerrar(cls) -> None:
+        """
+        Encerra o pool de processos compartilhado e remove o anel de memória compartilhada.
+        """
+        with cls._trava:
+            if cls._pool is not None:
+                cls._pool.shutdown()
+                cls._pool = None
+            if cls._anel is not None:
+                cls._anel.fechar()
+                cls._anel = None
+
+
+class ExtratorEmCache(Extrator):
+    """
+    Envolve outro extrator, mantendo em memória as respostas válidas indexadas pelo
+    SHA-256 do PDF. Usado pelo serviço residente, em que o mesmo PDF pode ser
+    reenviado (ex.: reprocessamento após corrigir o DBK) sem nova extração.
+    """
+
+    def __init__(self, extrator: Extrator, capacidade: int = CACHE_EXTRACOES_CAPACIDADE):
+        """
+        Args:
+            extrator: Extrator usado quando o PDF não está em cache
+            capacidade: Quantidade máxima de respostas mantidas (as menos usadas saem primeiro)
+        """
+        self.extrator = extrator
+        self.nome = extrator.nome
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.falhas = 0
+        self._respostas: "OrderedDict[str, Any]" = OrderedDict()
+        self._trava = threading.Lock()
+
+    @staticmethod
+    def _chave(caminho_pdf: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(caminho_pdf, 'rb') as f:
+            for bloco in iter(lambda: f.read(65536), b""):
+                sha256.update(bloco)
+        return sha256.hexdigest()
+
+    def extrair(self, caminho_pdf: str) -> Dict[str, Any]:
+        try:
+            chave = self._chave(caminho_pdf)
+        except OSError:
+            return self.extrator.extrair(caminho_pdf)
+
+        with self._trava:
+            if chave in self._respostas:
+                self._respostas.move_to_end(chave)
+                self.acertos += 1
+                print(f"Extração de {os.path.basename(caminho_pdf)} obtida do cache")
+                return self._respostas[chave]
+            self.falhas += 1
+
+        resposta = self.extrator.extrair(caminho_pdf)
+        # Respostas de erro não entram no cache, para que uma nova tentativa extraia de novo
+        if isinstance(resposta, (Mapping, list)) and not (isinstance(resposta, Mapping) and 'erro' in resposta):
+            with self._trava:
+                self._respostas[chave] = resposta
+                while len(self._respostas) > self.capacidade:
+                    self._respostas.popitem(last=False)
+        return resposta
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._trava:
+            return {"itens": len(self._respostas), "acertos": self.acertos, "falhas": self.falhas}
+
+
+EXTRATORES = {
+    ExtratorWebhook.nome: ExtratorWebhook,
+    ExtratorLocal.nome: ExtratorLocal,
+}
+
+_trava_padrao = threading.Lock()
+_nome_padrao = EXTRATOR_PDF
+_capacidade_cache = 0
+_extrator_padrao: Optional[Extrator] = None
+
+
+def criar_extrator(nome: str) -> Extrator:
+    """
+    Cria o extrator pelo nome ('webhook' ou 'local').
+
+    Raises:
+        ValueError: Se o nome não corresponder a um extrator conhecido
+    """
+    if nome not in EXTRATORES:
+        raise ValueError(f"Extrator desconhecido: '{nome}'. Opções: {', '.join(EXTRATORES)}")
+    return EXTRATORES[nome]()
+
+
+def definir_extrator_padrao(nome: Optional[str] = None, capacidade_cache: Optional[int] = None) -> None:
+    """
+    Seleciona o extrator usado pelo PDF2024Dados (ex.: a partir da opção --extrator).
+
+    Args:
+        nome: Nome do extrator; se None, mantém o atual
+        capacidade_cache: Respostas mantidas em memória (0 desativa); se None, mantém a atual
+
+    Raises:
+        ValueError: Se o nome não corresponder a um extrator conhecido
+    """
+    global _nome_padrao, _capacidade_cache, _extrator_padrao
+    if nome is not None and nome not in EXTRATORES:
+        raise ValueError(f"Extrator desconhecido: '{nome}'. Opções: {', '.join(EXTRATORES)}")
+    with _trava_padrao:
+        if nome is not None:
+            _nome_padrao = nome
+        if capacidade_cache is not None:
+            _capacidade_cache = capacidade_cache
+        _extrator_padrao = None
+
+
+def extrator_padrao() -> Extrator:
+    """
+    Retorna o extrator selecionado, compartilhado por todas as threads do processo.
+    """
+    global _extrator_padrao
+    with _trava_padrao:
+        if _extrator_padrao is None:
+            _extrator_padrao = criar_extrator(_nome_padrao)
+            if _capacidade_cache > 0:
+                _extrator_padrao = ExtratorEmCache(_extrator_padrao, _capacidade_cache)
+        return _extrator_padrao
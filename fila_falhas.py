@@ -0,0 +1,101 @@
+import datetime
+import json
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+from config import ARQUIVO_FILA_FALHAS
+
+
+class FilaFalhas:
+    """
+    Fila persistente (dead-letter queue) de pares PDF/DBK cujo processamento falhou.
+    Cada falha é acrescentada como uma linha JSON, de modo que o arquivo sobreviva a
+    interrupções do lote e possa ser reprocessado depois com --reprocessar-falhas.
+    """
+
+    _trava = threading.Lock()
+
+    def __init__(self, caminho: str = ARQUIVO_FILA_FALHAS):
+        """
+        Inicializa a fila.
+
+        Args:
+            caminho: Caminho do arquivo JSON Lines da fila
+        """
+        self.caminho = caminho
+
+    def adicionar(self, caminho_pdf: str, caminho_dbk: str, motivo: str) -> None:
+        """
+        Registra um par que falhou.
+
+        Args:
+            caminho_pdf: Caminho do PDF da declaração
+            caminho_dbk: Caminho do DBK da declaração
+            motivo: Descrição da falha
+        """
+        entrada = {
+            "pdf": caminho_pdf,
+            "dbk": caminho_dbk,
+            "motivo": motivo,
+            "data": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with self._trava:
+            with open(self.caminho, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        print(f"Par registrado na fila de falhas: {os.path.basename(caminho_dbk)} - {motivo}")
+
+    def _ler(self, caminho: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Lê um arquivo da fila, mantendo apenas a falha mais recente de cada par.
+        """
+        por_par: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if not os.path.exists(caminho):
+            return por_par
+        with open(caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                if not linha.strip():
+                    continue
+                try:
+                    entrada = json.loads(linha)
+                except ValueError:
+                    print(f"⚠️ Linha inválida ignorada na fila de falhas: {linha.strip()[:80]}")
+                    continue
+                por_par[(entrada["pdf"], entrada["dbk"])] = entrada
+        return por_par
+
+    def listar(self) -> List[Dict[str, Any]]:
+        """
+        Retorna as falhas registradas, mantendo apenas a mais recente de cada par.
+        """
+        with self._trava:
+            return list(self._ler(self.caminho).values())
+
+    def retirar_todos(self) -> List[Dict[str, Any]]:
+        """
+        Move as falhas para um arquivo de reprocessamento e esvazia a fila. Os pares que
+        falharem novamente voltam a ser registrados; o arquivo de reprocessamento só é
+        apagado por concluir_reprocessamento(), para que uma interrupção não perca pares.
+        """
+        em_reprocessamento = self.caminho + ".reprocessando"
+        with self._trava:
+            pares = self._ler(em_reprocessamento)
+            pares.update(self._ler(self.caminho))
+            with open(em_reprocessamento, 'w', encoding='utf-8') as f:
+                for entrada in pares.values():
+                    f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            if os.path.exists(self.caminho):
+                os.remove(self.caminho)
+        return list(pares.values())
+
+    def concluir_reprocessamento(self) -> None:
+        """
+        Descarta o arquivo de reprocessamento após todos os pares terem sido tentados.
+        """
+        with self._trava:
+            em_reprocessamento = self.caminho + ".reprocessando"
+            if os.path.exists(em_reprocessamento):
+                os.remove(em_reprocessamento)
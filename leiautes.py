@@ -0,0 +1,97 @@
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from config import DBK_LEIAUTES, EXERCICIO_PADRAO
+
+# Exercício no cabeçalho do DBK ("IRPF    2024...") e no nome do arquivo ("...-2024-2023-...")
+_EXERCICIO_CABECALHO = re.compile(rb'^IRPF\s*(20\d{2})')
+_EXERCICIO_NOME = re.compile(r'(20\d{2})-(20\d{2})')
+
+Intervalos = Dict[str, Dict[str, Tuple[int, int]]]
+
+
+class LeiauteDBK:
+    """
+    Leiaute do DBK de um exercício: intervalos dos campos por tipo de registro e as
+    fatias correspondentes, preparadas uma única vez e compartilhadas por todos os
+    arquivos do mesmo exercício.
+    """
+
+    def __init__(self, exercicio: int, intervalos: Intervalos):
+        """
+        Args:
+            exercicio: Ano de entrega da declaração (o ano-calendário é o anterior)
+            intervalos: Dicionário tipo -> campo -> (início, fim)
+        """
+        self.exercicio = exercicio
+        self.intervalos: Intervalos = {tipo: dict(campos) for tipo, campos in intervalos.items()}
+        self.fatias: Dict[str, Dict[str, slice]] = {
+            tipo: {campo: slice(inicio, fim) for campo, (inicio, fim) in campos.items()}
+            for tipo, campos in self.intervalos.items()
+        }
+
+    @property
+    def ano_base(self) -> int:
+        return self.exercicio - 1
+
+    def nome_saida(self, nome_arquivo: str) -> str:
+        """
+        Nome do DBK gerado para o exercício seguinte, ex.: "...-2024-2023-..." -> "...-2025-2024-...".
+        """
+        return nome_arquivo.replace(
+            f"{self.exercicio}-{self.ano_base}", f"{self.exercicio + 1}-{self.exercicio}"
+        ).replace(".DEC", ".DBK")
+
+    def __repr__(self) -> str:
+        return f"LeiauteDBK({self.exercicio}, {len(self.intervalos)} tipos)"
+
+
+_trava = threading.Lock()
+_leiautes: Dict[int, LeiauteDBK] = {}
+
+
+def obter_leiaute(exercicio: int) -> LeiauteDBK:
+    """
+    Retorna o leiaute de um exercício, preparado na primeira vez em que é pedido.
+    Exercícios sem leiaute em DBK_LEIAUTES usam os intervalos de EXERCICIO_PADRAO.
+    """
+    with _trava:
+        if exercicio not in _leiautes:
+            if exercicio not in DBK_LEIAUTES:
+                print(f"⚠️ Sem leiaute para o exercício {exercicio}; usando o de {EXERCICIO_PADRAO}")
+            intervalos = DBK_LEIAUTES.get(exercicio, DBK_LEIAUTES[EXERCICIO_PADRAO])
+            _leiautes[exercicio] = LeiauteDBK(exercicio, intervalos)
+        return _leiautes[exercicio]
+
+
+def detectar_exercicio(cabecalho: bytes, nome_arquivo: str = '') -> Optional[int]:
+    """
+    Detecta o exercício de um DBK pelo primeiro registro (cabeçalho) ou, se ele não
+    informar, pelo nome do arquivo (par "exercício-ano-calendário").
+
+    Args:
+        cabecalho: Bytes do primeiro registro do arquivo
+        nome_arquivo: Nome do arquivo DBK
+
+    Returns:
+        Ano do exercício, ou None se não for possível detectá-lo
+    """
+    encontrado = _EXERCICIO_CABECALHO.match(cabecalho)
+    if encontrado:
+        return int(encontrado.group(1))
+    for exercicio, ano_base in _EXERCICIO_NOME.findall(nome_arquivo):
+        if int(exercicio) == int(ano_base) + 1:
+            return int(exercicio)
+    return None
+
+
+def leiaute_do_dbk(cabecalho: bytes, nome_arquivo: str = '') -> LeiauteDBK:
+    """
+    Retorna o leiaute do exercício detectado no DBK (EXERCICIO_PADRAO se não detectado).
+    """
+    exercicio = detectar_exercicio(cabecalho, nome_arquivo)
+    if exercicio is None:
+        print(f"⚠️ Exercício não identificado em {nome_arquivo or 'DBK'}; usando {EXERCICIO_PADRAO}")
+        exercicio = EXERCICIO_PADRAO
+    return obter_leiaute(exercicio)
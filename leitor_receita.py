@@ -0,0 +1,532 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dinheiro import Dinheiro
+from modelo_pdf import ANO_BASE, SECOES_LISTA, SECOES_OBJETO
+from normalizacao import sem_acentos
+
+# Padrões de campos do leiaute impresso da declaração (PGD da Receita Federal)
+DINHEIRO_RE = r'-?\d{1,3}(?:\.\d{3})*,\d{2}'
+CPF_RE = r'\d{3}\.\d{3}\.\d{3}-\d{2}'
+CNPJ_RE = r'\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}'
+DATA_RE = r'\d{2}/\d{2}/\d{4}'
+
+_VALORES_FINAIS = re.compile(rf'((?:\s+{DINHEIRO_RE})+)\s*$')
+_DINHEIRO = re.compile(DINHEIRO_RE)
+_DOCUMENTO = re.compile(rf'{CNPJ_RE}|{CPF_RE}')
+_DEPENDENTE = re.compile(rf'^(\d{{2}})\s+(.+?)\s+({DATA_RE})(?:\s+({CPF_RE}))?')
+_BEM = re.compile(r'^(\d{2})\s+(\d{2})\s+(.*)$')
+_DIVIDA = re.compile(r'^(\d{2})\s+(.*)$')
+_TIPO_ISENTO = re.compile(r'^(\d{2})\.?\s+(.*)$')
+_BANCO = re.compile(r'BANCO:?\s*(\d{3})')
+_AGENCIA = re.compile(r'AG[EÊ]NCIA:?\s*([\dXx-]+)', re.IGNORECASE)
+_CONTA = re.compile(r'CONTA:?\s*([\dXx.-]+)', re.IGNORECASE)
+_RENAVAM = re.compile(r'RENAVAM:?\s*(\d+)', re.IGNORECASE)
+_NOME_DECLARANTE = re.compile(r'NOME:?\s+(.+?)(?:\s+CPF:|$)')
+_CPF_DECLARANTE = re.compile(rf'CPF:?\s*({CPF_RE})')
+_ANO_CALENDARIO = re.compile(r'ANO[- ]CALENDARIO:?\s*(20\d{2})')
+_EXERCICIO = re.compile(r'EXERCICIO:?\s*(20\d{2})')
+
+# Títulos de seção (sem acentos, em maiúsculas) -> seção da resposta. Títulos
+# mapeados para None apenas encerram a seção anterior.
+TITULOS_SECOES: Tuple[Tuple[str, Optional[str]], ...] = (
+    ('DEPENDENTES', 'dependentes'),
+    ('RENDIMENTOS TRIBUTAVEIS RECEBIDOS DE PESSOA JURIDICA', 'rendimentos_tributaveis_pj'),
+    ('RENDIMENTOS TRIBUTAVEIS RECEBIDOS DE PESSOA FISICA', 'rendimentos_tributaveis_pf'),
+    ('RENDIMENTOS ISENTOS E NAO TRIBUTAVEIS', 'rendimentos_isentos_nao_tributaveis'),
+    ('RENDIMENTOS SUJEITOS A TRIBUTACAO EXCLUSIVA', 'rendimentos_exclusivos_fonte'),
+    ('DECLARACAO DE BENS E DIREITOS', 'declaracao_bens_direitos'),
+    ('DIVIDAS E ONUS REAIS', 'dividas_onus'),
+    ('IMPOSTO PAGO/RETIDO', None),
+    ('PAGAMENTOS EFETUADOS', None),
+    ('DOACOES EFETUADAS', None),
+    ('ALIMENTANDOS', None),
+    ('RESUMO DA DECLARACAO', None),
+    ('DEMONSTRATIVO', None),
+)
+
+# Linhas repetidas no topo de cada página, que não pertencem às seções
+CABECALHOS_PAGINA = ('NOME:', 'CPF:', 'IMPOSTO SOBRE A RENDA', 'DECLARACAO DE AJUSTE ANUAL',
+                     'EXERCICIO', 'PAGINA', 'PAG.')
+
+# Cabeçalhos das colunas das tabelas
+CABECALHOS_COLUNAS = ('CODIGO', 'GRUPO', 'NOME DA FONTE', 'NOME DO DEPENDENTE', 'CNPJ', 'DISCRIMINACAO',
+                      'SITUACAO EM', 'VALORES EM REAIS', '(VALORES EM REAIS)', 'BENEFICIARIO')
+
+
+# Meses da tabela de rendimentos de pessoa física e do exterior
+MESES = ('JANEIRO', 'FEVEREIRO', 'MARCO', 'ABRIL', 'MAIO', 'JUNHO', 'JULHO', 'AGOSTO',
+         'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO')
+
+# Colunas da tabela de rendimentos de pessoa jurídica, na ordem impressa
+COLUNAS_PJ = ('rendimentos', 'previdencia', 'impostoretido', 'decimoterceiro', 'irpfdecimoterceiro')
+
+# Colunas da tabela de rendimentos de pessoa física, na ordem impressa (campos de DBK_INTERVALOS["26"])
+COLUNAS_PF = ('trabalho', 'alugueis', 'outros', 'exterior', 'previdencia', 'dependentes',
+              'pensao', 'livrocaixa', 'impostopago')
+
+
+def titulo_secao(linha: str) -> Tuple[bool, Optional[str]]:
+    """
+    Identifica se a linha é o título de uma seção.
+
+    Returns:
+        Tupla (é título, nome da seção da resposta ou None para seções ignoradas)
+    """
+    normalizada = sem_acentos(linha.strip())
+    for titulo, secao in TITULOS_SECOES:
+        if normalizada.startswith(titulo):
+            return True, secao
+    return False, None
+
+
+def _valores_finais(linha: str) -> Tuple[str, List[str]]:
+    """
+    Separa os valores monetários do final da linha do texto que os antecede.
+    """
+    encontrado = _VALORES_FINAIS.search(linha)
+    if not encontrado:
+        return linha.strip(), []
+    return linha[:encontrado.start()].strip(), _DINHEIRO.findall(encontrado.group(1))
+
+
+def _eh_total(texto: str) -> bool:
+    return sem_acentos(texto).startswith('TOTAL')
+
+
+def _ler_dependentes(linhas: List[str]) -> List[Dict[str, Any]]:
+    itens = []
+    for linha in linhas:
+        encontrado = _DEPENDENTE.match(linha.strip())
+        if encontrado:
+            codigo, nome, nascimento, cpf = encontrado.groups()
+            itens.append({
+                'codigo': codigo,
+                'nome': nome.strip(),
+                'data_nascimento': nascimento,
+                'cpf': cpf or '',
+            })
+    return itens
+
+
+def _campo_dbk(valor: str) -> str:
+    """
+    Converte um valor impresso ("1.234,56") para o formato dos campos do DBK, usado
+    nas seções com chaves de DBK_INTERVALOS ('dados' de PJ e PF).
+    """
+    return Dinheiro.de_json(valor, estrito=True).para_dbk()
+
+
+def _ler_rendimentos_pj(linhas: List[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Lê a tabela de rendimentos de pessoa jurídica, que alimenta tanto a seção
+    'rendimentos_tributaveis' quanto 'rendimentos_tributaveis_pj' (campos do DBK).
+    Linhas com quantidade de valores diferente das colunas são ignoradas, como na
+    tabela de pessoa física.
+    """
+    tributaveis = []
+    pj = []
+    nome_pendente = ''
+    for linha in linhas:
+        texto, valores = _valores_finais(linha)
+        if not valores:
+            # Nomes longos de fonte pagadora quebram em mais de uma linha
+            if texto and not _eh_total(texto) and not _DOCUMENTO.search(texto):
+                nome_pendente = f"{nome_pendente} {texto}".strip()
+            continue
+        if _eh_total(texto):
+            nome_pendente = ''
+            continue
+        documento = _DOCUMENTO.search(texto)
+        cnpj = documento.group(0) if documento else ''
+        nome = f"{nome_pendente} {_DOCUMENTO.sub('', texto)}".strip()
+        nome_pendente = ''
+        if len(valores) != len(COLUNAS_PJ):
+            print(f"⚠️ Rendimentos PJ de {nome or 'fonte sem nome'} ignorados: {len(valores)} valores, "
+                  f"esperados {len(COLUNAS_PJ)}")
+            continue
+        rendimentos, previdencia, irrf, decimo, irrf_decimo = valores
+        tributaveis.append({
+            'fonte': nome,
+            'cnpj': cnpj,
+            'valor': rendimentos,
+            'contrib_previdencia_oficial': previdencia,
+            'imposto_retido_fonte': irrf,
+            'decimo_terceiro': {'valor': decimo, 'irrf': irrf_decimo},
+        })
+        pj.append({
+            'nome': nome,
+            'dados': {
+                'rendimentos': _campo_dbk(rendimentos),
+                'previdencia': _campo_dbk(previdencia),
+                'impostoretido': _campo_dbk(irrf),
+                'decimoterceiro': _campo_dbk(decimo),
+                'irpfdecimoterceiro': _campo_dbk(irrf_decimo),
+            },
+        })
+    return tributaveis, pj
+
+
+def _ler_rendimentos_pf(linhas: List[str]) -> List[Dict[str, Any]]:
+    """
+    Lê a tabela mensal de rendimentos recebidos de pessoa física e do exterior.
+    Meses sem nenhum valor impresso são omitidos. Linhas com quantidade de valores
+    diferente das colunas são ignoradas: sem a posição de cada valor, não há como
+    saber a qual coluna pertence.
+    """
+    itens = []
+    for linha in linhas:
+        texto, valores = _valores_finais(linha)
+        nome_mes = sem_acentos(texto)
+        if not valores or nome_mes not in MESES:
+            continue
+        if len(valores) != len(COLUNAS_PF):
+            print(f"⚠️ Rendimentos PF de {texto.strip()} ignorados: {len(valores)} valores, "
+                  f"esperados {len(COLUNAS_PF)}")
+            continue
+        itens.append({
+            'mes': f"{MESES.index(nome_mes) + 1:02d}",
+            'dados': {coluna: _campo_dbk(valor) for coluna, valor in zip(COLUNAS_PF, valores)},
+        })
+    return itens
+
+
+def _ler_fontes(linhas: List[str]) -> List[Dict[str, Any]]:
+    """
+    Lê seções organizadas por tipo de rendimento, com uma linha por fonte pagadora
+    (rendimentos isentos e de tributação exclusiva).
+    """
+    itens = []
+    tipo = ''
+    for linha in linhas:
+        texto, valores = _valores_finais(linha)
+        documento = _DOCUMENTO.search(texto)
+        if not documento:
+            # Linhas sem CNPJ/CPF são os títulos dos tipos ("01. Bolsas de estudo ...")
+            encontrado = _TIPO_ISENTO.match(texto)
+            if encontrado and not _eh_total(texto):
+                tipo = encontrado.group(2).strip()
+            continue
+        if not valores or _eh_total(texto):
+            continue
+        itens.append({
+            'tipo': tipo,
+            'fonte': _DOCUMENTO.sub('', texto).strip(' -'),
+            'cnpj': documento.group(0),
+            'valor': valores[-1],
+        })
+    return itens
+
+
+def detectar_ano_base(paginas: List[str]) -> int:
+    """
+    Detecta o ano-calendário pelo cabeçalho das páginas ("EXERCÍCIO 2024 ANO-CALENDÁRIO 2023").
+    Usa ANO_BASE se o cabeçalho não for encontrado.
+    """
+    for pagina in paginas[:2]:
+        texto = sem_acentos(pagina)
+        encontrado = _ANO_CALENDARIO.search(texto)
+        if encontrado:
+            return int(encontrado.group(1))
+        encontrado = _EXERCICIO.search(texto)
+        if encontrado:
+            return int(encontrado.group(1)) - 1
+    return ANO_BASE
+
+
+def _ler_bens(linhas: List[str], ano_base: int = ANO_BASE) -> List[Dict[str, Any]]:
+    """
+    Lê a declaração de bens: cada bem começa com grupo e código e termina na linha
+    com as situações nos dois anos; a discriminação pode ocupar várias linhas.
+    """
+    itens = []
+    atual: Optional[Dict[str, Any]] = None
+    for linha in linhas:
+        texto, valores = _valores_finais(linha)
+        encontrado = _BEM.match(texto)
+        if encontrado:
+            grupo, codigo, descricao = encontrado.groups()
+            atual = {'grupo': grupo, 'codigo': codigo, 'descricao': descricao.strip()}
+        elif atual is not None and texto:
+            atual['descricao'] = f"{atual['descricao']} {texto}".strip()
+        if atual is None or len(valores) < 2:
+            continue
+
+        descricao = atual['descricao']
+        atual[f'situacao_31_12_{ano_base - 1}'] = valores[-2]
+        atual[f'situacao_31_12_{ano_base}'] = valores[-1]
+        documento = re.search(CNPJ_RE, descricao)
+        atual['cnpj'] = documento.group(0) if documento else ''
+        for chave, padrao in (('banco', _BANCO), ('agencia', _AGENCIA), ('conta', _CONTA), ('renavam', _RENAVAM)):
+            campo = padrao.search(descricao)
+            atual[chave] = campo.group(1) if campo else ''
+        itens.append(atual)
+        atual = None
+    return itens
+
+
+def _ler_dividas(linhas: List[str], ano_base: int = ANO_BASE) -> List[Dict[str, Any]]:
+    itens = []
+    atual: Optional[Dict[str, Any]] = None
+    for linha in linhas:
+        texto, valores = _valores_finais(linha)
+        encontrado = _DIVIDA.match(texto)
+        if encontrado and not _eh_total(texto):
+            atual = {'codigo': encontrado.group(1), 'descricao': encontrado.group(2).strip()}
+        elif atual is not None and texto:
+            atual['descricao'] = f"{atual['descricao']} {texto}".strip()
+        if atual is None or len(valores) < 2:
+            continue
+        atual[f'situacao_31_12_{ano_base - 1}'] = valores[-2]
+        atual[f'situacao_31_12_{ano_base}'] = valores[-1]
+        itens.append(atual)
+        atual = None
+    return itens
+
+
+def _ler_declarante(linhas: List[str]) -> Dict[str, str]:
+    declarante = {'nome': '', 'cpf': ''}
+    for linha in linhas:
+        if not declarante['nome']:
+            nome = _NOME_DECLARANTE.search(sem_acentos(linha))
+            if nome:
+                # Recorta da linha original para manter os acentos do nome
+                inicio = nome.start(1)
+                declarante['nome'] = linha[inicio:inicio + len(nome.group(1))].strip()
+        if not declarante['cpf']:
+            cpf = _CPF_DECLARANTE.search(linha)
+            if cpf:
+                declarante['cpf'] = cpf.group(1)
+        if declarante['nome'] and declarante['cpf']:
+            break
+    return declarante
+
+
+def _conta_bancaria(bem: Dict[str, Any]) -> Dict[str, str]:
+    descricao = bem['descricao']
+    banco = _BANCO.search(descricao)
+    return {
+        'tipo': descricao[:banco.start()].strip(' -,') if banco else descricao,
+        'banco': bem['banco'],
+        'agencia': bem['agencia'],
+        'conta': bem['conta'],
+    }
+
+
+def dividir_secoes(paginas: List[str], secao_inicial: Optional[str] = None) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Agrupa as linhas do texto por seção da declaração.
+
+    Args:
+        paginas: Texto de cada página
+        secao_inicial: Seção em andamento antes da primeira página (quando as
+            páginas são um trecho do documento)
+
+    Returns:
+        Tupla (linhas anteriores à primeira seção, linhas por seção)
+    """
+    cabecalho: List[str] = []
+    secoes: Dict[str, List[str]] = {}
+    secao = secao_inicial
+    em_secao = secao_inicial is not None
+    for pagina in paginas:
+        for linha in pagina.splitlines():
+            eh_titulo, nova_secao = titulo_secao(linha)
+            if eh_titulo:
+                secao = nova_secao
+                em_secao = True
+                continue
+            if em_secao and sem_acentos(linha.strip()).startswith(CABECALHOS_PAGINA + CABECALHOS_COLUNAS):
+                continue
+            if secao is not None:
+                secoes.setdefault(secao, []).append(linha)
+            elif not em_secao:
+                cabecalho.append(linha)
+    return cabecalho, secoes
+
+
+def interpretar_paginas(paginas: List[str], secao_inicial: Optional[str] = None,
+                        ano_base: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Interpreta o texto das páginas da declaração impressa e monta a resposta no
+    mesmo formato da extração do webhook.
+
+    Args:
+        paginas: Texto de cada página
+        secao_inicial: Seção em andamento antes da primeira página
+        ano_base: Ano-calendário da declaração; se None, é lido do cabeçalho das páginas
+
+    Returns:
+        Dicionário com as seções da declaração
+    """
+    if ano_base is None:
+        ano_base = detectar_ano_base(paginas)
+    cabecalho, secoes = dividir_secoes(paginas, secao_inicial)
+    tributaveis, pj = _ler_rendimentos_pj(secoes.get('rendimentos_tributaveis_pj', []))
+    bens = _ler_bens(secoes.get('declaracao_bens_direitos', []), ano_base)
+    resposta: Dict[str, Any] = {
+        'dependentes': _ler_dependentes(secoes.get('dependentes', [])),
+        'rendimentos_tributaveis': tributaveis,
+        'rendimentos_tributaveis_pj': pj,
+        'rendimentos_tributaveis_pf': _ler_rendimentos_pf(secoes.get('rendimentos_tributaveis_pf', [])),
+        'rendimentos_isentos_nao_tributaveis': _ler_fontes(secoes.get('rendimentos_isentos_nao_tributaveis', [])),
+        'rendimentos_exclusivos_fonte': _ler_fontes(secoes.get('rendimentos_exclusivos_fonte', [])),
+        'declaracao_bens_direitos': bens,
+        'dividas_onus': _ler_dividas(secoes.get('dividas_onus', []), ano_base),
+        'contas_bancarias': [_conta_bancaria(bem) for bem in bens if bem['banco'] and bem['conta']],
+    }
+    if secao_inicial is None:
+        resposta['declarante'] = _ler_declarante(cabecalho)
+    return resposta
+
+
+def _pypdf():
+    try:
+        import pypdf
+    except ImportError:
+        raise ImportError("Extração local de PDF requer o pacote 'pypdf' (pip install pypdf)")
+    return pypdf
+
+
+def contar_paginas(caminho_pdf: str) -> int:
+    """
+    Retorna a quantidade de páginas do PDF. Requer o pacote opcional pypdf.
+    """
+    return len(_pypdf().PdfReader(caminho_pdf).pages)
+
+
+def extrair_texto_paginas(caminho_pdf: str, inicio: int = 0, fim: Optional[int] = None) -> List[str]:
+    """
+    Extrai a camada de texto das páginas [inicio, fim) do PDF. Requer o pacote opcional pypdf.
+
+    Raises:
+        ImportError: Se o pypdf não estiver instalado
+    """
+    leitor = _pypdf().PdfReader(caminho_pdf)
+    return [pagina.extract_text() or '' for pagina in leitor.pages[inicio:fim]]
+
+
+def gravar_trecho_pdf(caminho_pdf: str, inicio: int, fim: int, caminho_saida: str) -> str:
+    """
+    Grava as páginas [inicio, fim) do PDF em um novo arquivo. Requer o pacote opcional pypdf.
+
+    Returns:
+        Caminho do arquivo gravado
+    """
+    pypdf = _pypdf()
+    leitor = pypdf.PdfReader(caminho_pdf)
+    escritor = pypdf.PdfWriter()
+    for pagina in leitor.pages[inicio:fim]:
+        escritor.add_page(pagina)
+    with open(caminho_saida, 'wb') as f:
+        escritor.write(f)
+    return caminho_saida
+
+
+def _comeca_com_secao(pagina: str) -> bool:
+    """
+    Indica se a primeira linha de conteúdo da página (após o cabeçalho repetido)
+    é o título de uma seção, ou seja, se nenhum item continua da página anterior.
+    """
+    for linha in pagina.splitlines():
+        normalizada = sem_acentos(linha.strip())
+        if not normalizada or normalizada.startswith(CABECALHOS_PAGINA):
+            continue
+        return titulo_secao(linha)[0]
+    return False
+
+
+def planejar_trechos(paginas: List[str], paginas_por_trecho: int) -> List[Tuple[int, int]]:
+    """
+    Divide o documento em trechos de páginas [inicio, fim) com cerca de
+    `paginas_por_trecho` páginas, cortando apenas em páginas que começam com o
+    título de uma seção, para que nenhum item fique dividido entre trechos.
+
+    Args:
+        paginas: Texto de cada página
+        paginas_por_trecho: Tamanho mínimo desejado de cada trecho
+
+    Returns:
+        Lista de trechos em ordem
+    """
+    return _cortar_trechos(len(paginas), lambda i: _comeca_com_secao(paginas[i]), paginas_por_trecho)
+
+
+def planejar_trechos_pdf(caminho_pdf: str, paginas_por_trecho: int) -> List[Tuple[int, int]]:
+    """
+    Como planejar_trechos, mas lendo do PDF apenas o texto das páginas candidatas a
+    corte (a partir de `paginas_por_trecho` páginas de cada trecho), em vez do
+    documento inteiro. PDFs com até `paginas_por_trecho` páginas não têm texto extraído.
+    Requer o pacote opcional pypdf.
+    """
+    leitor = _pypdf().PdfReader(caminho_pdf)
+    return _cortar_trechos(len(leitor.pages), lambda i: _comeca_com_secao(leitor.pages[i].extract_text() or ''),
+                           paginas_por_trecho)
+
+
+def _cortar_trechos(total: int, comeca_com_secao: Callable[[int], bool],
+                    paginas_por_trecho: int) -> List[Tuple[int, int]]:
+    trechos = []
+    inicio = 0
+    for i in range(1, total):
+        if i - inicio >= paginas_por_trecho and comeca_com_secao(i):
+            trechos.append((inicio, i))
+            inicio = i
+    trechos.append((inicio, total))
+    return trechos
+
+
+def mesclar_respostas(partes: List[Any]) -> Dict[str, Any]:
+    """
+    Junta as respostas parciais de trechos de um mesmo PDF, na ordem dos trechos.
+    As seções em lista são concatenadas; as seções de objeto (declarante) vêm do
+    primeiro trecho que as preencheu.
+
+    Returns:
+        Resposta mesclada, ou a primeira resposta de erro encontrada
+    """
+    resposta: Dict[str, Any] = {}
+    for numero, parte in enumerate(partes, 1):
+        # O n8n pode devolver a resposta como uma lista com um único objeto
+        if isinstance(parte, list) and len(parte) == 1:
+            parte = parte[0]
+        if not isinstance(parte, dict):
+            return {"erro": f"Resposta do trecho {numero} em formato inesperado: {type(parte).__name__}"}
+        if 'erro' in parte:
+            return {"erro": f"Trecho {numero}: {parte['erro']}"}
+        for secao in SECOES_LISTA:
+            if parte.get(secao):
+                resposta.setdefault(secao, []).extend(parte[secao])
+            else:
+                resposta.setdefault(secao, [])
+        for secao in SECOES_OBJETO:
+            if parte.get(secao) and not resposta.get(secao):
+                resposta[secao] = parte[secao]
+    return resposta
+
+
+def interpretar_declaracao(paginas: List[str], caminho_pdf: str) -> Dict[str, Any]:
+    """
+    Interpreta o texto de todas as páginas de uma declaração, verificando se o PDF
+    tem camada de texto e segue o leiaute da Receita.
+
+    Returns:
+        Resposta no formato do webhook, ou {"erro": ...}
+    """
+    if not any(pagina.strip() for pagina in paginas):
+        return {"erro": f"PDF sem camada de texto: {caminho_pdf}"}
+    resposta = interpretar_paginas(paginas)
+    if not resposta['declarante']['cpf'] and not any(resposta[secao] for secao in SECOES_LISTA):
+        return {"erro": f"PDF não segue o leiaute da declaração da Receita Federal: {caminho_pdf}"}
+    return resposta
+
+
+def ler_declaracao(caminho_pdf: str) -> Dict[str, Any]:
+    """
+    Lê uma declaração em PDF localmente, sem chamada ao webhook.
+
+    Returns:
+        Resposta no formato do webhook, ou {"erro": ...} se o PDF não tiver camada
+        de texto ou não seguir o leiaute da Receita
+    """
+    return interpretar_declaracao(extrair_texto_paginas(caminho_pdf), caminho_pdf)
@@ -2,10 +2,21 @@ import os
 import datetime
 from typing import Dict, List, Any, Optional
 
+from acervo import acervo_padrao
+
+
+def diretorio_logs() -> str:
+    """
+    Pasta onde os logs (e os perfis do --perfil) são gravados.
+    """
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+
+
 class Logger:
     """
     Classe responsável por gerar e gerenciar logs das operações realizadas pelo sistema.
     Os logs são salvos em arquivos na pasta 'logs' com o nome do arquivo DBK processado.
+    Cada entrada é gravada no arquivo assim que registrada, sem acumular o log em memória.
     """
     
     def __init__(self, nome_dbk: str):
@@ -16,15 +27,20 @@ class Logger:
             nome_dbk: Nome do arquivo DBK sendo processado
         """
         self.nome_dbk = os.path.basename(nome_dbk)
-        self.log_entries = []
+        self.quantidade_entradas = 0
         self.timestamp_inicio = datetime.datetime.now()
         
         # Criar pasta de logs se não existir
-        self.log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+        self.log_dir = diretorio_logs()
         os.makedirs(self.log_dir, exist_ok=True)
         
         # Definir caminho do arquivo de log
         self.log_file = os.path.join(self.log_dir, f"{self.nome_dbk}.log")
+        try:
+            self._arquivo = open(self.log_file, 'w', encoding='utf-8')
+        except OSError as e:
+            print(f"Erro ao criar o log: {e}")
+            self._arquivo = None
         
         # Registrar início do processamento
         self.adicionar_entrada(f"Iniciando processamento do arquivo: {self.nome_dbk}")
@@ -41,7 +57,9 @@ class Logger:
         """
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         entrada = f"[{timestamp}] [{nivel}] {mensagem}"
-        self.log_entries.append(entrada)
+        self.quantidade_entradas += 1
+        if self._arquivo is not None:
+            self._arquivo.write(f"{entrada}\n")
         print(f"LOG: {entrada}")
     
     def adicionar_secao(self, titulo: str) -> None:
@@ -77,8 +95,21 @@ class Logger:
             dados: Dados dos rendimentos
             sucesso: Indica se o processamento foi bem-sucedido
         """
+        self.registrar_item("Rendimento PJ", nome, dados, sucesso)
+
+    def registrar_item(self, categoria: str, nome: str, dados: Dict[str, Any], sucesso: bool) -> None:
+        """
+        Registra informações sobre o processamento de um item de uma seção
+        (rendimento, dívida, conta bancária).
+        
+        Args:
+            categoria: Categoria do item (ex.: "Rendimento PF")
+            nome: Identificação do item (fonte pagadora, mês, discriminação)
+            dados: Dados aplicados no DBK
+            sucesso: Indica se o processamento foi bem-sucedido
+        """
         status = "✅ Sucesso" if sucesso else "❌ Falha"
-        self.adicionar_entrada(f"Rendimento PJ: {nome} - {status}", 
+        self.adicionar_entrada(f"{categoria}: {nome} - {status}", 
                               "SUCCESS" if sucesso else "ERROR")
         
         if sucesso:
@@ -118,11 +149,24 @@ class Logger:
         self.adicionar_entrada(f"Data/Hora de conclusão: {timestamp_fim.strftime('%d/%m/%Y %H:%M:%S')}")
         self.adicionar_entrada("="*80)
         
-        # Salvar o log em arquivo
+        # Conclui o arquivo de log
         try:
-            with open(self.log_file, 'w', encoding='utf-8') as f:
-                for entrada in self.log_entries:
-                    f.write(f"{entrada}\n")
-            print(f"Log salvo em: {self.log_file}")
+            self.fechar()
+            if os.path.exists(self.log_file):
+                print(f"Log salvo em: {self.log_file}")
+            else:
+                print(f"Log guardado no acervo como: {self.log_file}")
         except Exception as e:
             print(f"Erro ao salvar o log: {e}")
+
+    def fechar(self) -> None:
+        """
+        Fecha o arquivo de log (chamado por finalizar; seguro chamar mais de uma vez).
+        """
+        if self._arquivo is not None:
+            arquivo, self._arquivo = self._arquivo, None
+            arquivo.close()
+            acervo = acervo_padrao()
+            if acervo:
+                # Com o acervo ativo, o log fica apenas comprimido (python acervo.py restaurar)
+                acervo.guardar_arquivo(self.log_file, remover=True)
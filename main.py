@@ -1,16 +1,26 @@
-import json
 import os
 import sys
-import argparse
-from typing import Dict, List, Any, Optional, Tuple
+import functools
+from typing import TYPE_CHECKING, Callable, Dict, List, Any, Iterable, Iterator, Optional, Tuple
 
-from Maquinador import Maquinador
-from Webhook import Webhook
-from pdf_2024_dados import PDF2024Dados
-from GerenciaDBK import GerenciaDBK
-from log import Logger
-import re
-from config import WEBHOOK_URL
+# Apenas módulos leves no topo: Maquinador, pdf_2024_dados, Webhook (requests) etc.
+# são importados dentro das funções que os usam, para que subcomandos curtos
+# (scan, report, dbk-only) não paguem por eles. Ver benchmark_inicializacao.py.
+from fila_falhas import FilaFalhas
+from config import ARQUIVO_FILA_FALHAS, DIRETORIO_SIMULACAO, DIRETORIO_EXTRACOES, PREFETCH_PROFUNDIDADE, MEMORIA_LIMITE_MB, ACERVO_DIRETORIO
+
+if TYPE_CHECKING:
+    from memoria import OrcamentoMemoria
+    from pdf_2024_dados import PDF2024Dados
+
+# Subcomandos do CLI e os módulos que cada um carrega (medidos pelo benchmark_inicializacao.py)
+MODULOS_SUBCOMANDO = {
+    'scan': (),
+    'process': ('Maquinador', 'pdf_2024_dados', 'log', 'JournalDBK', 'extratores', 'Webhook'),
+    'report': ('relatorio',),
+    'dbk-only': ('Maquinador', 'JournalDBK'),
+}
+SUBCOMANDOS = tuple(MODULOS_SUBCOMANDO)
 
 def normalizar_texto(texto):
     """
@@ -27,17 +37,34 @@ def normalizar_texto(texto):
     #texto = re.sub(r'\s+', ' ', texto)
     return texto.strip()
 
-def processar_declaracao(caminho_dbk: str, caminho_pdf: str) -> bool:
+def processar_declaracao(caminho_dbk: str, caminho_pdf: str, simular: bool = False,
+                         pdf_objeto: Optional["PDF2024Dados"] = None, diretorio_saida: Optional[str] = None) -> bool:
     """
     Processa uma declaração de imposto de renda, extraindo dados do PDF e atualizando o arquivo DBK.
     
     Args:
         caminho_dbk: Caminho para o arquivo DBK a ser modificado
         caminho_pdf: Caminho para o arquivo PDF contendo a declaração
+        simular: Se True, não grava o DBK; salva apenas o journal de alterações e o diff
+        pdf_objeto: Extração do PDF já realizada (pré-busca); se None, o PDF é enviado ao webhook
+        diretorio_saida: Pasta onde ficam backup/, extrações, simulação e a fila de falhas
+            (padrão: a pasta atual)
         
     Returns:
         True se o processamento foi bem-sucedido, False caso contrário
     """
+    from Maquinador import Maquinador
+    from pdf_2024_dados import PDF2024Dados
+    from log import Logger
+    from JournalDBK import JOURNAL_EXTENSION
+    from dinheiro import Dinheiro
+
+    def saida(caminho: str) -> str:
+        return os.path.join(diretorio_saida, caminho) if diretorio_saida else caminho
+
+    fila_falhas = FilaFalhas(saida(ARQUIVO_FILA_FALHAS))
+    logger = None
+    maqui = None
     try:
         # Inicializar o logger
         logger = Logger(os.path.basename(caminho_dbk))
@@ -49,14 +76,25 @@ def processar_declaracao(caminho_dbk: str, caminho_pdf: str) -> bool:
         
         if not maqui.vincular(caminho_dbk):
             print("Erro ao vincular arquivo DBK")
+            fila_falhas.adicionar(caminho_pdf, caminho_dbk, "Erro ao vincular arquivo DBK")
             return False
             
-        if not maqui.vincularPDF(caminho_pdf):
+        if pdf_objeto is not None:
+            pdf_vinculado = maqui.vincularExtracao(pdf_objeto)
+        else:
+            pdf_vinculado = maqui.vincularPDF(caminho_pdf)
+        if not pdf_vinculado:
             print("Erro ao vincular arquivo PDF")
+            motivo = maqui.pdfObjeto.erro if maqui.pdfObjeto else None
+            fila_falhas.adicionar(caminho_pdf, caminho_dbk, motivo or "Erro ao vincular arquivo PDF")
             return False
         
         print("\nArquivos vinculados com sucesso!\n")
 
+        # Guarda a extração para relatórios posteriores sem nova chamada ao webhook
+        nome_extracao = os.path.splitext(os.path.basename(caminho_pdf))[0]
+        PDF2024Dados.salvar_extracao(maqui.pdfObjeto.dados, saida(os.path.join(DIRETORIO_EXTRACOES, nome_extracao)))
+
         # Processa os dependentes
         logger.adicionar_secao("Processamento de Dependentes")
         print("\nProcessando dependentes...")
@@ -65,8 +103,8 @@ def processar_declaracao(caminho_dbk: str, caminho_pdf: str) -> bool:
         logger.adicionar_entrada(f"Encontrados {len(dependentes)} dependentes")
         
         for dependente in dependentes:
-            codigo = dependente["codigo"]
-            nome = dependente["nome"]
+            codigo = dependente.codigo
+            nome = dependente.nome
             dados = {
                 "codigo": codigo
             }
@@ -89,11 +127,11 @@ def processar_declaracao(caminho_dbk: str, caminho_pdf: str) -> bool:
         print(f"Encontrados {len(rendimentos_pj)} fontes pagadoras PJ")
         logger.adicionar_entrada(f"Encontrados {len(rendimentos_pj)} fontes pagadoras PJ")
         
-        for fonte in rendimentos_pj:
-            nome = fonte["nome"]
-            print(f"  - Atualizando rendimentos de: {nome}")
-            sucesso = maqui.dbkObjeto.rendimentosPJ(nome, fonte["dados"])
-            logger.registrar_rendimento_pj(nome, fonte["dados"], sucesso)
+        # Todas as fontes são localizadas no DBK em uma única passada
+        resultados_pj = maqui.dbkObjeto.rendimentosPJLote([(fonte.nome, fonte.dados) for fonte in rendimentos_pj])
+        for fonte, sucesso in zip(rendimentos_pj, resultados_pj):
+            print(f"  - Atualizando rendimentos de: {fonte.nome}")
+            logger.registrar_rendimento_pj(fonte.nome, fonte.dados, sucesso)
             
             if sucesso:
                 print(f"    ✅ Rendimentos atualizados com sucesso")
@@ -101,22 +139,38 @@ def processar_declaracao(caminho_dbk: str, caminho_pdf: str) -> bool:
                 print(f"    ❌ Falha ao atualizar rendimentos")
         
 
+        # Processa os rendimentos PF e do exterior (um registro 26 por mês)
+        logger.adicionar_secao("Processamento de Rendimentos PF")
+        print("\nProcessando rendimentos de pessoa física e do exterior...")
+        rendimentos_pf = maqui.pdfObjeto.obter_rendimentos_pf()
+        print(f"Encontrados {len(rendimentos_pf)} meses com rendimentos PF")
+        logger.adicionar_entrada(f"Encontrados {len(rendimentos_pf)} meses com rendimentos PF")
 
-        #O PDF RETORNA TUDO MUITO CONFUSO NÃO DA CERTO!
+        resultados_pf = maqui.dbkObjeto.rendimentosPFLote([(mes.mes, mes.dados) for mes in rendimentos_pf])
+        for mes, sucesso in zip(rendimentos_pf, resultados_pf):
+            logger.registrar_item("Rendimento PF", f"mês {mes.mes}", mes.dados, sucesso)
+            if sucesso:
+                print(f"    ✅ Rendimentos PF do mês {mes.mes} atualizados com sucesso")
+            else:
+                print(f"    ❌ Falha ao atualizar rendimentos PF do mês {mes.mes}")
 
-        # # Processa os rendimentos PF
-        # print("\nProcessando rendimentos de pessoa física...")
-        # rendimentos_pf = maqui.pdfObjeto.obter_rendimentos_tributaveis()
-        # print(f"Encontrados {len(rendimentos_pf)} fontes pagadoras PF")
-        
-        # for fonte in rendimentos_pf:
-        #     nome = fonte["nome"]
-        #     print(f"  - Atualizando rendimentos de: {nome}")
-        #     if maqui.dbkObjeto.rendimentosPF(nome, fonte["dados"]):
-        #         print(f"    ✅ Rendimentos atualizados com sucesso")
-        #     else:
-        #         print(f"    ❌ Falha ao atualizar rendimentos")
 
+        # Processa os rendimentos isentos (registros 84 e 86, verificados na mesma passada)
+        logger.adicionar_secao("Processamento de Rendimentos Isentos")
+        print("\nProcessando rendimentos isentos e não tributáveis...")
+        rendimentos_isentos = maqui.pdfObjeto.obter_rendimentos_isentos()
+        print(f"Encontrados {len(rendimentos_isentos)} rendimentos isentos")
+        logger.adicionar_entrada(f"Encontrados {len(rendimentos_isentos)} rendimentos isentos")
+
+        resultados_isentos = maqui.dbkObjeto.rendimentosIsentosLote(
+            [(isento.fonte, {"valor": isento.valor}) for isento in rendimentos_isentos]
+        )
+        for isento, sucesso in zip(rendimentos_isentos, resultados_isentos):
+            logger.registrar_item("Rendimento isento", isento.fonte, {"valor": isento.valor}, sucesso)
+            if sucesso:
+                print(f"    ✅ Rendimento isento de {isento.fonte} atualizado com sucesso")
+            else:
+                print(f"    ❌ Falha ao atualizar rendimento isento de {isento.fonte}")
 
 
         
@@ -178,10 +232,80 @@ def processar_declaracao(caminho_dbk: str, caminho_pdf: str) -> bool:
 
 
 
- # Salva o arquivo DBK modificado
+        # Dívidas e contas bancárias: registros 88 e 89 localizados em uma única passada
+        logger.adicionar_secao("Processamento de Dívidas e Contas Bancárias")
+        print("\nProcessando dívidas e ônus reais e contas bancárias...")
+        dividas = maqui.pdfObjeto.obter_dividas_onus()
+
+        # Saldo de cada conta, pelo bem correspondente (banco, agência e conta)
+        chave_campo = maqui.dbkObjeto.chave_campo
+        saldos = {
+            (chave_campo(bem.banco), chave_campo(bem.agencia), chave_campo(bem.conta)): bem.situacao_atual
+            for bem in maqui.pdfObjeto.obter_bens_direitos() if bem.banco and bem.conta
+        }
+        contas = []
+        for conta in maqui.pdfObjeto.obter_contas_bancarias():
+            chaves = {campo: str(conta.get(campo) or '') for campo in ("banco", "agencia", "conta")}
+            if 'valor' in conta:
+                try:
+                    saldo = Dinheiro.de_json(conta['valor'], estrito=True)
+                except ValueError as e:
+                    print(f"    ⚠️ Conta com saldo inválido ignorada: {e}")
+                    continue
+                if saldo < Dinheiro():
+                    print(f"    ⚠️ Conta com saldo negativo ignorada: {conta}")
+                    continue
+            else:
+                saldo = saldos.get(tuple(chave_campo(chaves[campo]) for campo in ("banco", "agencia", "conta")))
+            if not chaves["banco"] or not chaves["conta"] or saldo is None:
+                print(f"    ⚠️ Conta sem banco, número ou saldo ignorada: {conta}")
+                continue
+            contas.append((chaves, {"valor": saldo}))
+        print(f"Encontradas {len(dividas)} dívidas e {len(contas)} contas bancárias")
+        logger.adicionar_entrada(f"Encontradas {len(dividas)} dívidas e {len(contas)} contas bancárias")
+
+        resultados_dividas, resultados_contas = maqui.dbkObjeto.dividasContasLote(
+            [(divida.descricao, {"valor": divida.situacao_atual}) for divida in dividas], contas
+        )
+        for divida, sucesso in zip(dividas, resultados_dividas):
+            logger.registrar_item("Dívida", divida.descricao, {"valor": divida.situacao_atual}, sucesso)
+            marca = "✅" if sucesso else "❌"
+            print(f"    {marca} Dívida: {divida.descricao[:50]}")
+        for (chaves, dados), sucesso in zip(contas, resultados_contas):
+            identificacao = f"banco {chaves['banco']} ag. {chaves['agencia']} conta {chaves['conta']}"
+            logger.registrar_item("Conta bancária", identificacao, dados, sucesso)
+            marca = "✅" if sucesso else "❌"
+            print(f"    {marca} Conta bancária: {identificacao}")
+
+
+        # Recalcula os números de controle das linhas alteradas
+        logger.adicionar_secao("Recálculo de Controles")
+        resumo_recalculo = maqui.dbkObjeto.recalcular_controles()
+        logger.adicionar_entrada(
+            f"Controles atualizados: {resumo_recalculo['controles_atualizados']} - "
+            f"Controles ignorados: {resumo_recalculo['controles_ignorados']}"
+        )
+        if maqui.dbkObjeto.alteracoes:
+            # RecalculoDBK não ajusta os totais: as posições dos registros totalizadores não estão no leiaute
+            logger.adicionar_entrada("Totais da declaração não recalculados; revise-os no programa da Receita "
+                                     "antes de transmitir", "WARNING")
+
+        if simular:
+            # Modo simulação: registra o journal e o diff sem gravar o DBK
+            logger.adicionar_secao("Simulação (DBK não gravado)")
+            base_saida = saida(os.path.join(DIRETORIO_SIMULACAO, maqui.dbkObjeto.nomeArquivo))
+            caminho_journal = maqui.dbkObjeto.journal().salvar(base_saida + JOURNAL_EXTENSION)
+            with open(base_saida + ".diff", 'w', encoding='utf-8') as f:
+                f.write(maqui.dbkObjeto.diff_unificado())
+            logger.adicionar_entrada(f"Journal salvo em: {caminho_journal}", "SUCCESS")
+            logger.adicionar_entrada(f"Diff salvo em: {base_saida}.diff", "SUCCESS")
+            logger.finalizar(caminho_journal, True)
+            return True
+
+        # Salva o arquivo DBK modificado
         logger.adicionar_secao("Salvamento do Arquivo DBK")
         print("\nSalvando arquivo DBK modificado...")
-        caminho_salvo = maqui.salvarBKP("backup")
+        caminho_salvo = maqui.salvarBKP(saida("backup"))
         print(f"Arquivo salvo em: {caminho_salvo}")
         logger.adicionar_entrada(f"Arquivo DBK salvo em: {caminho_salvo}", "SUCCESS")
         
@@ -192,18 +316,303 @@ def processar_declaracao(caminho_dbk: str, caminho_pdf: str) -> bool:
         
     except Exception as e:
         print(f"❌ Erro durante o processamento da declaração: {e}")
+        fila_falhas.adicionar(caminho_pdf, caminho_dbk, f"Erro durante o processamento: {e}")
         
         # Finalizar o log com erro
-        if 'logger' in locals():
+        if logger is not None:
             logger.adicionar_entrada(f"Erro durante o processamento: {e}", "ERROR")
             logger.finalizar("N/A", False)
             
         return False
 
+    finally:
+        # Libera o DBK, a extração e o arquivo de log assim que a declaração termina,
+        # inclusive nos retornos antecipados
+        if maqui is not None:
+            maqui.liberar()
+        if logger is not None:
+            logger.fechar()
+
+
+def aplicar_journals(caminho: str) -> int:
+    """
+    Reaplica journals salvos pelo modo --simular, gravando os DBKs sem repetir a extração.
+    
+    Args:
+        caminho: Arquivo de journal ou pasta contendo journals
+        
+    Returns:
+        0 se todos os journals foram aplicados sem conflitos, 1 caso contrário
+    """
+    from Maquinador import Maquinador
+    from JournalDBK import JournalDBK, JOURNAL_EXTENSION
+
+    if os.path.isdir(caminho):
+        journals = sorted(
+            os.path.join(caminho, nome) for nome in os.listdir(caminho)
+            if nome.endswith(JOURNAL_EXTENSION)
+        )
+    else:
+        journals = [caminho]
+
+    falhas = 0
+    for caminho_journal in journals:
+        try:
+            journal = JournalDBK.carregar(caminho_journal)
+            maqui = Maquinador()
+            if not maqui.vincular(journal.arquivo_dbk):
+                falhas += 1
+                continue
+            resultado = maqui.dbkObjeto.aplicar_journal(journal)
+            if resultado["conflitos"] or resultado["divergente"]:
+                # Não grava um DBK com o journal aplicado só em parte ou sobre outro arquivo
+                motivo = (f"{len(resultado['conflitos'])} conflitos" if resultado["conflitos"]
+                          else "DBK diferente do original do journal")
+                print(f"❌ DBK não gravado: {journal.arquivo_dbk} ({motivo})")
+                falhas += 1
+                continue
+            maqui.dbkObjeto.recalcular_controles()
+            maqui.salvarBKP("backup")
+        except Exception as e:
+            print(f"❌ Erro ao aplicar journal {caminho_journal}: {e}")
+            falhas += 1
+
+    print(f"\nJournals aplicados: {len(journals) - falhas} de {len(journals)}")
+    return 0 if falhas == 0 else 1
+
+
+def gerar_relatorio(pasta_extracoes: str, caminho_saida: str) -> int:
+    """
+    Gera o relatório consolidado da carteira a partir das extrações salvas.
+    
+    Args:
+        pasta_extracoes: Pasta com as extrações JSON salvas durante o processamento
+        caminho_saida: Arquivo de saída (.csv ou .parquet)
+        
+    Returns:
+        0 se o relatório foi gerado, 1 caso contrário
+    """
+    from relatorio import RelatorioCarteira
+
+    if not os.path.isdir(pasta_extracoes):
+        print(f"[!] Pasta de extrações não encontrada: {pasta_extracoes}")
+        return 1
+
+    relatorio = RelatorioCarteira()
+    relatorio.adicionar_pasta(pasta_extracoes)
+    if not len(relatorio):
+        print(f"[!] Nenhuma extração válida encontrada em {pasta_extracoes}")
+        return 1
+
+    try:
+        relatorio.exportar(caminho_saida)
+    except ImportError as e:
+        print(f"[!] {e}")
+        return 1
+
+    print("\n=== TOTAIS DA CARTEIRA ===")
+    for nome, total in relatorio.totais().items():
+        print(f"{nome}: R$ {total:.2f}")
+    if relatorio.erros:
+        print(f"Extrações ignoradas: {len(relatorio.erros)}")
+    return 0
+
+
+def extrair_pdf(caminho_pdf: str) -> "PDF2024Dados":
+    """
+    Primeiro estágio do pipeline: envia o PDF ao webhook e retorna a extração.
+    Erros de rede ou de formato ficam registrados em PDF2024Dados.erro.
+    """
+    from pdf_2024_dados import PDF2024Dados
+    return PDF2024Dados(caminho_pdf)
+
+
+def processar_com_prefetch(pares_pdf_dbk: Iterable[Tuple[str, str]], profundidade: int = PREFETCH_PROFUNDIDADE,
+                           simular: bool = False, processar: Optional[Callable[..., bool]] = None,
+                           orcamento: Optional["OrcamentoMemoria"] = None) -> Iterator[Tuple[Tuple[str, str], bool]]:
+    """
+    Processa os pares em um pipeline de dois estágios: as extrações dos PDFs são
+    adiantadas em segundo plano enquanto a thread principal aplica as já concluídas
+    nos DBKs. No máximo `profundidade` extrações ficam em andamento ou aguardando
+    consumo; ao atingir esse limite o produtor espera (backpressure).
+    
+    Args:
+        pares_pdf_dbk: Pares (PDF, DBK), em lista ou iterador (ex.: agendador.Agendador)
+        profundidade: Tamanho do buffer de pré-busca
+        simular: Repassado para processar_declaracao
+        processar: Função usada no lugar de processar_declaracao (ex.: envolvida pelo --perfil);
+            não deve estar envolvida pelo orçamento, que aqui já cobre o par inteiro
+        orcamento: Controle de admissão por memória. A reserva é feita antes de a extração
+            começar e mantida até o DBK ser processado, pois a extração carregada é o
+            maior custo de memória do par
+        
+    Yields:
+        ((PDF, DBK), sucesso), na ordem em que as extrações foram concluídas
+    """
+    import queue
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    processar = processar or processar_declaracao
+    profundidade = max(1, profundidade)
+    vagas = threading.Semaphore(profundidade)
+    prontos: "queue.Queue[Optional[Tuple[str, str, Any]]]" = queue.Queue()
+    interromper = threading.Event()
+
+    erro_produtor: List[BaseException] = []
+
+    def produzir() -> None:
+        try:
+            with ThreadPoolExecutor(max_workers=profundidade, thread_name_prefix="prefetch") as executor:
+                for pdf, dbk in pares_pdf_dbk:
+                    # Aguarda uma vaga no buffer antes de enviar o próximo PDF
+                    vagas.acquire()
+                    if interromper.is_set():
+                        break
+                    reserva = orcamento.reservar(pdf, dbk) if orcamento else 0
+                    futuro = executor.submit(extrair_pdf, pdf)
+                    futuro.add_done_callback(lambda f, pdf=pdf, dbk=dbk, reserva=reserva:
+                                             prontos.put((pdf, dbk, f, reserva)))
+        except BaseException as e:
+            # Erro ao percorrer os pares (ex.: no agendador): repassado ao consumidor
+            erro_produtor.append(e)
+        finally:
+            # Sem o sentinela, o consumidor esperaria para sempre em prontos.get()
+            prontos.put(None)
+
+    produtor = threading.Thread(target=produzir, name="prefetch-produtor", daemon=True)
+    produtor.start()
+    print(f"Pré-busca de extrações ativa (profundidade {profundidade})")
+
+    try:
+        while True:
+            item = prontos.get()
+            if item is None:
+                if erro_produtor:
+                    raise erro_produtor[0]
+                break
+            pdf, dbk, futuro, reserva = item
+            vagas.release()
+            try:
+                try:
+                    pdf_objeto = futuro.result()
+                except Exception as e:
+                    print(f"❌ Erro na extração do PDF {pdf}: {e}")
+                    FilaFalhas().adicionar(pdf, dbk, f"Erro na extração: {e}")
+                    sucesso = False
+                else:
+                    sucesso = processar(dbk, pdf, simular=simular, pdf_objeto=pdf_objeto)
+            finally:
+                if orcamento:
+                    orcamento.liberar(reserva)
+            yield (pdf, dbk), sucesso
+    finally:
+        # Em caso de interrupção, libera o produtor para que ele encerre e devolve as
+        # reservas das extrações que não serão consumidas (o produtor pode estar
+        # aguardando justamente por elas)
+        interromper.set()
+        vagas.release()
+        while produtor.is_alive() or not prontos.empty():
+            try:
+                item = prontos.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is not None and orcamento:
+                orcamento.liberar(item[3])
+        produtor.join()
+
+
+def par_da_pasta(caminho_pasta: str) -> Tuple[Optional[Tuple[str, str]], Optional[Dict[str, Any]]]:
+    """
+    Verifica se a pasta de uma declaração contém exatamente um PDF e um DBK.
+    
+    Args:
+        caminho_pasta: Pasta da declaração
+        
+    Returns:
+        Tupla (par (PDF, DBK) ou None, informações do erro ou None)
+    """
+    # Lista os arquivos da subpasta
+    arquivos = os.listdir(caminho_pasta)
+
+    # Filtra arquivos PDF e DBK
+    pdfs = [f for f in arquivos if f.lower().endswith('.pdf')]
+    dbks = [f for f in arquivos if f.lower().endswith('.dbk')]
+
+    # Verifica se há exatamente um de cada
+    if len(pdfs) == 1 and len(dbks) == 1:
+        caminho_pdf = os.path.join(caminho_pasta, pdfs[0])
+        caminho_dbk = os.path.join(caminho_pasta, dbks[0])
+        return (caminho_pdf, caminho_dbk), None
+
+    erro_info = {
+        'pasta': os.path.basename(caminho_pasta),
+        'caminho': caminho_pasta,
+        'num_pdfs': len(pdfs),
+        'num_dbks': len(dbks),
+        'pdfs': pdfs,
+        'dbks': dbks
+    }
+    return None, erro_info
+
+
+def buscar_pares(pasta_consulta: str) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]]]:
+    """
+    Percorre as subpastas da pasta de consulta em busca de pares PDF/DBK.
+    
+    Args:
+        pasta_consulta: Pasta com uma subpasta por declaração
+        
+    Returns:
+        Tupla (pares (PDF, DBK) encontrados, pastas com erro)
+    """
+    pares_pdf_dbk = []
+    pastas_com_erro = []
+    
+    print(f"Buscando declarações na pasta: {pasta_consulta}")
+
+    # Percorre todas as subpastas da pasta 'consulta'
+    for nome_pasta in os.listdir(pasta_consulta):
+        # Monta corretamente o caminho até a pasta: dados/nome_pasta/DOC
+        caminho_pasta = os.path.join(pasta_consulta, nome_pasta)
+        
+        if os.path.isdir(caminho_pasta):
+            par, erro_info = par_da_pasta(caminho_pasta)
+            if par:
+                pares_pdf_dbk.append(par)
+            else:
+                pastas_com_erro.append(erro_info)
+                print(f"[!] Erro na pasta: {caminho_pasta} - PDF: {erro_info['num_pdfs']}, DBK: {erro_info['num_dbks']}")
+
+    return pares_pdf_dbk, pastas_com_erro
+
+
+def imprimir_pastas_com_erro(pastas_com_erro: List[Dict[str, Any]]) -> None:
+    """
+    Lista as pastas que não formam um par PDF/DBK, com os arquivos de cada uma.
+    """
+    print(f"\nPastas com erro ({len(pastas_com_erro)}):\n")
+    for i, erro in enumerate(pastas_com_erro, 1):
+        print(f"  {i}. {erro['pasta']}:")
+        print(f"     - PDFs: {erro['num_pdfs']} {erro['pdfs'] if erro['pdfs'] else ''}")
+        print(f"     - DBKs: {erro['num_dbks']} {erro['dbks'] if erro['dbks'] else ''}")
+
 
 def main():
+    # Subcomando (primeiro argumento): scan, process, report ou dbk-only. Sem
+    # subcomando, processa as declarações, como antes. O argumento posicional é a
+    # pasta de consulta (scan, process), a pasta de journals (dbk-only) ou o CSV (report).
+    subcomando = 'process'
+    argumento = None
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMANDOS:
+        subcomando = sys.argv[1]
+        if len(sys.argv) > 2 and not sys.argv[2].startswith('--'):
+            argumento = sys.argv[2]
+
     # Caminho para a pasta 'consulta'
     pasta_consulta = 'dadosT'  # Substitua pelo caminho real
+    if argumento and subcomando in ('scan', 'process'):
+        pasta_consulta = argumento
     # Lista para armazenar os pares (PDF, DBK)
     pares_pdf_dbk = []
     # Lista para armazenar pastas com erro
@@ -211,7 +620,27 @@ def main():
 
     # Verifica se deve usar processamento paralelo
     usar_paralelo = '--paralelo' in sys.argv
+    simular = '--simular' in sys.argv
     max_workers = None
+    caminho_journal = None
+    caminho_relatorio = None
+    pasta_extracoes = DIRETORIO_EXTRACOES
+    reprocessar_falhas = '--reprocessar-falhas' in sys.argv
+    monitorar_pasta = '--monitorar' in sys.argv
+    caminho_manifesto = None
+    profundidade_prefetch = PREFETCH_PROFUNDIDADE
+    limite_memoria = MEMORIA_LIMITE_MB
+    # Perfil por declaração: sem opções --perfil*, processar_declaracao é chamada diretamente
+    perfilador = None
+    if any(arg.startswith('--perfil') for arg in sys.argv):
+        from perfil import perfilador_da_linha_de_comando
+        try:
+            perfilador = perfilador_da_linha_de_comando(sys.argv)
+        except ValueError as e:
+            print(f"[!] Opção de perfil inválida: {e}")
+            return 1
+    processar = perfilador.envolver(processar_declaracao) if perfilador else processar_declaracao
+    agendar = any(arg in ('--agendar', '--prioridade', '--prazo') for arg in sys.argv)
     
     # Processa argumentos de linha de comando de forma simples
     for i, arg in enumerate(sys.argv):
@@ -222,60 +651,150 @@ def main():
                 max_workers = int(sys.argv[i + 1])
             except ValueError:
                 pass
+        elif arg == '--aplicar-journal' and i + 1 < len(sys.argv):
+            caminho_journal = sys.argv[i + 1]
+        elif arg == '--relatorio' and i + 1 < len(sys.argv):
+            caminho_relatorio = sys.argv[i + 1]
+        elif arg == '--extracoes' and i + 1 < len(sys.argv):
+            pasta_extracoes = sys.argv[i + 1]
+        elif arg == '--extrator' and i + 1 < len(sys.argv):
+            from extratores import definir_extrator_padrao
+            try:
+                definir_extrator_padrao(sys.argv[i + 1])
+            except ValueError as e:
+                print(f"[!] {e}")
+                return 1
+        elif arg == '--manifesto' and i + 1 < len(sys.argv):
+            caminho_manifesto = sys.argv[i + 1]
+        elif arg == '--prefetch' and i + 1 < len(sys.argv):
+            try:
+                profundidade_prefetch = int(sys.argv[i + 1])
+            except ValueError:
+                pass
+        elif arg == '--acervo':
+            # Guarda DBKs gerados e logs no acervo comprimido (pasta opcional após a opção)
+            from acervo import definir_acervo_padrao
+            proximo = sys.argv[i + 1] if i + 1 < len(sys.argv) else ''
+            definir_acervo_padrao(proximo if proximo and not proximo.startswith('--') else ACERVO_DIRETORIO)
+        elif arg == '--memoria-limite' and i + 1 < len(sys.argv):
+            try:
+                limite_memoria = int(sys.argv[i + 1])
+            except ValueError:
+                pass
+        elif arg == '--webhook-processos' and i + 1 < len(sys.argv):
+            # Processos que dividem os limites do webhook (ver controle_fluxo.definir_processos)
+            try:
+                processos_webhook = int(sys.argv[i + 1])
+            except ValueError:
+                continue
+            from controle_fluxo import definir_processos
+            definir_processos(processos_webhook)
+
+    if subcomando == 'dbk-only' or caminho_journal:
+        # Apenas reaplica journals nos DBKs: não carrega o pipeline de extração
+        return aplicar_journals(argumento or caminho_journal or DIRETORIO_SIMULACAO)
+    if subcomando == 'report' or caminho_relatorio:
+        return gerar_relatorio(pasta_extracoes, argumento or caminho_relatorio or 'relatorio_carteira.csv')
+
+    if perfilador and profundidade_prefetch > 0:
+        # Com pré-busca, a extração do PDF (webhook ou local) rodaria em outra thread,
+        # fora do perfil da declaração, e costuma ser a etapa mais lenta e mais pesada
+        print("Perfil ativo: pré-busca desativada para que a extração do PDF entre no perfil")
+        profundidade_prefetch = 0
+
+    # Depois da leitura das opções, para que --memoria-limite tenha efeito
+    orcamento = None
+    # A pré-busca reserva a memória já na extração (ver processar_com_prefetch)
+    processar_sem_orcamento = processar
+    if limite_memoria > 0:
+        # Controle de admissão: declarações grandes aguardam enquanto o limite de RSS estiver ocupado
+        from memoria import OrcamentoMemoria
+        orcamento = OrcamentoMemoria(limite_memoria)
+        processar = orcamento.envolver(processar)
+        print(f"Orçamento de memória ativo: {limite_memoria} MiB por processo")
+
+    if monitorar_pasta:
+        # Processa as pastas de clientes à medida que ficam completas, sem varrer o lote todo
+        from monitor import monitorar
+        monitorar(pasta_consulta, functools.partial(processar, simular=simular), max_workers or 1)
+        return 0
     
-    print(f"Buscando declarações na pasta: {pasta_consulta}")
-    
-    # Percorre todas as subpastas da pasta 'consulta'
-    for nome_pasta in os.listdir(pasta_consulta):
-        # Monta corretamente o caminho até a pasta: dados/nome_pasta/DOC
-        caminho_pasta = os.path.join(pasta_consulta, nome_pasta)
-        
-        if os.path.isdir(caminho_pasta):
-            # Lista os arquivos da subpasta
-            arquivos = os.listdir(caminho_pasta)
-
-            # Filtra arquivos PDF e DBK
-            pdfs = [f for f in arquivos if f.lower().endswith('.pdf')]
-            dbks = [f for f in arquivos if f.lower().endswith('.dbk')]
-
-            # Verifica se há exatamente um de cada
-            if len(pdfs) == 1 and len(dbks) == 1:
-                caminho_pdf = os.path.join(caminho_pasta, pdfs[0])
-                caminho_dbk = os.path.join(caminho_pasta, dbks[0])
-                pares_pdf_dbk.append((caminho_pdf, caminho_dbk))
-            else:
-                erro_info = {
-                    'pasta': nome_pasta,
-                    'caminho': caminho_pasta,
-                    'num_pdfs': len(pdfs),
-                    'num_dbks': len(dbks),
-                    'pdfs': pdfs,
-                    'dbks': dbks
-                }
-                pastas_com_erro.append(erro_info)
-                print(f"[!] Erro na pasta: {caminho_pasta} - PDF: {len(pdfs)}, DBK: {len(dbks)}")
+    fila_falhas = FilaFalhas()
+    if reprocessar_falhas:
+        # Reprocessa apenas os pares registrados na fila de falhas
+        pares_pdf_dbk = [(entrada["pdf"], entrada["dbk"]) for entrada in fila_falhas.retirar_todos()]
+        print(f"Reprocessando {len(pares_pdf_dbk)} pares da fila de falhas ({fila_falhas.caminho})")
+        if not pares_pdf_dbk:
+            print("[!] Nenhuma falha registrada para reprocessar")
+            return 0
+    elif caminho_manifesto:
+        # Usa os pares registrados pelo organiza.py, sem varrer as pastas
+        from organiza import carregar_manifesto
+        pares_pdf_dbk, pastas_com_erro = carregar_manifesto(caminho_manifesto)
+        print(f"Pares lidos do manifesto: {caminho_manifesto}")
+    else:
+        pares_pdf_dbk, pastas_com_erro = buscar_pares(pasta_consulta)
 
     # Verifica se encontrou algum par de arquivos
     if not pares_pdf_dbk:
         print(f"[!] Nenhum par de arquivos PDF/DBK encontrado na pasta {pasta_consulta}")
-        sys.exit(1)
+        if pastas_com_erro:
+            imprimir_pastas_com_erro(pastas_com_erro)
+        return 1
     
     print(f"Encontrados {len(pares_pdf_dbk)} pares de arquivos PDF/DBK para processamento")
     if pastas_com_erro:
         print(f"Encontradas {len(pastas_com_erro)} pastas com erro")
+
+    agendador = None
+    if agendar:
+        # Ordena por prazo, prioridade, escritório e tamanho do PDF em vez da ordem das pastas
+        from agendador import Agendador, carregar_preferencias, interpretar_opcoes
+        classes, prazos = carregar_preferencias(caminho_manifesto) if caminho_manifesto else ({}, {})
+        try:
+            classes_cli, prazos_cli = interpretar_opcoes(sys.argv)
+        except ValueError as e:
+            print(f"[!] {e}")
+            return 1
+        classes.update(classes_cli)
+        prazos.update(prazos_cli)
+        agendador = Agendador(pares_pdf_dbk, classes, prazos)
+        print(f"Agendamento ativo: {len(classes)} prioridades e {len(prazos)} prazos definidos")
+
+    if subcomando == 'scan':
+        # Apenas lista os pares encontrados (na ordem do agendador, se ativo), sem processar
+        for i, (pdf, dbk) in enumerate(agendador or pares_pdf_dbk, 1):
+            print(f"  {i}. {pdf} + {os.path.basename(dbk)}")
+        if pastas_com_erro:
+            imprimir_pastas_com_erro(pastas_com_erro)
+        return 0
     
+    from memoria import relatorio_memoria
+    from normalizacao import relatorio_normalizacao
+
     # Decide entre processamento sequencial ou paralelo
     if usar_paralelo:
         # Importa o módulo de thread apenas se for usar processamento paralelo
         from thread import ProcessadorParalelo
         print(f"\n🚀 Iniciando processamento PARALELO com {max_workers or 'auto'} workers\n")
         processador = ProcessadorParalelo(max_workers=max_workers)
+        funcao = functools.partial(processar, simular=simular)
+        if agendador:
+            pares_pdf_dbk = list(agendador)
+            funcao = agendador.envolver(funcao)
         resultados = processador.processar(
             pares_pdf_dbk,
-            processar_declaracao,
+            funcao,
             paralelo=True
         )
+        if agendador:
+            agendador.relatorio()
+        relatorio_memoria(orcamento)
+        relatorio_normalizacao()
         
+        if reprocessar_falhas:
+            fila_falhas.concluir_reprocessamento()
+
         # Verifica se todos os processamentos foram bem-sucedidos
         todos_sucesso = all(sucesso for _, sucesso in resultados)
         
@@ -286,11 +805,7 @@ def main():
         print(f"Declarações com falha: {sum(1 for _, sucesso in resultados if not sucesso)}")
         
         if pastas_com_erro:
-            print(f"\nPastas com erro ({len(pastas_com_erro)}):\n")
-            for i, erro in enumerate(pastas_com_erro, 1):
-                print(f"  {i}. {erro['pasta']}:")
-                print(f"     - PDFs: {erro['num_pdfs']} {erro['pdfs'] if erro['pdfs'] else ''}")
-                print(f"     - DBKs: {erro['num_dbks']} {erro['dbks'] if erro['dbks'] else ''}")
+            imprimir_pastas_com_erro(pastas_com_erro)
         print("====================")
         
         if todos_sucesso:
@@ -298,15 +813,27 @@ def main():
             return 0
         else:
             print("\n⚠️ Alguns processamentos falharam. Verifique os logs para mais detalhes.")
+            print(f"Pares com falha registrados em {fila_falhas.caminho}; use --reprocessar-falhas para tentar novamente.")
             return 1
     else:
-        # Processamento sequencial original
+        # Processamento sequencial dos DBKs; com pré-busca, as extrações dos
+        # próximos PDFs seguem em segundo plano
         sucessos = 0
         falhas = 0
+        if agendador:
+            # O agendador escolhe o próximo par a cada despacho
+            pares_pdf_dbk = agendador
         
-        for pdf, dbk in pares_pdf_dbk:
-            sucesso = processar_declaracao(dbk, pdf)
-            
+        if profundidade_prefetch > 0:
+            resultados = processar_com_prefetch(pares_pdf_dbk, profundidade_prefetch, simular=simular,
+                                                processar=processar_sem_orcamento,
+                                                orcamento=orcamento)
+        else:
+            resultados = (((pdf, dbk), processar(dbk, pdf, simular=simular)) for pdf, dbk in pares_pdf_dbk)
+        
+        for (_, dbk), sucesso in resultados:
+            if agendador:
+                agendador.concluir(dbk, sucesso)
             if sucesso:
                 sucessos += 1
                 print("\n✅ Processamento concluído com sucesso!")
@@ -316,6 +843,14 @@ def main():
                 # Não interrompe mais o processamento em caso de falha
                 # sys.exit(1)
         
+        if reprocessar_falhas:
+            fila_falhas.concluir_reprocessamento()
+
+        if agendador:
+            agendador.relatorio()
+        relatorio_memoria(orcamento)
+        relatorio_normalizacao()
+
         # Gera relatório final
         print("\n=== RELATÓRIO FINAL ===")
         print(f"Total de declarações processadas: {sucessos + falhas}")
@@ -323,11 +858,7 @@ def main():
         print(f"Declarações com falha: {falhas}")
         
         if pastas_com_erro:
-            print(f"\nPastas com erro ({len(pastas_com_erro)}):\n")
-            for i, erro in enumerate(pastas_com_erro, 1):
-                print(f"  {i}. {erro['pasta']}:")
-                print(f"     - PDFs: {erro['num_pdfs']} {erro['pdfs'] if erro['pdfs'] else ''}")
-                print(f"     - DBKs: {erro['num_dbks']} {erro['dbks'] if erro['dbks'] else ''}")
+            imprimir_pastas_com_erro(pastas_com_erro)
         print("====================")
         
         if falhas == 0:
@@ -335,6 +866,7 @@ def main():
             return 0
         else:
             print("\n⚠️ Alguns processamentos falharam. Verifique os logs para mais detalhes.")
+            print(f"Pares com falha registrados em {fila_falhas.caminho}; use --reprocessar-falhas para tentar novamente.")
             return 1
 
     
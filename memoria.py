@@ -0,0 +1,153 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from config import MEMORIA_FATOR_DBK, MEMORIA_FATOR_PDF, MEMORIA_INTERVALO
+
+
+def rss_atual() -> int:
+    """
+    Memória residente (RSS) atual do processo, em bytes. Lê /proc no Linux; em
+    outros sistemas usa o psutil, se instalado, ou o pico informado pelo resource.
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return pico_rss()
+
+
+def pico_rss() -> int:
+    """
+    Maior RSS atingido pelo processo desde o início, em bytes (0 se indisponível).
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KiB; macOS em bytes
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def estimar_memoria(caminho_pdf: str, caminho_dbk: str) -> int:
+    """
+    Memória estimada para processar um par, a partir do tamanho dos arquivos.
+    """
+    tamanho = 0
+    for caminho, fator in ((caminho_dbk, MEMORIA_FATOR_DBK), (caminho_pdf, MEMORIA_FATOR_PDF)):
+        try:
+            tamanho += os.path.getsize(caminho) * fator
+        except OSError:
+            pass
+    return tamanho
+
+
+class OrcamentoMemoria:
+    """
+    Controle de admissão por memória para os workers de um processo. Antes de
+    começar, cada declaração reserva a memória estimada para ela; se o maior valor
+    entre o RSS medido e o RSS inicial mais as reservas em andamento, somado à
+    estimativa, passar do limite, a declaração aguarda até outra terminar. Uma
+    declaração sozinha é sempre admitida, mesmo acima do limite, para o lote não travar.
+    """
+
+    def __init__(self, limite_mb: int):
+        """
+        Args:
+            limite_mb: RSS máximo do processo, em MiB
+        """
+        self.limite = limite_mb * 1024 * 1024
+        self.base = rss_atual()
+        self._reservado = 0
+        self._em_andamento = 0
+        self._condicao = threading.Condition()
+        self.pico = self.base
+        self.pico_reservado = 0
+        self.adiadas = 0
+        self.tempo_espera = 0.0
+
+    def _ocupado(self) -> int:
+        rss = rss_atual()
+        self.pico = max(self.pico, rss)
+        return max(rss, self.base + self._reservado)
+
+    @contextmanager
+    def admitir(self, caminho_pdf: str, caminho_dbk: str) -> Iterator[int]:
+        """
+        Aguarda memória para o par e a mantém reservada durante o bloco.
+
+        Yields:
+            Memória estimada reservada, em bytes
+        """
+        estimativa = self.reservar(caminho_pdf, caminho_dbk)
+        try:
+            yield estimativa
+        finally:
+            self.liberar(estimativa)
+
+    def reservar(self, caminho_pdf: str, caminho_dbk: str) -> int:
+        """
+        Aguarda memória para o par e a reserva até liberar() ser chamado, possivelmente
+        em outra thread (ex.: a pré-busca reserva e a thread principal libera).
+
+        Returns:
+            Memória estimada reservada, em bytes (a ser passada a liberar)
+        """
+        estimativa = estimar_memoria(caminho_pdf, caminho_dbk)
+        with self._condicao:
+            if self._em_andamento and self._ocupado() + estimativa > self.limite:
+                self.adiadas += 1
+                inicio = time.perf_counter()
+                print(f"⏳ Aguardando memória para {os.path.basename(caminho_dbk)} "
+                      f"({estimativa / 1024 / 1024:.1f} MiB estimados)")
+                # O RSS só cai quando outra declaração termina e libera seus buffers,
+                # mas é verificado periodicamente também
+                while self._em_andamento and self._ocupado() + estimativa > self.limite:
+                    self._condicao.wait(MEMORIA_INTERVALO)
+                self.tempo_espera += time.perf_counter() - inicio
+            self._reservado += estimativa
+            self._em_andamento += 1
+            self.pico_reservado = max(self.pico_reservado, self._reservado)
+        return estimativa
+
+    def liberar(self, estimativa: int) -> None:
+        """
+        Devolve uma reserva feita por reservar().
+        """
+        with self._condicao:
+            self._reservado -= estimativa
+            self._em_andamento -= 1
+            self._ocupado()
+            self._condicao.notify_all()
+
+    def envolver(self, processar: Callable[..., bool]) -> Callable[..., bool]:
+        """
+        Envolve a função de processamento (caminho_dbk, caminho_pdf, ...) com a admissão.
+        """
+        def processar_com_orcamento(caminho_dbk: str, caminho_pdf: str, *args, **kwargs) -> bool:
+            with self.admitir(caminho_pdf, caminho_dbk):
+                return processar(caminho_dbk, caminho_pdf, *args, **kwargs)
+
+        return processar_com_orcamento
+
+
+def relatorio_memoria(orcamento: Optional[OrcamentoMemoria] = None) -> None:
+    """
+    Imprime o pico de memória do lote e, com orçamento, as declarações adiadas.
+    """
+    print("\n=== MEMÓRIA ===")
+    print(f"Pico de RSS do processo: {pico_rss() / 1024 / 1024:.1f} MiB - atual: {rss_atual() / 1024 / 1024:.1f} MiB")
+    if orcamento:
+        print(f"Limite: {orcamento.limite / 1024 / 1024:.0f} MiB - pico observado: {orcamento.pico / 1024 / 1024:.1f} MiB"
+              f" - maior reserva simultânea: {orcamento.pico_reservado / 1024 / 1024:.1f} MiB")
+        print(f"Declarações adiadas por memória: {orcamento.adiadas} ({orcamento.tempo_espera:.1f}s de espera)")
+    print("===============")
@@ -0,0 +1,334 @@
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dinheiro import Dinheiro
+from extracao_binaria import ExtracaoBinaria
+
+# Ano-calendário padrão da declaração extraída (situação em 31/12 do ano anterior e do
+# ano-base), usado quando os itens não trazem o ano nas chaves
+ANO_BASE = 2023
+_PREFIXO_SITUACAO = 'situacao_31_12_'
+
+# Seções da resposta do webhook: nome -> tipo JSON esperado
+SECOES_LISTA = (
+    'dependentes',
+    'rendimentos_tributaveis',
+    'rendimentos_tributaveis_pj',
+    'rendimentos_tributaveis_pf',
+    'rendimentos_isentos_nao_tributaveis',
+    'rendimentos_exclusivos_fonte',
+    'declaracao_bens_direitos',
+    'dividas_onus',
+    'contas_bancarias',
+)
+SECOES_OBJETO = ('declarante',)
+
+
+class ErroExtracao(Exception):
+    """
+    Erro na resposta da extração do PDF (resposta de erro do webhook, vazia ou fora do formato esperado).
+    """
+
+
+def _texto(valor: Any) -> str:
+    return '' if valor is None else str(valor)
+
+
+def _secao_do_tipo(resposta: Mapping, secao: str, tipo: type) -> bool:
+    """
+    Verifica se a seção é None ou do tipo esperado. Em extrações binárias, consulta
+    a tabela de seções sem decodificar o conteúdo.
+    """
+    if isinstance(resposta, ExtracaoBinaria):
+        return resposta.tipo_secao(secao) in (type(None), tipo)
+    valor = resposta[secao]
+    return valor is None or isinstance(valor, tipo)
+
+
+def _valor_dbk(valor: Any, descricao: str) -> Dinheiro:
+    """
+    Converte um valor da resposta que será gravado no DBK: formato estrito e não negativo.
+
+    Raises:
+        ErroExtracao: Se o valor for inválido, ambíguo ou negativo
+    """
+    try:
+        dinheiro = Dinheiro.de_json(valor, estrito=True)
+    except ValueError as e:
+        raise ErroExtracao(f"{descricao}: {e}")
+    if dinheiro < Dinheiro():
+        raise ErroExtracao(f"{descricao}: valor negativo {valor!r}")
+    return dinheiro
+
+
+def _situacoes(item: Dict[str, Any]) -> Tuple[Dinheiro, Dinheiro]:
+    """
+    Retorna as situações em 31/12 do ano anterior e do ano-base. O ano-base vem das
+    chaves do próprio item (situacao_31_12_AAAA), para que extrações de exercícios
+    diferentes convivam no mesmo lote.
+    """
+    anos = [int(chave[len(_PREFIXO_SITUACAO):]) for chave in item
+            if chave.startswith(_PREFIXO_SITUACAO) and chave[len(_PREFIXO_SITUACAO):].isdigit()]
+    ano = max(anos) if anos else ANO_BASE
+    anterior, atual = f'{_PREFIXO_SITUACAO}{ano - 1}', f'{_PREFIXO_SITUACAO}{ano}'
+    return (_valor_dbk(item.get(anterior), f"Situação em 31/12/{ano - 1}"),
+            _valor_dbk(item.get(atual), f"Situação em 31/12/{ano}"))
+
+
+@dataclass(slots=True)
+class Declarante:
+    nome: str = ''
+    cpf: str = ''
+
+    @classmethod
+    def de_dict(cls, item: Dict[str, Any]) -> "Declarante":
+        return cls(_texto(item.get('nome')), _texto(item.get('cpf')))
+
+
+@dataclass(slots=True)
+class Dependente:
+    codigo: str
+    nome: str
+    cpf: str = ''
+    data_nascimento: str = ''
+    relacao: str = ''
+
+    @classmethod
+    def de_dict(cls, item: Dict[str, Any]) -> "Dependente":
+        """
+        Raises:
+            ErroExtracao: Se o código de relação estiver ausente ou não for numérico,
+                para que um código inventado não seja gravado no DBK
+        """
+        codigo = _texto(item.get('codigo')).strip()
+        nome = _texto(item.get('nome'))
+        if not codigo.isdigit() or len(codigo) > 2:
+            raise ErroExtracao(f"Dependente '{nome}' sem código de relação válido: {codigo!r}")
+        return cls(
+            codigo.zfill(2),
+            nome,
+            _texto(item.get('cpf')),
+            _texto(item.get('data_nascimento')),
+            _texto(item.get('relacao')),
+        )
+
+
+@dataclass(slots=True)
+class RendimentoPJ:
+    nome: str
+    # Valores por campo do DBK (chaves de DBK_INTERVALOS["21"]); na resposta vêm no
+    # formato do campo do DBK (centavos com zeros à esquerda)
+    dados: Dict[str, Dinheiro] = field(default_factory=dict)
+
+    @classmethod
+    def de_dict(cls, item: Dict[str, Any]) -> "RendimentoPJ":
+        nome = _texto(item.get('nome'))
+        dados = {}
+        for chave, valor in (item.get('dados') or {}).items():
+            try:
+                dados[chave] = Dinheiro.de_dbk(str(valor))
+            except ValueError:
+                # Um valor ilegível não deve zerar o campo no DBK
+                print(f"⚠️ Valor inválido para '{chave}' da fonte '{nome}': {valor!r}; campo ignorado")
+        return cls(nome, dados)
+
+
+@dataclass(slots=True)
+class RendimentoPF:
+    # Mês com dois dígitos ("01" a "12")
+    mes: str
+    # Valores por campo do DBK (chaves de DBK_INTERVALOS["26"]), no formato do campo do DBK
+    dados: Dict[str, Dinheiro] = field(default_factory=dict)
+
+    @classmethod
+    def de_dict(cls, item: Dict[str, Any]) -> "RendimentoPF":
+        mes = _texto(item.get('mes')).zfill(2)
+        dados = {}
+        for chave, valor in (item.get('dados') or {}).items():
+            try:
+                dados[chave] = Dinheiro.de_dbk(str(valor))
+            except ValueError:
+                print(f"⚠️ Valor inválido para '{chave}' do mês {mes}: {valor!r}; campo ignorado")
+        return cls(mes, dados)
+
+
+@dataclass(slots=True)
+class RendimentoIsento:
+    fonte: str
+    cnpj: str = ''
+    valor: Dinheiro = field(default_factory=Dinheiro)
+    tipo: str = ''
+
+    @classmethod
+    def de_dict(cls, item: Dict[str, Any]) -> "RendimentoIsento":
+        return cls(
+            _texto(item.get('fonte', 'Fonte não informada')),
+            _texto(item.get('cnpj')),
+            _valor_dbk(item.get('valor'), f"Valor de {_texto(item.get('fonte'))}"),
+            _texto(item.get('tipo')),
+        )
+
+
+@dataclass(slots=True)
+class BemDireito:
+    codigo: str
+    descricao: str
+    situacao_anterior: Dinheiro = field(default_factory=Dinheiro)
+    situacao_atual: Dinheiro = field(default_factory=Dinheiro)
+    pais: str = ''
+    cnpj: str = ''
+    renavam: str = ''
+    banco: str = ''
+    agencia: str = ''
+    conta: str = ''
+
+    @classmethod
+    def de_dict(cls, item: Dict[str, Any]) -> "BemDireito":
+        return cls(
+            _texto(item.get('codigo', 'N/A')),
+            _texto(item.get('descricao', 'Sem descrição')),
+            *_situacoes(item),
+            _texto(item.get('pais', 'N/A')),
+            _texto(item.get('cnpj')),
+            _texto(item.get('renavam')),
+            _texto(item.get('banco')),
+            _texto(item.get('agencia')),
+            _texto(item.get('conta')),
+        )
+
+
+@dataclass(slots=True)
+class DividaOnus:
+    descricao: str
+    codigo: str = ''
+    situacao_anterior: Dinheiro = field(default_factory=Dinheiro)
+    situacao_atual: Dinheiro = field(default_factory=Dinheiro)
+
+    @classmethod
+    def de_dict(cls, item: Dict[str, Any]) -> "DividaOnus":
+        return cls(
+            _texto(item.get('descricao', 'Sem descrição')),
+            _texto(item.get('codigo')),
+            *_situacoes(item),
+        )
+
+
+class ExtracaoPDF:
+    """
+    Modelo tipado da resposta de extração de um PDF de declaração.
+    A estrutura é validada uma única vez na construção; cada seção é convertida
+    para dataclasses apenas no primeiro acesso e mantida em cache.
+    """
+
+    def __init__(self, resposta: Any):
+        """
+        Valida a resposta do webhook.
+
+        Args:
+            resposta: JSON retornado pela extração
+
+        Raises:
+            ErroExtracao: Se a resposta indicar erro, estiver vazia ou fora do formato esperado
+        """
+        self.bruto: Dict[str, Any] = self._validar(resposta)
+        self._secoes: Dict[str, Any] = {}
+
+    @staticmethod
+    def _validar(resposta: Any) -> Dict[str, Any]:
+        # O n8n pode devolver a resposta como uma lista com um único objeto
+        if isinstance(resposta, list) and len(resposta) == 1:
+            resposta = resposta[0]
+        if not isinstance(resposta, Mapping):
+            raise ErroExtracao(f"Resposta da extração em formato inesperado: {type(resposta).__name__}")
+        if 'erro' in resposta:
+            raise ErroExtracao(str(resposta['erro']))
+        if not resposta:
+            raise ErroExtracao("Resposta da extração vazia")
+
+        encontradas = 0
+        for secao in SECOES_LISTA:
+            if secao in resposta:
+                encontradas += 1
+                if not _secao_do_tipo(resposta, secao, list):
+                    raise ErroExtracao(f"Seção '{secao}' deveria ser uma lista")
+        for secao in SECOES_OBJETO:
+            if secao in resposta:
+                encontradas += 1
+                if not _secao_do_tipo(resposta, secao, dict):
+                    raise ErroExtracao(f"Seção '{secao}' deveria ser um objeto")
+        if not encontradas:
+            raise ErroExtracao("Nenhuma seção reconhecida na resposta da extração")
+        return resposta
+
+    def _secao(self, nome: str, conversor: Optional[Callable[[Dict[str, Any]], Any]] = None) -> List[Any]:
+        """
+        Materializa uma seção em lista (convertendo cada item, se houver conversor) no primeiro acesso.
+        Itens que o conversor recusa (ErroExtracao) são ignorados com um aviso.
+        """
+        if nome not in self._secoes:
+            itens = self.bruto.get(nome) or []
+            if conversor is not None:
+                convertidos = []
+                for item in itens:
+                    if not isinstance(item, dict):
+                        continue
+                    try:
+                        convertidos.append(conversor(item))
+                    except ErroExtracao as e:
+                        print(f"⚠️ {e}; item de '{nome}' ignorado")
+                itens = convertidos
+            self._secoes[nome] = itens
+        return self._secoes[nome]
+
+    @property
+    def declarante(self) -> Declarante:
+        if 'declarante' not in self._secoes:
+            self._secoes['declarante'] = Declarante.de_dict(self.bruto.get('declarante') or {})
+        return self._secoes['declarante']
+
+    @property
+    def dependentes(self) -> List[Dependente]:
+        if 'dependentes' not in self._secoes:
+            dependentes = []
+            for item in self.bruto.get('dependentes') or []:
+                if not isinstance(item, dict):
+                    continue
+                try:
+                    dependentes.append(Dependente.de_dict(item))
+                except ErroExtracao as e:
+                    print(f"⚠️ {e}; dependente ignorado")
+            self._secoes['dependentes'] = dependentes
+        return self._secoes['dependentes']
+
+    @property
+    def rendimentos_pj(self) -> List[RendimentoPJ]:
+        return self._secao('rendimentos_tributaveis_pj', RendimentoPJ.de_dict)
+
+    @property
+    def rendimentos_pf(self) -> List[RendimentoPF]:
+        return self._secao('rendimentos_tributaveis_pf', RendimentoPF.de_dict)
+
+    @property
+    def rendimentos_isentos(self) -> List[RendimentoIsento]:
+        return self._secao('rendimentos_isentos_nao_tributaveis', RendimentoIsento.de_dict)
+
+    @property
+    def bens_direitos(self) -> List[BemDireito]:
+        return self._secao('declaracao_bens_direitos', BemDireito.de_dict)
+
+    @property
+    def dividas_onus(self) -> List[DividaOnus]:
+        return self._secao('dividas_onus', DividaOnus.de_dict)
+
+    @property
+    def rendimentos_tributaveis(self) -> List[Dict[str, Any]]:
+        return self._secao('rendimentos_tributaveis')
+
+    @property
+    def rendimentos_exclusivos(self) -> List[Dict[str, Any]]:
+        return self._secao('rendimentos_exclusivos_fonte')
+
+    @property
+    def contas_bancarias(self) -> List[Dict[str, Any]]:
+        return self._secao('contas_bancarias')
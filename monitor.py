@@ -0,0 +1,241 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from config import WATCH_INTERVALO, WATCH_DEBOUNCE
+
+# Assinatura dos arquivos de uma pasta: (nome, tamanho, mtime) de cada PDF/DBK
+Assinatura = Tuple[Tuple[str, int, int], ...]
+
+
+def assinatura_pasta(caminho_pasta: str) -> Tuple[Optional[Tuple[str, str]], Assinatura]:
+    """
+    Lê os PDFs e DBKs de uma pasta de declaração.
+
+    Returns:
+        Tupla (par (PDF, DBK) se houver exatamente um de cada, assinatura dos arquivos)
+    """
+    pdfs = []
+    dbks = []
+    assinatura = []
+    try:
+        with os.scandir(caminho_pasta) as entradas:
+            for entrada in entradas:
+                nome = entrada.name.lower()
+                if not entrada.is_file() or not nome.endswith(('.pdf', '.dbk')):
+                    continue
+                info = entrada.stat()
+                assinatura.append((entrada.name, info.st_size, info.st_mtime_ns))
+                (pdfs if nome.endswith('.pdf') else dbks).append(entrada.path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None, ()
+    par = (pdfs[0], dbks[0]) if len(pdfs) == 1 and len(dbks) == 1 else None
+    return par, tuple(sorted(assinatura))
+
+
+class MonitorPastas:
+    """
+    Monitora a pasta raiz (uma subpasta por cliente) e entrega cada subpasta assim
+    que ela forma um par PDF+DBK completo. Uma pasta só é entregue depois que seus
+    arquivos ficam `espera` segundos sem mudar de tamanho ou data, o que evita
+    processar cópias parciais. Usa o pacote opcional watchdog (inotify e equivalentes)
+    quando instalado; caso contrário, faz polling da raiz, lendo os arquivos apenas
+    das subpastas que mudaram.
+    """
+
+    def __init__(self, pasta_raiz: str, ao_completar: Callable[[str, Tuple[str, str]], None],
+                 intervalo: float = WATCH_INTERVALO, espera: float = WATCH_DEBOUNCE,
+                 usar_watchdog: bool = True):
+        """
+        Args:
+            pasta_raiz: Pasta com uma subpasta por declaração
+            ao_completar: Chamado com (pasta, (PDF, DBK)) quando uma pasta fica completa
+            intervalo: Segundos entre verificações
+            espera: Segundos sem alterações para considerar a cópia concluída
+            usar_watchdog: Se False, usa sempre o polling
+        """
+        self.pasta_raiz = pasta_raiz
+        self.ao_completar = ao_completar
+        self.intervalo = intervalo
+        self.espera = espera
+        self.usar_watchdog = usar_watchdog
+        # mtime de cada subpasta na última varredura (apenas no polling)
+        self._mtimes: Dict[str, int] = {}
+        # Pastas com alterações ainda não estabilizadas: pasta -> (assinatura, instante da última mudança)
+        self._pendentes: Dict[str, Tuple[Assinatura, float]] = {}
+        # Assinatura com que cada pasta foi entregue, para não entregá-la de novo
+        self._entregues: Dict[str, Assinatura] = {}
+        self._alteradas: Set[str] = set()
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._observador = None
+
+    def _subpasta(self, caminho: str) -> Optional[str]:
+        """
+        Retorna a subpasta de primeiro nível da raiz que contém o caminho.
+        """
+        relativo = os.path.relpath(caminho, self.pasta_raiz)
+        if relativo.startswith(os.pardir) or relativo == os.curdir:
+            return None
+        return os.path.join(self.pasta_raiz, relativo.split(os.sep)[0])
+
+    def marcar_alterada(self, caminho: str) -> None:
+        """
+        Marca a subpasta que contém o caminho para verificação (usado pelos eventos do watchdog).
+        """
+        subpasta = self._subpasta(caminho)
+        if subpasta:
+            with self._trava:
+                self._alteradas.add(subpasta)
+
+    def _iniciar_watchdog(self) -> bool:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return False
+
+        monitor = self
+
+        class Manipulador(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                monitor.marcar_alterada(evento.src_path)
+                destino = getattr(evento, 'dest_path', None)
+                if destino:
+                    monitor.marcar_alterada(destino)
+
+        self._observador = Observer()
+        self._observador.schedule(Manipulador(), self.pasta_raiz, recursive=True)
+        self._observador.start()
+        return True
+
+    def _varrer_raiz(self) -> None:
+        """
+        Polling: uma leitura da raiz; apenas subpastas com mtime alterado são marcadas.
+        """
+        vistas = set()
+        with os.scandir(self.pasta_raiz) as entradas:
+            for entrada in entradas:
+                if not entrada.is_dir():
+                    continue
+                vistas.add(entrada.path)
+                mtime = entrada.stat().st_mtime_ns
+                if self._mtimes.get(entrada.path) != mtime:
+                    self._mtimes[entrada.path] = mtime
+                    with self._trava:
+                        self._alteradas.add(entrada.path)
+        for removida in set(self._mtimes) - vistas:
+            del self._mtimes[removida]
+            self._pendentes.pop(removida, None)
+            self._entregues.pop(removida, None)
+
+    def verificar(self) -> int:
+        """
+        Executa uma rodada de verificação: lê as subpastas alteradas ou pendentes e
+        entrega as que estão completas e estáveis.
+
+        Returns:
+            Quantidade de pastas entregues nesta rodada
+        """
+        if self._observador is None:
+            self._varrer_raiz()
+        with self._trava:
+            alteradas = self._alteradas
+            self._alteradas = set()
+
+        agora = time.monotonic()
+        entregues = 0
+        for pasta in alteradas | set(self._pendentes):
+            par, assinatura = assinatura_pasta(pasta)
+            if par is None or assinatura == self._entregues.get(pasta):
+                # Incompleta ou já entregue sem alterações. A chegada do outro arquivo
+                # altera a pasta, que volta a ser verificada.
+                self._pendentes.pop(pasta, None)
+                continue
+
+            anterior = self._pendentes.get(pasta)
+            if anterior is None or anterior[0] != assinatura:
+                self._pendentes[pasta] = (assinatura, agora)
+                continue
+            if agora - anterior[1] < self.espera:
+                continue
+
+            del self._pendentes[pasta]
+            self._entregues[pasta] = assinatura
+            entregues += 1
+            self.ao_completar(pasta, par)
+        return entregues
+
+    def executar(self) -> None:
+        """
+        Monitora até parar() ser chamado (ou Ctrl+C).
+        """
+        if self.usar_watchdog and self._iniciar_watchdog():
+            print(f"Monitorando {self.pasta_raiz} (watchdog)")
+            # A primeira leitura encontra as pastas que já existiam
+            self._varrer_raiz()
+        else:
+            print(f"Monitorando {self.pasta_raiz} (polling a cada {self.intervalo:g}s)")
+        try:
+            while not self._parar.is_set():
+                self.verificar()
+                self._parar.wait(self.intervalo)
+        finally:
+            if self._observador is not None:
+                self._observador.stop()
+                self._observador.join()
+                self._observador = None
+
+    def parar(self) -> None:
+        self._parar.set()
+
+
+def monitorar(pasta_raiz: str, processar: Callable[[str, str], bool], workers: int = 1,
+              intervalo: float = WATCH_INTERVALO, espera: float = WATCH_DEBOUNCE) -> None:
+    """
+    Processa continuamente as pastas de declaração que ficarem completas.
+
+    Args:
+        pasta_raiz: Pasta com uma subpasta por declaração
+        processar: Função chamada com (caminho_dbk, caminho_pdf), ex.: processar_declaracao
+        workers: Quantidade de declarações processadas simultaneamente
+        intervalo: Segundos entre verificações
+        espera: Segundos sem alterações para considerar a cópia concluída
+    """
+    fila: "queue.Queue[Optional[Tuple[str, Tuple[str, str]]]]" = queue.Queue()
+
+    def trabalhar() -> None:
+        while True:
+            item = fila.get()
+            if item is None:
+                return
+            pasta, (pdf, dbk) = item
+            try:
+                sucesso = processar(dbk, pdf)
+            except Exception as e:
+                print(f"❌ Erro inesperado ao processar {pasta}: {e}")
+                sucesso = False
+            marca = "✅" if sucesso else "❌"
+            print(f"{marca} Pasta processada: {pasta} ({fila.qsize()} na fila)")
+
+    threads = [threading.Thread(target=trabalhar, name=f"monitor-worker-{i + 1}", daemon=True)
+               for i in range(max(1, workers))]
+    for thread in threads:
+        thread.start()
+
+    def enfileirar(pasta: str, par: Tuple[str, str]) -> None:
+        print(f"Pasta completa detectada: {pasta}")
+        fila.put((pasta, par))
+
+    monitor = MonitorPastas(pasta_raiz, enfileirar, intervalo, espera)
+    try:
+        monitor.executar()
+    except KeyboardInterrupt:
+        print("\nEncerrando monitoramento; aguardando as declarações em andamento...")
+    finally:
+        for _ in threads:
+            fila.put(None)
+        for thread in threads:
+            thread.join()
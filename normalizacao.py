@@ -0,0 +1,71 @@
+import functools
+import unicodedata
+from typing import Dict
+
+from config import NORMALIZACAO_CACHE_CAPACIDADE, NORMALIZACAO_TAMANHO_MAXIMO
+
+# Os mesmos nomes (grandes empregadores, bancos) se repetem em milhares de declarações
+# de um lote; as normalizações ficam em caches LRU do processo, usados pelo GerenciaDBK
+# e pela leitura dos PDFs.
+
+
+def _normalizar_nome(texto: str) -> str:
+    # Remove espaços e acentos/cedilhas
+    texto = ''.join(texto.split())
+    return unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
+
+
+def _sem_acentos(texto: str) -> str:
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).upper()
+
+
+_normalizar_nome_cache = functools.lru_cache(maxsize=NORMALIZACAO_CACHE_CAPACIDADE)(_normalizar_nome)
+_sem_acentos_cache = functools.lru_cache(maxsize=NORMALIZACAO_CACHE_CAPACIDADE)(_sem_acentos)
+
+
+def normalizar_nome(texto: str) -> str:
+    """
+    Remove todos os espaços e acentos, para comparar nomes com as linhas do DBK.
+    """
+    if len(texto) > NORMALIZACAO_TAMANHO_MAXIMO:
+        return _normalizar_nome(texto)
+    return _normalizar_nome_cache(texto)
+
+
+def sem_acentos(texto: str) -> str:
+    """
+    Remove acentos e converte para maiúsculas, para comparar títulos do PDF.
+    """
+    if len(texto) > NORMALIZACAO_TAMANHO_MAXIMO:
+        return _sem_acentos(texto)
+    return _sem_acentos_cache(texto)
+
+
+def estatisticas_normalizacao() -> Dict[str, Dict[str, int]]:
+    """
+    Itens, acertos e falhas de cada cache de normalização desde o início do processo.
+    """
+    resultado = {}
+    for nome, funcao in (("nomes", _normalizar_nome_cache), ("sem_acentos", _sem_acentos_cache)):
+        info = funcao.cache_info()
+        resultado[nome] = {"itens": info.currsize, "acertos": info.hits, "falhas": info.misses}
+    return resultado
+
+
+def limpar_cache_normalizacao() -> None:
+    _normalizar_nome_cache.cache_clear()
+    _sem_acentos_cache.cache_clear()
+
+
+def relatorio_normalizacao() -> None:
+    """
+    Imprime a taxa de acerto dos caches de normalização.
+    """
+    partes = []
+    for nome, dados in estatisticas_normalizacao().items():
+        consultas = dados["acertos"] + dados["falhas"]
+        if consultas:
+            partes.append(f"{nome}: {dados['acertos'] / consultas:.1%} de {consultas} consultas ({dados['itens']} itens)")
+    if partes:
+        print(f"Cache de normalização - {' - '.join(partes)}")
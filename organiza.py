@@ -1,23 +1,277 @@
+import json
 import os
 import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 
-# Caminho da pasta com os arquivos
-pasta_origem = 'dados'  # substitua aqui
+from config import ORGANIZA_WORKERS
 
-# Lista todos os arquivos na pasta
-for arquivo in os.listdir(pasta_origem):
-    caminho_arquivo = os.path.join(pasta_origem, arquivo)
+# Caminho padrão da pasta com os arquivos
+PASTA_ORIGEM = 'dados'
 
-    # Verifica se é arquivo
-    if os.path.isfile(caminho_arquivo):
-        # Pega prefixo antes do primeiro hífen
-        prefixo = arquivo.split('-')[0]
 
-        # Cria a pasta de destino
-        pasta_destino = os.path.join(pasta_origem, prefixo)
-        os.makedirs(pasta_destino, exist_ok=True)
+class Movimento(NamedTuple):
+    origem: str
+    destino: str
 
-        # Move o arquivo
-        shutil.move(caminho_arquivo, os.path.join(pasta_destino, arquivo))
 
-print("Arquivos organizados com sucesso!")
+def prefixo_arquivo(nome: str) -> str:
+    """
+    Retorna o nome da pasta de destino: o prefixo antes do primeiro hífen.
+    Arquivos sem hífen usam o nome sem extensão. Se o resultado coincidir com um
+    arquivo existente (ex.: "ABC", sem hífen nem extensão), planejar() escolhe
+    outro nome para a pasta.
+    """
+    prefixo = nome.split('-')[0] if '-' in nome else ''
+    return prefixo or os.path.splitext(nome)[0] or nome
+
+
+def pasta_livre(pasta_origem: str, prefixo: str, escolhidas: Dict[str, str]) -> str:
+    """
+    Retorna a pasta de destino de um prefixo: a pasta com o nome do prefixo ou, se
+    esse nome já for de um arquivo, "prefixo (1)", "prefixo (2)", ... O mesmo
+    prefixo sempre recebe a mesma pasta (registrada em `escolhidas`).
+    """
+    if prefixo not in escolhidas:
+        candidato = os.path.join(pasta_origem, prefixo)
+        contador = 1
+        while os.path.lexists(candidato) and not os.path.isdir(candidato):
+            candidato = os.path.join(pasta_origem, f"{prefixo} ({contador})")
+            contador += 1
+        escolhidas[prefixo] = candidato
+    return escolhidas[prefixo]
+
+
+def nome_livre(pasta: str, nome: str, ocupados: Set[str]) -> str:
+    """
+    Retorna um nome que não existe na pasta nem foi reservado, acrescentando
+    " (1)", " (2)", ... antes da extensão quando necessário. O nome escolhido é
+    adicionado a `ocupados`.
+    """
+    base, extensao = os.path.splitext(nome)
+    candidato = nome
+    contador = 1
+    while candidato in ocupados or os.path.lexists(os.path.join(pasta, candidato)):
+        candidato = f"{base} ({contador}){extensao}"
+        contador += 1
+    ocupados.add(candidato)
+    return candidato
+
+
+def planejar(pasta_origem: str) -> Tuple[List[Movimento], Dict[str, Set[str]]]:
+    """
+    Lista os arquivos da pasta de origem e define o destino de cada um, sem mover nada.
+
+    Returns:
+        Tupla (movimentos, conteúdo final de cada pasta de destino)
+    """
+    arquivos: List[Tuple[str, str]] = []
+    with os.scandir(pasta_origem) as entradas:
+        for entrada in entradas:
+            if entrada.is_file():
+                arquivos.append((entrada.name, entrada.path))
+    arquivos.sort()
+
+    # Conteúdo atual de cada pasta de destino, lido uma única vez por pasta
+    conteudo: Dict[str, Set[str]] = {}
+    pastas: Dict[str, str] = {}
+    movimentos = []
+    for nome, caminho in arquivos:
+        pasta_destino = pasta_livre(pasta_origem, prefixo_arquivo(nome), pastas)
+        if pasta_destino not in conteudo:
+            conteudo[pasta_destino] = set()
+            if os.path.isdir(pasta_destino):
+                with os.scandir(pasta_destino) as entradas:
+                    conteudo[pasta_destino].update(entrada.name for entrada in entradas)
+        nome_destino = nome_livre(pasta_destino, nome, conteudo[pasta_destino])
+        movimentos.append(Movimento(caminho, os.path.join(pasta_destino, nome_destino)))
+    return movimentos, conteudo
+
+
+def mover_sem_sobrescrever(origem: str, destino: str) -> None:
+    """
+    Move um arquivo sem nunca substituir o destino. No mesmo sistema de arquivos
+    cria um hard link e remove a origem (sem copiar dados); entre sistemas de
+    arquivos diferentes, ou sem suporte a hard links, copia para um destino criado
+    em modo exclusivo.
+
+    Raises:
+        FileExistsError: Se o destino já existir
+    """
+    try:
+        os.link(origem, destino)
+    except FileExistsError:
+        raise
+    except OSError:
+        with open(origem, 'rb') as entrada, open(destino, 'xb') as saida:
+            try:
+                shutil.copyfileobj(entrada, saida)
+            except BaseException:
+                saida.close()
+                os.remove(destino)
+                raise
+        shutil.copystat(origem, destino)
+    os.unlink(origem)
+
+
+def mover(movimento: Movimento, trava: threading.Lock, ocupados: Set[str]) -> str:
+    """
+    Move um arquivo para o destino planejado. Se outro processo tiver criado um
+    arquivo com o mesmo nome depois do planejamento, escolhe um nome livre, em vez
+    de sobrescrevê-lo.
+
+    Args:
+        movimento: Origem e destino planejados
+        trava: Trava que protege `ocupados`
+        ocupados: Nomes da pasta de destino já usados ou reservados
+
+    Returns:
+        Caminho final do arquivo
+    """
+    destino = movimento.destino
+    pasta = os.path.dirname(destino)
+    while True:
+        try:
+            mover_sem_sobrescrever(movimento.origem, destino)
+            return destino
+        except FileExistsError:
+            with trava:
+                destino = os.path.join(pasta, nome_livre(pasta, os.path.basename(movimento.origem), ocupados))
+
+
+def salvar_manifesto(caminho_manifesto: str, pasta_origem: str, conteudo: Dict[str, Set[str]]) -> str:
+    """
+    Grava o manifesto das pastas de destino com seus PDFs e DBKs, para que o main.py
+    processe os pares sem varrer as pastas novamente (--manifesto).
+
+    Returns:
+        Caminho do manifesto gravado
+    """
+    pastas = []
+    for pasta in sorted(conteudo):
+        nomes = sorted(conteudo[pasta])
+        pastas.append({
+            'pasta': pasta,
+            'pdfs': [os.path.join(pasta, nome) for nome in nomes if nome.lower().endswith('.pdf')],
+            'dbks': [os.path.join(pasta, nome) for nome in nomes if nome.lower().endswith('.dbk')],
+        })
+    diretorio = os.path.dirname(caminho_manifesto)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    with open(caminho_manifesto, 'w', encoding='utf-8') as f:
+        json.dump({'pasta_origem': pasta_origem, 'pastas': pastas}, f, ensure_ascii=False, indent=2)
+    print(f"Manifesto com {len(pastas)} pastas salvo em: {caminho_manifesto}")
+    return caminho_manifesto
+
+
+def carregar_manifesto(caminho_manifesto: str) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]]]:
+    """
+    Lê um manifesto gerado pelo organiza.py.
+
+    Returns:
+        Tupla (pares (PDF, DBK), pastas com erro), no mesmo formato de main.buscar_pares
+    """
+    with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+        manifesto = json.load(f)
+
+    pares = []
+    pastas_com_erro = []
+    for item in manifesto.get('pastas', []):
+        pdfs, dbks = item.get('pdfs', []), item.get('dbks', [])
+        if len(pdfs) == 1 and len(dbks) == 1:
+            pares.append((pdfs[0], dbks[0]))
+        else:
+            pastas_com_erro.append({
+                'pasta': os.path.basename(item['pasta']),
+                'caminho': item['pasta'],
+                'num_pdfs': len(pdfs),
+                'num_dbks': len(dbks),
+                'pdfs': [os.path.basename(p) for p in pdfs],
+                'dbks': [os.path.basename(d) for d in dbks],
+            })
+    return pares, pastas_com_erro
+
+
+def organizar(pasta_origem: str = PASTA_ORIGEM, simular: bool = False, workers: int = ORGANIZA_WORKERS,
+              caminho_manifesto: Optional[str] = None) -> Dict[str, int]:
+    """
+    Move cada arquivo da pasta de origem para a subpasta do seu prefixo
+    (ex.: dados/12345678900-IRPF.pdf -> dados/12345678900/12345678900-IRPF.pdf).
+
+    Args:
+        pasta_origem: Pasta com os arquivos a organizar
+        simular: Se True, apenas exibe o que seria feito
+        workers: Quantidade de movimentos simultâneos
+        caminho_manifesto: Se informado, grava o manifesto das pastas de destino
+
+    Returns:
+        Dicionário com a quantidade de arquivos movidos, renomeados por colisão e com erro
+    """
+    movimentos, conteudo = planejar(pasta_origem)
+    renomeados = sum(1 for m in movimentos if os.path.basename(m.origem) != os.path.basename(m.destino))
+
+    if simular:
+        for movimento in movimentos:
+            print(f"[simulação] {movimento.origem} -> {movimento.destino}")
+        print(f"[simulação] {len(movimentos)} arquivos em {len(conteudo)} pastas ({renomeados} renomeados por colisão)")
+        return {'movidos': 0, 'renomeados': renomeados, 'erros': 0}
+
+    # Cria cada pasta de destino uma única vez, antes dos movimentos
+    for pasta in conteudo:
+        os.makedirs(pasta, exist_ok=True)
+
+    trava = threading.Lock()
+    erros = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="organiza") as executor:
+        futuros = {
+            executor.submit(mover, movimento, trava, conteudo[os.path.dirname(movimento.destino)]): movimento
+            for movimento in movimentos
+        }
+        for futuro, movimento in futuros.items():
+            try:
+                destino = futuro.result()
+            except OSError as e:
+                erros += 1
+                print(f"❌ Erro ao mover {movimento.origem}: {e}")
+                with trava:
+                    conteudo[os.path.dirname(movimento.destino)].discard(os.path.basename(movimento.destino))
+                continue
+            if destino != movimento.destino:
+                renomeados += 1
+
+    if caminho_manifesto:
+        salvar_manifesto(caminho_manifesto, pasta_origem, conteudo)
+
+    print(f"Arquivos organizados com sucesso! {len(movimentos) - erros} movidos para {len(conteudo)} pastas"
+          f" ({renomeados} renomeados por colisão, {erros} erros)")
+    return {'movidos': len(movimentos) - erros, 'renomeados': renomeados, 'erros': erros}
+
+
+def main() -> int:
+    pasta_origem = PASTA_ORIGEM
+    workers = ORGANIZA_WORKERS
+    caminho_manifesto = None
+    simular = '--simular' in sys.argv
+
+    for i, arg in enumerate(sys.argv):
+        if arg == '--pasta' and i + 1 < len(sys.argv):
+            pasta_origem = sys.argv[i + 1]
+        elif arg == '--workers' and i + 1 < len(sys.argv):
+            try:
+                workers = int(sys.argv[i + 1])
+            except ValueError:
+                pass
+        elif arg == '--manifesto' and i + 1 < len(sys.argv):
+            caminho_manifesto = sys.argv[i + 1]
+
+    if not os.path.isdir(pasta_origem):
+        print(f"[!] Pasta não encontrada: {pasta_origem}")
+        return 1
+    resultado = organizar(pasta_origem, simular, workers, caminho_manifesto)
+    return 1 if resultado['erros'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,16 @@
 import json
 import os
-import datetime
+from collections.abc import Mapping
+from datetime import datetime
 from typing import Dict, List, Any, Optional
 
-from Webhook import Webhook
-from config import WEBHOOK_URL, VALOR_TAMANHO_PADRAO
+from config import VALOR_TAMANHO_PADRAO, EXTENSAO_EXTRACAO_BINARIA
+from extratores import Extrator, extrator_padrao
+from dinheiro import Dinheiro
+from extracao_binaria import ExtracaoBinaria, para_dict
+from relatorio import resumir_declaracao
+from modelo_pdf import (ExtracaoPDF, ErroExtracao, Declarante, Dependente, RendimentoPJ,
+                        RendimentoPF, RendimentoIsento, BemDireito, DividaOnus)
 
 
 
@@ -15,16 +21,48 @@ class PDF2024Dados:
     que contém informações da declaração de 2024 (calendário 2023)
     """
     
-    def __init__(self, origem: Any):
+    def __init__(self, origem: Any, extrator: Optional[Extrator] = None):
         self.dados = None
+        self.extracao: Optional[ExtracaoPDF] = None
+        self.erro: Optional[str] = None
+        self.extrator = extrator
        
         if isinstance(origem, str):
             self.caminho_pdf = origem
             self.carregar_dados()
+        elif isinstance(origem, Mapping):
+            self.caminho_pdf = None
+            self.definir_resposta(origem)
         else:
             print("ERRO: Tipo de origem inválido. Esperado str ou dict.")
             self.dados = {}
+            self.erro = "Tipo de origem inválido"
+
+    @property
+    def valido(self) -> bool:
+        """
+        Indica se a extração foi bem-sucedida e passou na validação do modelo.
+        """
+        return self.extracao is not None
+
+    def definir_resposta(self, resposta: Any) -> None:
+        """
+        Valida a resposta da extração e constrói o modelo tipado. Respostas de erro
+        (ex.: {"erro": ...}) deixam o objeto inválido, com a mensagem em self.erro.
+
+        Args:
+            resposta: JSON retornado pela extração
+        """
+        self.dados = resposta
+        try:
+            self.extracao = ExtracaoPDF(resposta)
+            self.erro = None
+        except ErroExtracao as e:
+            self.extracao = None
+            self.erro = str(e)
+            print(f"ERRO na extração do PDF: {self.erro}")
     
+    @staticmethod
     def salvar_json_em_arquivo(dados: dict, caminho: str) -> None:
         """
         Salva um dicionário (JSON) em um arquivo local.
@@ -34,42 +72,78 @@ class PDF2024Dados:
             caminho: Caminho do arquivo de saída (ex: 'saida.json')
         """
         try:
+            diretorio = os.path.dirname(caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
             with open(caminho, 'w', encoding='utf-8') as f:
-                json.dump(dados, f, ensure_ascii=False, indent=4)
+                json.dump(para_dict(dados), f, ensure_ascii=False, indent=4)
             print(f"JSON salvo com sucesso em: {caminho}")
         except Exception as e:
             print(f"Erro ao salvar o JSON: {e}")
 
+    @staticmethod
+    def salvar_extracao(dados: Any, caminho_base: str) -> str:
+        """
+        Salva a resposta da extração para relatórios posteriores. Respostas no formato
+        binário (ExtracaoBinaria) são gravadas como estão, sem decodificar as seções;
+        as demais, em JSON. Uma extração anterior do mesmo PDF no outro formato é removida.
+
+        Args:
+            dados: Resposta da extração
+            caminho_base: Caminho do arquivo de saída, sem extensão
+
+        Returns:
+            Caminho do arquivo gravado
+        """
+        if isinstance(dados, ExtracaoBinaria):
+            caminho, anterior = caminho_base + EXTENSAO_EXTRACAO_BINARIA, caminho_base + ".json"
+            diretorio = os.path.dirname(caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            with open(caminho, 'wb') as f:
+                f.write(dados.conteudo)
+            print(f"Extração salva em: {caminho}")
+        else:
+            caminho, anterior = caminho_base + ".json", caminho_base + EXTENSAO_EXTRACAO_BINARIA
+            PDF2024Dados.salvar_json_em_arquivo(dados, caminho)
+        if os.path.exists(anterior):
+            os.remove(anterior)
+        return caminho
+
 
 
 
 
     def carregar_dados(self) -> None:
         try:
-            webhook = Webhook("https://linomenezes54.app.n8n.cloud/webhook/pdf")
-            response = webhook.enviar_pdf(self.caminho_pdf)   
-            self.dados = response
-            print(f"Dados do PDF carregados com sucesso: {self.caminho_pdf}")
+            extrator = self.extrator or extrator_padrao()
+            response = extrator.extrair(self.caminho_pdf)
+            self.definir_resposta(response)
+            if self.valido:
+                print(f"Dados do PDF carregados com sucesso: {self.caminho_pdf}")
         except FileNotFoundError:
             print(f"ERRO: Arquivo não encontrado: {self.caminho_pdf}")
             self.dados = {}
+            self.erro = "Falha ao carregar dados do PDF"
         except json.JSONDecodeError:
             print(f"ERRO: Formato JSON inválido no arquivo: {self.caminho_pdf}")
             self.dados = {}
+            self.erro = "Falha ao carregar dados do PDF"
         except Exception as e:
             print(f"ERRO ao carregar dados do PDF: {e}")
             self.dados = {}
+            self.erro = "Falha ao carregar dados do PDF"
     
-    def obter_declarante(self) -> Dict[str, Any]:
+    def obter_declarante(self) -> Optional[Declarante]:
         """
         Retorna os dados do declarante
         
         Returns:
-            Dicionário com informações do declarante
+            Declarante, ou None se a extração for inválida
         """
-        if not self.dados or 'declarante' not in self.dados:
-            return {}
-        return self.dados['declarante']
+        if not self.extracao or 'declarante' not in self.extracao.bruto:
+            return None
+        return self.extracao.declarante
     
     def obter_rendimentos_tributaveis(self) -> List[Dict[str, Any]]:
         """
@@ -78,23 +152,36 @@ class PDF2024Dados:
         Returns:
             Lista de rendimentos tributáveis
         """
-        if not self.dados or 'rendimentos_tributaveis' not in self.dados:
-            return []
-        return self.dados['rendimentos_tributaveis']
+        return self.extracao.rendimentos_tributaveis if self.extracao else []
     
     
-    def obter_valores_rendimentos_pj(self) -> List[Dict[str, Any]]:
-        if not self.dados or 'rendimentos_tributaveis_pj' not in self.dados:
-            return []
+    def obter_valores_rendimentos_pj(self) -> List[RendimentoPJ]:
+        """
+        Retorna as fontes pagadoras PJ com os valores no formato dos campos do DBK
         
-        print("DADOS OBTIDOS DO PDF")
+        Returns:
+            Lista de rendimentos PJ
+        """
+        return self.extracao.rendimentos_pj if self.extracao else []
+
+    def obter_rendimentos_pf(self) -> List[RendimentoPF]:
+        """
+        Retorna os rendimentos recebidos de pessoa física e do exterior, mês a mês,
+        com os valores no formato dos campos do DBK
         
-        return self.dados['rendimentos_tributaveis_pj']
+        Returns:
+            Lista de rendimentos PF
+        """
+        return self.extracao.rendimentos_pf if self.extracao else []
 
-    def obter_rendimentos_isentos(self) -> List[Dict[str, Any]]:
-        if not self.dados or 'rendimentos_isentos_nao_tributaveis' not in self.dados:
-            return []
-        return self.dados['rendimentos_isentos_nao_tributaveis']
+    def obter_rendimentos_isentos(self) -> List[RendimentoIsento]:
+        """
+        Retorna os dados de rendimentos isentos e não tributáveis
+        
+        Returns:
+            Lista de rendimentos isentos
+        """
+        return self.extracao.rendimentos_isentos if self.extracao else []
     
     def obter_rendimentos_exclusivos(self) -> List[Dict[str, Any]]:
         """
@@ -103,35 +190,26 @@ class PDF2024Dados:
         Returns:
             Lista de rendimentos exclusivos
         """
-        if not self.dados or 'rendimentos_exclusivos_fonte' not in self.dados:
-            return []
-        return self.dados['rendimentos_exclusivos_fonte']
+        return self.extracao.rendimentos_exclusivos if self.extracao else []
     
     
-    def obter_dividas_onus(self) -> List[Dict[str, Any]]:
+    def obter_dividas_onus(self) -> List[DividaOnus]:
         """
         Retorna os dados de dívidas e ônus
         
         Returns:
             Lista de dívidas e ônus
         """
-        if not self.dados or 'dividas_onus' not in self.dados:
-            return []
-        return self.dados['dividas_onus']
+        return self.extracao.dividas_onus if self.extracao else []
     
-    def obter_dependentes(self) -> List[Dict[str, Any]]:
+    def obter_dependentes(self) -> List[Dependente]:
         """
-        Retorna os dados de dependentes, contendo apenas código e nome.
+        Retorna os dados de dependentes. A lista é construída uma única vez.
         
         Returns:
-            Lista de dependentes com código e nome
+            Lista de dependentes
         """
-        if not self.dados or 'dependentes' not in self.dados:
-            return []
-
-        dependentes = self.dados['dependentes']
-        resultado = [{'codigo': item['codigo'], 'nome': item['nome']} for item in dependentes]
-        return resultado
+        return self.extracao.dependentes if self.extracao else []
     
     def obter_contas_bancarias(self) -> List[Dict[str, Any]]:
         """
@@ -140,15 +218,17 @@ class PDF2024Dados:
         Returns:
             Lista de contas bancárias
         """
-        if not self.dados or 'contas_bancarias' not in self.dados:
-            return []
-        return self.dados['contas_bancarias']
+        return self.extracao.contas_bancarias if self.extracao else []
     
 
-    def obter_bens_direitos(self) -> List[Dict[str, Any]]:
-        if not self.dados or 'declaracao_bens_direitos' not in self.dados:
-            return []
-        return self.dados['declaracao_bens_direitos']
+    def obter_bens_direitos(self) -> List[BemDireito]:
+        """
+        Retorna os dados de bens e direitos
+        
+        Returns:
+            Lista de bens e direitos
+        """
+        return self.extracao.bens_direitos if self.extracao else []
 
 
 
@@ -164,8 +244,8 @@ class PDF2024Dados:
         print("\n" + "=" * 60)
         print("DECLARAÇÃO DE IMPOSTO DE RENDA - ANO BASE 2023")
         print("=" * 60)
-        print(f"Nome: {declarante.get('nome', 'N/A')}")
-        print(f"CPF: {declarante.get('cpf', 'N/A')}")
+        print(f"Nome: {declarante.nome or 'N/A'}")
+        print(f"CPF: {declarante.cpf or 'N/A'}")
         print(f"Data de geração: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
         print("-" * 60)
     
@@ -183,16 +263,16 @@ class PDF2024Dados:
             print("Nenhum rendimento tributável encontrado.")
             return
         
-        total_rendimentos = 0
-        total_previdencia = 0
-        total_irrf = 0
+        total_rendimentos = Dinheiro()
+        total_previdencia = Dinheiro()
+        total_irrf = Dinheiro()
         
         for i, r in enumerate(rendimentos, 1):
             fonte = r.get('fonte', 'Fonte não informada')
             cnpj = r.get('cnpj', 'N/A')
-            valor = r.get('valor', 0)
-            previdencia = r.get('contrib_previdencia_oficial', 0)
-            irrf = r.get('imposto_retido_fonte', 0)
+            valor = Dinheiro.de_json(r.get('valor'))
+            previdencia = Dinheiro.de_json(r.get('contrib_previdencia_oficial'))
+            irrf = Dinheiro.de_json(r.get('imposto_retido_fonte'))
             
             total_rendimentos += valor
             total_previdencia += previdencia
@@ -207,10 +287,10 @@ class PDF2024Dados:
             
             # Se tiver informações de 13º salário
             if 'decimo_terceiro' in r:
-                decimo = r['decimo_terceiro']
-                valor_13 = decimo.get('valor', 0)
-                irrf_13 = decimo.get('irrf', 0)
-                if valor_13 > 0:
+                decimo = r['decimo_terceiro'] or {}
+                valor_13 = Dinheiro.de_json(decimo.get('valor'))
+                irrf_13 = Dinheiro.de_json(decimo.get('irrf'))
+                if valor_13 > Dinheiro():
                     print(f"13º Salário: R$ {valor_13:.2f}")
                     print(f"IRRF sobre 13º: R$ {irrf_13:.2f}")
             
@@ -235,12 +315,12 @@ class PDF2024Dados:
             print("Nenhum rendimento isento encontrado.")
             return
         
-        total_isentos = 0
+        total_isentos = Dinheiro()
         
         for i, r in enumerate(rendimentos, 1):
-            fonte = r.get('fonte', 'Fonte não informada')
-            cnpj = r.get('cnpj', 'N/A')
-            valor = r.get('valor', 0)
+            fonte = r.fonte
+            cnpj = r.cnpj or 'N/A'
+            valor = r.valor
             
             total_isentos += valor
             
@@ -266,13 +346,13 @@ class PDF2024Dados:
             print("Nenhum rendimento com tributação exclusiva encontrado.")
             return
         
-        total_exclusivos = 0
+        total_exclusivos = Dinheiro()
         
         for i, r in enumerate(rendimentos, 1):
             tipo = r.get('tipo', 'Tipo não informado')
             fonte = r.get('fonte', 'Fonte não informada')
             cnpj = r.get('cnpj', 'N/A')
-            valor = r.get('valor', 0)
+            valor = Dinheiro.de_json(r.get('valor'))
             
             total_exclusivos += valor
             
@@ -299,15 +379,15 @@ class PDF2024Dados:
             print("Nenhum bem ou direito encontrado.")
             return
         
-        total_2022 = 0
-        total_2023 = 0
+        total_2022 = Dinheiro()
+        total_2023 = Dinheiro()
         
         for i, bem in enumerate(bens, 1):
-            codigo = bem.get('codigo', 'N/A')
-            descricao = bem.get('descricao', 'Sem descrição')
-            valor_2022 = bem.get('situacao_31_12_2022', 0)
-            valor_2023 = bem.get('situacao_31_12_2023', 0)
-            pais = bem.get('pais', 'N/A')
+            codigo = bem.codigo
+            descricao = bem.descricao
+            valor_2022 = bem.situacao_anterior
+            valor_2023 = bem.situacao_atual
+            pais = bem.pais
             
             total_2022 += valor_2022
             total_2023 += valor_2023
@@ -320,16 +400,16 @@ class PDF2024Dados:
             print(f"País: {pais}")
             
             # Campos adicionais específicos
-            if 'cnpj' in bem:
-                print(f"CNPJ: {bem['cnpj']}")
-            if 'renavam' in bem:
-                print(f"RENAVAM: {bem['renavam']}")
-            if 'banco' in bem:
-                print(f"Banco: {bem['banco']}")
-            if 'agencia' in bem and bem['agencia']:
-                print(f"Agência: {bem['agencia']}")
-            if 'conta' in bem and bem['conta']:
-                print(f"Conta: {bem['conta']}")
+            if bem.cnpj:
+                print(f"CNPJ: {bem.cnpj}")
+            if bem.renavam:
+                print(f"RENAVAM: {bem.renavam}")
+            if bem.banco:
+                print(f"Banco: {bem.banco}")
+            if bem.agencia:
+                print(f"Agência: {bem.agencia}")
+            if bem.conta:
+                print(f"Conta: {bem.conta}")
                 
             print("-" * 45)
         
@@ -337,9 +417,9 @@ class PDF2024Dados:
         print(f"Total de Bens/Direitos em 31/12/2022: R$ {total_2022:.2f}")
         print(f"Total de Bens/Direitos em 31/12/2023: R$ {total_2023:.2f}")
         variacao = total_2023 - total_2022
-        if variacao > 0:
+        if variacao > Dinheiro():
             print(f"Aumento Patrimonial: R$ {variacao:.2f}")
-        elif variacao < 0:
+        elif variacao < Dinheiro():
             print(f"Diminuição Patrimonial: R$ {abs(variacao):.2f}")
         else:
             print("Sem variação patrimonial")
@@ -358,13 +438,13 @@ class PDF2024Dados:
             print("Nenhuma dívida ou ônus encontrado.")
             return
         
-        total_2022 = 0
-        total_2023 = 0
+        total_2022 = Dinheiro()
+        total_2023 = Dinheiro()
         
         for i, divida in enumerate(dividas, 1):
-            descricao = divida.get('descricao', 'Sem descrição')
-            valor_2022 = divida.get('situacao_31_12_2022', 0)
-            valor_2023 = divida.get('situacao_31_12_2023', 0)
+            descricao = divida.descricao
+            valor_2022 = divida.situacao_anterior
+            valor_2023 = divida.situacao_atual
             
             total_2022 += valor_2022
             total_2023 += valor_2023
@@ -394,10 +474,10 @@ class PDF2024Dados:
             return
         
         for i, dep in enumerate(dependentes, 1):
-            nome = dep.get('nome', 'Nome não informado')
-            cpf = dep.get('cpf', 'CPF não informado')
-            data_nasc = dep.get('data_nascimento', 'Data não informada')
-            relacao = dep.get('relacao', 'Relação não informada')
+            nome = dep.nome or 'Nome não informado'
+            cpf = dep.cpf or 'CPF não informado'
+            data_nasc = dep.data_nascimento or 'Data não informada'
+            relacao = dep.relacao or 'Relação não informada'
             
             print(f"\nDependente #{i}:")
             print(f"Nome: {nome}")
@@ -439,38 +519,31 @@ class PDF2024Dados:
         """
         Imprime um resumo geral da declaração
         """
-        # Dados gerais
-        declarante = self.obter_declarante()
-        rendimentos_trib = self.obter_rendimentos_tributaveis()
-        rendimentos_isen = self.obter_rendimentos_isentos()
-        rendimentos_excl = self.obter_rendimentos_exclusivos()
-        bens = self.obter_bens_direitos()
-        dividas = self.obter_dividas_onus()
-        dependentes = self.obter_dependentes()
-        
-        # Cálculos de totais
-        total_rendimentos_trib = sum(r.get('valor', 0) for r in rendimentos_trib)
-        total_previdencia = sum(r.get('contrib_previdencia_oficial', 0) for r in rendimentos_trib)
-        total_irrf = sum(r.get('imposto_retido_fonte', 0) for r in rendimentos_trib)
-        
-        total_isentos = sum(r.get('valor', 0) for r in rendimentos_isen)
-        total_exclusivos = sum(r.get('valor', 0) for r in rendimentos_excl)
-        
-        total_bens_2022 = sum(b.get('situacao_31_12_2022', 0) for b in bens)
-        total_bens_2023 = sum(b.get('situacao_31_12_2023', 0) for b in bens)
-        
-        total_dividas_2022 = sum(d.get('situacao_31_12_2022', 0) for d in dividas)
-        total_dividas_2023 = sum(d.get('situacao_31_12_2023', 0) for d in dividas)
-        
-        patrimonio_2022 = total_bens_2022 - total_dividas_2022
-        patrimonio_2023 = total_bens_2023 - total_dividas_2023
-        variacao_patrimonial = patrimonio_2023 - patrimonio_2022
+        if not self.extracao:
+            print("Nenhum dado de declaração disponível.")
+            return
+
+        # Todos os totais são calculados em uma única passagem por seção
+        resumo = resumir_declaracao(self.extracao)
+        declarante = self.extracao.declarante
+        total_rendimentos_trib = resumo['rendimentos_tributaveis']
+        total_previdencia = resumo['previdencia']
+        total_irrf = resumo['irrf']
+        total_isentos = resumo['rendimentos_isentos']
+        total_exclusivos = resumo['rendimentos_exclusivos']
+        total_bens_2022 = resumo['bens_anterior']
+        total_bens_2023 = resumo['bens_atual']
+        total_dividas_2022 = resumo['dividas_anterior']
+        total_dividas_2023 = resumo['dividas_atual']
+        patrimonio_2022 = resumo['patrimonio_anterior']
+        patrimonio_2023 = resumo['patrimonio_atual']
+        variacao_patrimonial = resumo['variacao_patrimonial']
         
         print("\n" + "#" * 70)
         print("#" + " " * 25 + "RESUMO DA DECLARAÇÃO" + " " * 25 + "#")
         print("#" * 70)
-        print(f"Declarante: {declarante.get('nome', 'N/A')}")
-        print(f"CPF: {declarante.get('cpf', 'N/A')}")
+        print(f"Declarante: {declarante.nome or 'N/A'}")
+        print(f"CPF: {declarante.cpf or 'N/A'}")
         print("-" * 70)
         
         print("\n📊 RENDIMENTOS:")
@@ -489,13 +562,15 @@ class PDF2024Dados:
         print(f"   Patrimônio Líquido em 31/12/2023: R$ {patrimonio_2023:.2f}")
         
         print(f"\n📈 VARIAÇÃO PATRIMONIAL: R$ {variacao_patrimonial:.2f}")
-        if variacao_patrimonial > 0:
+        if not patrimonio_2022:
+            pass
+        elif variacao_patrimonial > Dinheiro():
             print(f"   (Aumento de {(variacao_patrimonial/patrimonio_2022*100):.2f}% em relação a 2022)")
-        elif variacao_patrimonial < 0:
+        elif variacao_patrimonial < Dinheiro():
             print(f"   (Diminuição de {(abs(variacao_patrimonial)/patrimonio_2022*100):.2f}% em relação a 2022)")
         
-        print(f"\n👨‍👩‍👧‍👦 DEPENDENTES: {len(dependentes)}")
-        print(f"💳 CONTAS BANCÁRIAS: {len(self.obter_contas_bancarias())}")
+        print(f"\n👨‍👩‍👧‍👦 DEPENDENTES: {resumo['dependentes']}")
+        print(f"💳 CONTAS BANCÁRIAS: {resumo['contas_bancarias']}")
         
         print("\n" + "#" * 70)
 
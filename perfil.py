@@ -0,0 +1,150 @@
+import functools
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from config import PERFIL_TOP_ALOCACOES
+
+MODOS_PERFIL = ('cprofile', 'memoria', 'ambos')
+
+
+class Perfilador:
+    """
+    Captura cProfile e/ou tracemalloc de declarações selecionadas e grava os
+    resultados ao lado do log da declaração (pasta de log.Logger):
+    <DBK>.prof (abrir com pstats ou snakeviz) e <DBK>.alocacoes.txt.
+
+    Uma declaração é capturada quando é a N-ésima do lote (`cada`), quando está na
+    pasta indicada (`pasta`) ou, com `limiar`, quando leva mais que `limiar`
+    segundos. Como a duração só é conhecida ao final, com `limiar` todas as
+    declarações são capturadas e apenas as lentas são gravadas. Sem nenhum desses
+    critérios, todas são capturadas.
+
+    Só uma declaração é capturada por vez (cProfile e tracemalloc valem para o
+    processo todo); no modo paralelo, as que chegam enquanto outra está sendo
+    capturada rodam sem perfil. O main desativa a pré-busca com --perfil, para que
+    a extração do PDF aconteça dentro de processar_declaracao e entre na captura.
+    """
+
+    def __init__(self, modo: str = 'ambos', cada: int = 0, limiar: float = 0.0, pasta: Optional[str] = None):
+        """
+        Args:
+            modo: 'cprofile', 'memoria' (tracemalloc) ou 'ambos'
+            cada: Captura a cada N declarações (0 desativa)
+            limiar: Grava as declarações mais lentas que este número de segundos (0 desativa)
+            pasta: Captura as declarações desta pasta (nome da pasta da declaração)
+
+        Raises:
+            ValueError: Se o modo for desconhecido
+        """
+        if modo not in MODOS_PERFIL:
+            raise ValueError(f"Modo de perfil desconhecido: {modo} (use {', '.join(MODOS_PERFIL)})")
+        self.modo = modo
+        self.cada = max(0, cada)
+        self.limiar = max(0.0, limiar)
+        self.pasta = pasta
+        self._contador = 0
+        self._trava = threading.Lock()
+        self._capturando = threading.Lock()
+        self.gravados = 0
+
+    def _selecionada(self, caminho_dbk: str) -> bool:
+        with self._trava:
+            self._contador += 1
+            contador = self._contador
+        if self.pasta and os.path.basename(os.path.dirname(os.path.abspath(caminho_dbk))) == self.pasta:
+            return True
+        if self.cada and contador % self.cada == 0:
+            return True
+        return not self.cada and not self.pasta and not self.limiar
+
+    def envolver(self, processar: Callable[..., bool]) -> Callable[..., bool]:
+        """
+        Envolve a função de processamento (caminho_dbk, caminho_pdf, ...) com a captura.
+        """
+        @functools.wraps(processar)
+        def processar_com_perfil(caminho_dbk: str, caminho_pdf: str, *args, **kwargs) -> bool:
+            selecionada = self._selecionada(caminho_dbk)
+            if not (selecionada or self.limiar) or not self._capturando.acquire(blocking=False):
+                return processar(caminho_dbk, caminho_pdf, *args, **kwargs)
+            try:
+                return self._capturar(processar, selecionada, caminho_dbk, caminho_pdf, *args, **kwargs)
+            finally:
+                self._capturando.release()
+
+        return processar_com_perfil
+
+    def _capturar(self, processar: Callable[..., bool], selecionada: bool, caminho_dbk: str, caminho_pdf: str,
+                  *args, **kwargs) -> bool:
+        import cProfile
+        import tracemalloc
+
+        perfil = cProfile.Profile() if self.modo in ('cprofile', 'ambos') else None
+        memoria = self.modo in ('memoria', 'ambos')
+        if memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        if perfil:
+            perfil.enable()
+        try:
+            return processar(caminho_dbk, caminho_pdf, *args, **kwargs)
+        finally:
+            if perfil:
+                perfil.disable()
+            duracao = time.perf_counter() - inicio
+            instantaneo = tracemalloc.take_snapshot() if memoria else None
+            pico = tracemalloc.get_traced_memory()[1] if memoria else 0
+            if memoria:
+                tracemalloc.stop()
+            if selecionada or duracao >= self.limiar:
+                self._gravar(caminho_dbk, duracao, perfil, instantaneo, pico)
+
+    def _gravar(self, caminho_dbk: str, duracao: float, perfil, instantaneo, pico: int) -> None:
+        from log import diretorio_logs
+
+        base = os.path.join(diretorio_logs(), os.path.basename(caminho_dbk))
+        try:
+            os.makedirs(diretorio_logs(), exist_ok=True)
+            if perfil:
+                perfil.dump_stats(f"{base}.prof")
+            if instantaneo:
+                estatisticas = instantaneo.statistics('lineno')
+                with open(f"{base}.alocacoes.txt", 'w', encoding='utf-8') as f:
+                    f.write(f"Declaração: {caminho_dbk}\n")
+                    f.write(f"Duração: {duracao:.2f}s - pico de memória rastreada: {pico / 1024 / 1024:.1f} MiB\n")
+                    f.write(f"Maiores alocações ainda vivas ao final ({PERFIL_TOP_ALOCACOES}):\n")
+                    for estatistica in estatisticas[:PERFIL_TOP_ALOCACOES]:
+                        f.write(f"  {estatistica}\n")
+        except OSError as e:
+            print(f"⚠️ Erro ao gravar o perfil de {caminho_dbk}: {e}")
+            return
+        self.gravados += 1
+        print(f"📊 Perfil de {os.path.basename(caminho_dbk)} ({duracao:.2f}s) salvo em: {base}.*")
+
+
+def perfilador_da_linha_de_comando(argumentos) -> Optional[Perfilador]:
+    """
+    Cria o perfilador a partir das opções:
+        --perfil [cprofile|memoria|ambos] --perfil-cada N --perfil-limiar SEGUNDOS --perfil-pasta NOME
+
+    Returns:
+        None se nenhuma opção --perfil* foi informada
+
+    Raises:
+        ValueError: Se alguma opção for inválida
+    """
+    if not any(arg.startswith('--perfil') for arg in argumentos):
+        return None
+    modo, cada, limiar, pasta = 'ambos', 0, 0.0, None
+    for i, arg in enumerate(argumentos):
+        proximo = argumentos[i + 1] if i + 1 < len(argumentos) else None
+        if arg == '--perfil' and proximo in MODOS_PERFIL:
+            modo = proximo
+        elif arg == '--perfil-cada' and proximo is not None:
+            cada = int(proximo)
+        elif arg == '--perfil-limiar' and proximo is not None:
+            limiar = float(proximo)
+        elif arg == '--perfil-pasta' and proximo is not None:
+            pasta = proximo
+    return Perfilador(modo, cada, limiar, pasta)
@@ -0,0 +1,221 @@
+import csv
+import json
+import os
+from typing import Any, Dict, List
+
+from config import EXTENSAO_EXTRACAO_BINARIA
+from dinheiro import ColunaDinheiro, Dinheiro
+from extracao_binaria import ExtracaoBinaria
+from modelo_pdf import ErroExtracao, ExtracaoPDF
+
+# Colunas de texto/contagem e colunas monetárias do relatório, na ordem de exportação
+COLUNAS_TEXTO = ('arquivo', 'nome', 'cpf')
+COLUNAS_CONTAGEM = ('dependentes', 'contas_bancarias')
+COLUNAS_DINHEIRO = (
+    'rendimentos_tributaveis',
+    'previdencia',
+    'irrf',
+    'rendimentos_isentos',
+    'rendimentos_exclusivos',
+    'bens_anterior',
+    'bens_atual',
+    'dividas_anterior',
+    'dividas_atual',
+    'patrimonio_anterior',
+    'patrimonio_atual',
+    'variacao_patrimonial',
+)
+COLUNAS = COLUNAS_TEXTO + COLUNAS_DINHEIRO + COLUNAS_CONTAGEM
+
+
+def resumir_declaracao(extracao: ExtracaoPDF) -> Dict[str, Any]:
+    """
+    Calcula os agregados de uma declaração percorrendo cada seção uma única vez.
+
+    Args:
+        extracao: Modelo tipado da extração do PDF
+
+    Returns:
+        Dicionário com os totais (Dinheiro) e contagens da declaração
+    """
+    rendimentos = previdencia = irrf = 0
+    for r in extracao.rendimentos_tributaveis:
+        rendimentos += Dinheiro.de_json(r.get('valor')).centavos
+        previdencia += Dinheiro.de_json(r.get('contrib_previdencia_oficial')).centavos
+        irrf += Dinheiro.de_json(r.get('imposto_retido_fonte')).centavos
+
+    isentos = 0
+    for r in extracao.rendimentos_isentos:
+        isentos += r.valor.centavos
+
+    exclusivos = 0
+    for r in extracao.rendimentos_exclusivos:
+        exclusivos += Dinheiro.de_json(r.get('valor')).centavos
+
+    bens_anterior = bens_atual = 0
+    for b in extracao.bens_direitos:
+        bens_anterior += b.situacao_anterior.centavos
+        bens_atual += b.situacao_atual.centavos
+
+    dividas_anterior = dividas_atual = 0
+    for d in extracao.dividas_onus:
+        dividas_anterior += d.situacao_anterior.centavos
+        dividas_atual += d.situacao_atual.centavos
+
+    patrimonio_anterior = bens_anterior - dividas_anterior
+    patrimonio_atual = bens_atual - dividas_atual
+    declarante = extracao.declarante
+
+    return {
+        'nome': declarante.nome,
+        'cpf': declarante.cpf,
+        'rendimentos_tributaveis': Dinheiro(rendimentos),
+        'previdencia': Dinheiro(previdencia),
+        'irrf': Dinheiro(irrf),
+        'rendimentos_isentos': Dinheiro(isentos),
+        'rendimentos_exclusivos': Dinheiro(exclusivos),
+        'bens_anterior': Dinheiro(bens_anterior),
+        'bens_atual': Dinheiro(bens_atual),
+        'dividas_anterior': Dinheiro(dividas_anterior),
+        'dividas_atual': Dinheiro(dividas_atual),
+        'patrimonio_anterior': Dinheiro(patrimonio_anterior),
+        'patrimonio_atual': Dinheiro(patrimonio_atual),
+        'variacao_patrimonial': Dinheiro(patrimonio_atual - patrimonio_anterior),
+        'dependentes': len(extracao.dependentes),
+        'contas_bancarias': len(extracao.contas_bancarias),
+    }
+
+
+class RelatorioCarteira:
+    """
+    Classe responsável por consolidar os resumos de todas as declarações de um lote
+    em uma tabela colunar, exportável para CSV ou Parquet.
+    """
+
+    def __init__(self):
+        """
+        Inicializa o relatório com colunas vazias.
+        """
+        self.colunas: Dict[str, Any] = {}
+        for nome in COLUNAS_TEXTO + COLUNAS_CONTAGEM:
+            self.colunas[nome] = []
+        for nome in COLUNAS_DINHEIRO:
+            self.colunas[nome] = ColunaDinheiro()
+        self.erros: List[Dict[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.colunas['arquivo'])
+
+    def adicionar(self, arquivo: str, extracao: ExtracaoPDF) -> None:
+        """
+        Adiciona uma declaração ao relatório.
+
+        Args:
+            arquivo: Identificação da declaração (nome do PDF ou da extração)
+            extracao: Modelo tipado da extração do PDF
+        """
+        resumo = resumir_declaracao(extracao)
+        self.colunas['arquivo'].append(arquivo)
+        for nome in COLUNAS_TEXTO[1:] + COLUNAS_CONTAGEM:
+            self.colunas[nome].append(resumo[nome])
+        for nome in COLUNAS_DINHEIRO:
+            self.colunas[nome].centavos.append(resumo[nome].centavos)
+
+    def adicionar_json(self, caminho: str) -> bool:
+        """
+        Adiciona uma declaração a partir de uma extração salva, sem repetir a extração.
+        Extrações no formato binário têm decodificadas apenas as seções do resumo.
+
+        Args:
+            caminho: Caminho do arquivo JSON (ou binário, EXTENSAO_EXTRACAO_BINARIA) salvo
+
+        Returns:
+            True se a extração foi adicionada, False se for inválida
+        """
+        arquivo = os.path.basename(caminho)
+        try:
+            if caminho.lower().endswith(EXTENSAO_EXTRACAO_BINARIA):
+                with open(caminho, 'rb') as f:
+                    self.adicionar(arquivo, ExtracaoPDF(ExtracaoBinaria(f.read())))
+            else:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    self.adicionar(arquivo, ExtracaoPDF(json.load(f)))
+            return True
+        except (ErroExtracao, ValueError, OSError) as e:
+            print(f"⚠️ Extração ignorada no relatório ({arquivo}): {e}")
+            self.erros.append({'arquivo': arquivo, 'erro': str(e)})
+            return False
+
+    def adicionar_pasta(self, pasta: str) -> int:
+        """
+        Adiciona todas as extrações salvas (JSON ou binárias) de uma pasta.
+
+        Returns:
+            Quantidade de declarações adicionadas
+        """
+        adicionadas = 0
+        for nome in sorted(os.listdir(pasta)):
+            if nome.lower().endswith(('.json', EXTENSAO_EXTRACAO_BINARIA)) and self.adicionar_json(os.path.join(pasta, nome)):
+                adicionadas += 1
+        return adicionadas
+
+    def totais(self) -> Dict[str, Dinheiro]:
+        """
+        Retorna os totais da carteira para cada coluna monetária.
+        """
+        return {nome: self.colunas[nome].total() for nome in COLUNAS_DINHEIRO}
+
+    def exportar_csv(self, caminho: str) -> str:
+        """
+        Exporta o relatório em CSV (valores monetários com 2 casas decimais).
+
+        Returns:
+            Caminho do arquivo salvo
+        """
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        with open(caminho, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f, delimiter=';')
+            escritor.writerow(COLUNAS)
+            for i in range(len(self)):
+                escritor.writerow([
+                    str(self.colunas[nome][i]) for nome in COLUNAS
+                ])
+        print(f"Relatório com {len(self)} declarações salvo em: {caminho}")
+        return caminho
+
+    def exportar_parquet(self, caminho: str) -> str:
+        """
+        Exporta o relatório em Parquet. Requer o pacote opcional pyarrow.
+
+        Raises:
+            ImportError: Se o pyarrow não estiver instalado
+
+        Returns:
+            Caminho do arquivo salvo
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Exportação para Parquet requer o pacote 'pyarrow' (pip install pyarrow)")
+
+        dados = {}
+        for nome in COLUNAS:
+            if nome in COLUNAS_DINHEIRO:
+                dados[nome] = pa.array([Dinheiro(c).decimal() for c in self.colunas[nome].centavos], pa.decimal128(18, 2))
+            else:
+                dados[nome] = pa.array(self.colunas[nome])
+        pq.write_table(pa.table(dados), caminho)
+        print(f"Relatório com {len(self)} declarações salvo em: {caminho}")
+        return caminho
+
+    def exportar(self, caminho: str) -> str:
+        """
+        Exporta o relatório no formato indicado pela extensão (.parquet ou CSV).
+        """
+        if caminho.lower().endswith('.parquet'):
+            return self.exportar_parquet(caminho)
+        return self.exportar_csv(caminho)
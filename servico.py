@@ -0,0 +1,407 @@
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+import uuid
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import SERVICO_HOST, SERVICO_PORTA, SERVICO_WORKERS, CACHE_EXTRACOES_CAPACIDADE
+from extratores import ExtratorEmCache, definir_extrator_padrao, extrator_padrao
+from main import buscar_pares, par_da_pasta, processar_declaracao
+from normalizacao import estatisticas_normalizacao
+
+# Jobs finalizados mantidos para consulta; os mais antigos são descartados
+MAX_JOBS_HISTORICO = 1000
+
+ESTADOS_FINAIS = ("concluido", "falhou")
+
+
+class Job:
+    """
+    Job enviado ao serviço: uma pasta (de uma declaração ou com várias subpastas)
+    ou um par PDF/DBK. Mantém o histórico de eventos para acompanhamento.
+    """
+
+    def __init__(self, pares: List[Tuple[str, str]], origem: str, simular: bool = False):
+        """
+        Args:
+            pares: Pares (PDF, DBK) a processar
+            origem: Descrição do que foi enviado (pasta ou par)
+            simular: Repassado para processar_declaracao
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.pares = pares
+        self.origem = origem
+        self.simular = simular
+        self.estado = "na_fila"
+        self.sucessos = 0
+        self.falhas = 0
+        self.eventos: List[Dict[str, Any]] = []
+        self._condicao = threading.Condition()
+        self.registrar("na_fila", pares=len(pares))
+
+    def registrar(self, evento: str, estado: Optional[str] = None, **dados: Any) -> None:
+        """
+        Acrescenta um evento ao histórico e acorda quem acompanha o job.
+
+        Args:
+            evento: Nome do evento
+            estado: Novo estado do job, alterado junto com o registro do evento
+        """
+        with self._condicao:
+            if estado is not None:
+                self.estado = estado
+            self.eventos.append({
+                "job": self.id,
+                "evento": evento,
+                "data": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                **dados,
+            })
+            self._condicao.notify_all()
+
+    @property
+    def finalizado(self) -> bool:
+        return self.estado in ESTADOS_FINAIS
+
+    def aguardar_eventos(self, desde: int, timeout: float = 30.0) -> List[Dict[str, Any]]:
+        """
+        Retorna os eventos a partir da posição `desde`, aguardando novos se necessário.
+        """
+        with self._condicao:
+            if len(self.eventos) <= desde and not self.finalizado:
+                self._condicao.wait(timeout)
+            return self.eventos[desde:]
+
+    def para_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "origem": self.origem,
+            "estado": self.estado,
+            "pares": len(self.pares),
+            "sucessos": self.sucessos,
+            "falhas": self.falhas,
+            "simular": self.simular,
+        }
+
+
+class ServicoIRPF:
+    """
+    Serviço residente que processa jobs com módulos, sessões HTTP do webhook e
+    cache de extrações já carregados, evitando o custo de iniciar o main.py a cada
+    pasta recebida.
+    """
+
+    def __init__(self, workers: int = SERVICO_WORKERS):
+        """
+        Args:
+            workers: Quantidade de jobs processados simultaneamente
+        """
+        self.workers = max(1, workers)
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._fila: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._trava = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def iniciar(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._trabalhar, name=f"servico-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def encerrar(self) -> None:
+        """
+        Encerra os workers após os jobs já enfileirados.
+        """
+        for _ in self._threads:
+            self._fila.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submeter(self, dados: Dict[str, Any]) -> Job:
+        """
+        Enfileira um job.
+
+        Args:
+            dados: {"pasta": caminho} ou {"pdf": caminho, "dbk": caminho}, com "simular" opcional
+
+        Raises:
+            ValueError: Se o job for inválido ou não houver pares para processar
+        """
+        simular = bool(dados.get("simular", False))
+        if dados.get("pasta"):
+            pasta = dados["pasta"]
+            if not os.path.isdir(pasta):
+                raise ValueError(f"Pasta não encontrada: {pasta}")
+            par, erro_info = par_da_pasta(pasta)
+            # Uma pasta de declaração ou uma pasta com uma subpasta por declaração
+            pares = [par] if par else buscar_pares(pasta)[0]
+            if not pares:
+                raise ValueError(f"Nenhum par PDF/DBK encontrado em {pasta} "
+                                 f"(PDF: {erro_info['num_pdfs']}, DBK: {erro_info['num_dbks']})")
+            job = Job(pares, pasta, simular)
+        elif dados.get("pdf") and dados.get("dbk"):
+            for chave in ("pdf", "dbk"):
+                if not os.path.isfile(dados[chave]):
+                    raise ValueError(f"Arquivo {chave.upper()} não encontrado: {dados[chave]}")
+            job = Job([(dados["pdf"], dados["dbk"])], f"{dados['pdf']} + {dados['dbk']}", simular)
+        else:
+            raise ValueError("Informe 'pasta' ou o par 'pdf' e 'dbk'")
+
+        with self._trava:
+            self.jobs[job.id] = job
+            self._descartar_antigos()
+        self._fila.put(job)
+        print(f"Job {job.id} recebido: {job.origem} ({len(job.pares)} pares)")
+        return job
+
+    def _descartar_antigos(self) -> None:
+        excedente = len(self.jobs) - MAX_JOBS_HISTORICO
+        for id_job in list(self.jobs):
+            if excedente <= 0:
+                break
+            if self.jobs[id_job].finalizado:
+                del self.jobs[id_job]
+                excedente -= 1
+
+    def obter(self, id_job: str) -> Optional[Job]:
+        with self._trava:
+            return self.jobs.get(id_job)
+
+    def listar(self) -> List[Dict[str, Any]]:
+        with self._trava:
+            return [job.para_dict() for job in self.jobs.values()]
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._trava:
+            estados: Dict[str, int] = {}
+            for job in self.jobs.values():
+                estados[job.estado] = estados.get(job.estado, 0) + 1
+        extrator = extrator_padrao()
+        resultado: Dict[str, Any] = {"workers": self.workers, "jobs": estados, "extrator": extrator.nome}
+        if isinstance(extrator, ExtratorEmCache):
+            resultado["cache_extracoes"] = extrator.estatisticas()
+        resultado["cache_normalizacao"] = estatisticas_normalizacao()
+        return resultado
+
+    def _trabalhar(self) -> None:
+        while True:
+            job = self._fila.get()
+            if job is None:
+                return
+            self._executar(job)
+
+    def _executar(self, job: Job) -> None:
+        job.registrar("iniciado", estado="processando")
+        for pdf, dbk in job.pares:
+            job.registrar("par_iniciado", pdf=pdf, dbk=dbk)
+            try:
+                sucesso = processar_declaracao(dbk, pdf, simular=job.simular)
+            except Exception as e:
+                print(f"❌ Erro inesperado no job {job.id}: {e}")
+                sucesso = False
+            if sucesso:
+                job.sucessos += 1
+            else:
+                job.falhas += 1
+            job.registrar("par_concluido", pdf=pdf, dbk=dbk, sucesso=sucesso)
+        estado = "concluido" if job.falhas == 0 else "falhou"
+        job.registrar(estado, estado=estado, sucessos=job.sucessos, falhas=job.falhas)
+
+
+class ManipuladorServico(BaseHTTPRequestHandler):
+    """
+    API HTTP do serviço:
+        POST /jobs               envia um job (JSON) e retorna seu id
+        GET  /jobs               lista os jobs
+        GET  /jobs/<id>          estado do job
+        GET  /jobs/<id>/eventos  eventos do job em JSON Lines, transmitidos até o fim do job
+        GET  /saude              estado do serviço e dos caches de extrações e normalização
+    """
+
+    servico: ServicoIRPF = None
+
+    def log_message(self, formato: str, *args: Any) -> None:
+        # As requisições não poluem a saída do processamento
+        pass
+
+    def _responder(self, status: int, dados: Any) -> None:
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_POST(self) -> None:
+        if self.path.rstrip('/') != '/jobs':
+            self._responder(404, {"erro": "Rota não encontrada"})
+            return
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+            dados = json.loads(self.rfile.read(tamanho) or b'{}')
+            if not isinstance(dados, dict):
+                raise ValueError("O corpo deve ser um objeto JSON")
+            job = self.servico.submeter(dados)
+        except ValueError as e:
+            self._responder(400, {"erro": str(e)})
+            return
+        self._responder(202, job.para_dict())
+
+    def do_GET(self) -> None:
+        partes = [parte for parte in self.path.split('?')[0].split('/') if parte]
+        if partes == ['saude']:
+            self._responder(200, self.servico.estatisticas())
+        elif partes == ['jobs']:
+            self._responder(200, self.servico.listar())
+        elif len(partes) in (2, 3) and partes[0] == 'jobs':
+            job = self.servico.obter(partes[1])
+            if job is None:
+                self._responder(404, {"erro": f"Job não encontrado: {partes[1]}"})
+            elif len(partes) == 2:
+                self._responder(200, job.para_dict())
+            elif partes[2] == 'eventos':
+                self._transmitir_eventos(job)
+            else:
+                self._responder(404, {"erro": "Rota não encontrada"})
+        else:
+            self._responder(404, {"erro": "Rota não encontrada"})
+
+    def _transmitir_eventos(self, job: Job) -> None:
+        """
+        Envia os eventos à medida que ocorrem (uma linha JSON por evento); a conexão
+        é encerrada quando o job termina.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.end_headers()
+        enviados = 0
+        try:
+            while True:
+                novos = job.aguardar_eventos(enviados)
+                for evento in novos:
+                    self.wfile.write((json.dumps(evento, ensure_ascii=False) + "\n").encode('utf-8'))
+                self.wfile.flush()
+                enviados += len(novos)
+                if job.finalizado and enviados >= len(job.eventos):
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente parou de acompanhar; o job continua
+            return
+
+
+def iniciar_servidor(host: str = SERVICO_HOST, porta: int = SERVICO_PORTA,
+                     workers: int = SERVICO_WORKERS) -> Tuple[ThreadingHTTPServer, ServicoIRPF]:
+    """
+    Cria o serviço e o servidor HTTP (sem bloquear; use servidor.serve_forever()).
+
+    Returns:
+        Tupla (servidor HTTP, serviço)
+    """
+    servico = ServicoIRPF(workers)
+    servico.iniciar()
+    manipulador = type('Manipulador', (ManipuladorServico,), {'servico': servico})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    return servidor, servico
+
+
+def enviar_job(dados: Dict[str, Any], host: str = SERVICO_HOST, porta: int = SERVICO_PORTA,
+               acompanhar: bool = True) -> int:
+    """
+    Cliente: envia um job ao serviço e, opcionalmente, imprime seus eventos até o fim.
+
+    Returns:
+        0 se o job foi concluído (ou apenas enviado) com sucesso, 1 caso contrário
+    """
+    base = f"http://{host}:{porta}"
+    requisicao = urllib.request.Request(
+        f"{base}/jobs", data=json.dumps(dados).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}, method='POST'
+    )
+    try:
+        with urllib.request.urlopen(requisicao) as resposta:
+            job = json.load(resposta)
+    except urllib.error.HTTPError as e:
+        print(f"❌ Job recusado: {json.load(e).get('erro', e)}")
+        return 1
+    except urllib.error.URLError as e:
+        print(f"❌ Serviço indisponível em {base}: {e.reason}")
+        return 1
+
+    print(f"Job {job['id']} enviado ({job['pares']} pares)")
+    if not acompanhar:
+        return 0
+
+    estado = None
+    with urllib.request.urlopen(f"{base}/jobs/{job['id']}/eventos") as resposta:
+        for linha in resposta:
+            evento = json.loads(linha)
+            estado = evento['evento']
+            if estado == 'par_concluido':
+                marca = "✅" if evento['sucesso'] else "❌"
+                print(f"  {marca} {os.path.basename(evento['dbk'])}")
+            elif estado in ESTADOS_FINAIS:
+                print(f"Job {job['id']} {estado}: {evento['sucessos']} sucessos, {evento['falhas']} falhas")
+    return 0 if estado == "concluido" else 1
+
+
+def main() -> int:
+    host = SERVICO_HOST
+    porta = SERVICO_PORTA
+    workers = SERVICO_WORKERS
+    capacidade_cache = CACHE_EXTRACOES_CAPACIDADE
+    enviar = None
+    simular = '--simular' in sys.argv
+
+    for i, arg in enumerate(sys.argv):
+        proximo = sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+        if proximo is None:
+            continue
+        if arg == '--host':
+            host = proximo
+        elif arg in ('--porta', '--workers', '--cache'):
+            try:
+                valor = int(proximo)
+            except ValueError:
+                continue
+            if arg == '--porta':
+                porta = valor
+            elif arg == '--workers':
+                workers = valor
+            else:
+                capacidade_cache = valor
+        elif arg == '--extrator':
+            try:
+                definir_extrator_padrao(proximo)
+            except ValueError as e:
+                print(f"[!] {e}")
+                return 1
+        elif arg == '--enviar':
+            enviar = proximo
+
+    if enviar:
+        # Modo cliente: envia uma pasta ao serviço já em execução
+        return enviar_job({"pasta": os.path.abspath(enviar), "simular": simular}, host, porta)
+
+    definir_extrator_padrao(capacidade_cache=capacidade_cache)
+    servidor, servico = iniciar_servidor(host, porta, workers)
+    print(f"Serviço IRPF aguardando jobs em http://{host}:{porta} ({servico.workers} workers)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrando serviço...")
+    finally:
+        servidor.server_close()
+        servico.encerrar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
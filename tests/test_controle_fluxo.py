@@ -0,0 +1,224 @@
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import controle_fluxo
+from controle_fluxo import ControladorConcorrencia, Disjuntor, LimitadorTaxa
+
+
+class Relogio:
+    """
+    Substitui o módulo time em controle_fluxo: sleep apenas avança o relógio.
+    """
+
+    def __init__(self, agora: float = 1000.0):
+        self.agora = agora
+
+    def monotonic(self) -> float:
+        return self.agora
+
+    def sleep(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+class TestComRelogio(unittest.TestCase):
+
+    def setUp(self):
+        self.relogio = Relogio()
+        patcher = mock.patch.object(controle_fluxo, 'time', self.relogio)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestLimitadorTaxa(TestComRelogio):
+    """
+    Token bucket: a rajada sai de imediato e os tokens voltam à taxa configurada.
+    """
+
+    def test_taxa_zero_nao_limita(self):
+        limitador = LimitadorTaxa(taxa=0, rajada=1)
+        self.assertTrue(all(limitador.adquirir(timeout=0) for _ in range(10)))
+
+    def test_rajada_e_reposicao(self):
+        limitador = LimitadorTaxa(taxa=2, rajada=3)
+        self.assertTrue(all(limitador.adquirir(timeout=0) for _ in range(3)))
+        self.assertFalse(limitador.adquirir(timeout=0))
+
+        self.relogio.sleep(0.5)
+        self.assertTrue(limitador.adquirir(timeout=0))
+        self.assertFalse(limitador.adquirir(timeout=0))
+
+    def test_reposicao_limitada_a_rajada(self):
+        limitador = LimitadorTaxa(taxa=2, rajada=3)
+        self.relogio.sleep(60)
+        self.assertTrue(all(limitador.adquirir(timeout=0) for _ in range(3)))
+        self.assertFalse(limitador.adquirir(timeout=0))
+
+    def test_adquirir_aguarda_o_proximo_token(self):
+        limitador = LimitadorTaxa(taxa=4, rajada=1)
+        limitador.adquirir()
+        inicio = self.relogio.agora
+        self.assertTrue(limitador.adquirir())
+        self.assertAlmostEqual(self.relogio.agora - inicio, 0.25)
+
+    def test_pausar_suspende_os_tokens(self):
+        limitador = LimitadorTaxa(taxa=10, rajada=5)
+        limitador.pausar(30)
+        self.assertFalse(limitador.adquirir(timeout=29))
+
+        inicio = self.relogio.agora
+        self.assertTrue(limitador.adquirir())
+        self.assertGreaterEqual(self.relogio.agora, inicio + 1)
+
+
+class TestControladorConcorrencia(TestComRelogio):
+    """
+    AIMD: +1/limite por sucesso rápido, redução multiplicativa em sobrecarga.
+    """
+
+    def _controlador(self, **kwargs) -> ControladorConcorrencia:
+        parametros = dict(inicial=4, minimo=1, maximo=8, latencia_alvo=1.0, taxa_erro_maxima=0.5)
+        parametros.update(kwargs)
+        return ControladorConcorrencia(**parametros)
+
+    def _liberar(self, controlador, latencia=0.1, sucesso=True, sobrecarga=False):
+        with redirect_stdout(StringIO()):
+            controlador.liberar(latencia, sucesso, sobrecarga)
+
+    def test_limites_iniciais(self):
+        self.assertEqual(self._controlador(inicial=20).limite, 8)
+        self.assertEqual(self._controlador(inicial=0).limite, 1)
+
+    def test_aumento_aditivo(self):
+        controlador = self._controlador()
+        controlador.adquirir()
+        self._liberar(controlador)
+        self.assertAlmostEqual(controlador.limite, 4.25)
+        self.assertEqual(controlador.em_voo, 0)
+
+    def test_latencia_alta_nao_aumenta(self):
+        controlador = self._controlador()
+        self._liberar(controlador, latencia=2.0)
+        self.assertEqual(controlador.limite, 4)
+
+    def test_nao_passa_do_maximo(self):
+        controlador = self._controlador(inicial=8)
+        for _ in range(10):
+            self._liberar(controlador)
+        self.assertEqual(controlador.limite, 8)
+
+    def test_sobrecarga_reduz_uma_vez_por_intervalo(self):
+        controlador = self._controlador()
+        self._liberar(controlador, sucesso=False, sobrecarga=True)
+        self.assertEqual(controlador.limite, 2)
+
+        # Respostas da mesma rajada não reduzem de novo
+        self._liberar(controlador, sucesso=False, sobrecarga=True)
+        self.assertEqual(controlador.limite, 2)
+
+        self.relogio.sleep(1.0)
+        self._liberar(controlador, sucesso=False, sobrecarga=True)
+        self.assertEqual(controlador.limite, 1)
+
+        self.relogio.sleep(1.0)
+        self._liberar(controlador, sucesso=False, sobrecarga=True)
+        self.assertEqual(controlador.limite, 1)
+
+    def test_taxa_de_erro_reduz(self):
+        controlador = self._controlador(janela=4)
+        self._liberar(controlador)
+        self._liberar(controlador, sucesso=False)
+        self.assertAlmostEqual(controlador.limite, 4.25)
+
+        self._liberar(controlador, sucesso=False)
+        self.assertAlmostEqual(controlador.limite, 2.125)
+
+    def test_adquirir_espera_vaga(self):
+        controlador = self._controlador(inicial=1)
+        controlador.adquirir()
+        adquiriu = threading.Event()
+
+        def segunda():
+            controlador.adquirir()
+            adquiriu.set()
+
+        thread = threading.Thread(target=segunda, daemon=True)
+        thread.start()
+        self.assertFalse(adquiriu.wait(0.05))
+
+        self._liberar(controlador, latencia=2.0)
+        self.assertTrue(adquiriu.wait(1))
+        thread.join(1)
+        self.assertEqual(controlador.em_voo, 1)
+
+
+class TestDisjuntor(TestComRelogio):
+    """
+    Fechado -> aberto após o limiar de falhas; semiaberto libera uma única chamada de teste.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.disjuntor = Disjuntor(limiar_falhas=3, tempo_recuperacao=30)
+        patcher = mock.patch('sys.stdout', new_callable=StringIO)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _abrir(self):
+        for _ in range(3):
+            self.disjuntor.registrar_falha()
+
+    def test_abre_no_limiar(self):
+        self.disjuntor.registrar_falha()
+        self.disjuntor.registrar_falha()
+        self.assertEqual(self.disjuntor.estado, Disjuntor.FECHADO)
+        self.assertTrue(self.disjuntor.permitir())
+
+        self.disjuntor.registrar_falha()
+        self.assertEqual(self.disjuntor.estado, Disjuntor.ABERTO)
+        self.assertFalse(self.disjuntor.permitir())
+
+    def test_sucesso_zera_as_falhas(self):
+        self.disjuntor.registrar_falha()
+        self.disjuntor.registrar_falha()
+        self.disjuntor.registrar_sucesso()
+        self.disjuntor.registrar_falha()
+        self.assertEqual(self.disjuntor.estado, Disjuntor.FECHADO)
+
+    def test_semiaberto_libera_uma_chamada(self):
+        self._abrir()
+        self.relogio.sleep(29)
+        self.assertFalse(self.disjuntor.permitir())
+
+        self.relogio.sleep(1)
+        self.assertTrue(self.disjuntor.permitir())
+        self.assertEqual(self.disjuntor.estado, Disjuntor.SEMIABERTO)
+        self.assertFalse(self.disjuntor.permitir())
+
+    def test_teste_bem_sucedido_fecha(self):
+        self._abrir()
+        self.relogio.sleep(30)
+        self.disjuntor.permitir()
+        self.disjuntor.registrar_sucesso()
+        self.assertEqual(self.disjuntor.estado, Disjuntor.FECHADO)
+        self.assertEqual(self.disjuntor.falhas_consecutivas, 0)
+        self.assertTrue(self.disjuntor.permitir())
+        self.assertTrue(self.disjuntor.permitir())
+
+    def test_teste_com_falha_reabre(self):
+        self._abrir()
+        self.relogio.sleep(30)
+        self.disjuntor.permitir()
+        self.disjuntor.registrar_falha()
+        self.assertEqual(self.disjuntor.estado, Disjuntor.ABERTO)
+        self.assertFalse(self.disjuntor.permitir())
+
+        # O tempo de recuperação recomeça a partir da nova abertura
+        self.relogio.sleep(30)
+        self.assertTrue(self.disjuntor.permitir())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+from dinheiro import ColunaDinheiro, Dinheiro, somar
+from leitor_receita import _ler_rendimentos_pj
+from modelo_pdf import RendimentoPJ
+
+
+class TestDeJson(unittest.TestCase):
+    """
+    Valores da resposta JSON do PDF: sempre em reais, qualquer que seja o tipo.
+    """
+
+    def test_inteiro_e_texto_sem_separador_sao_reais(self):
+        self.assertEqual(Dinheiro.de_json(1500).centavos, 150000)
+        self.assertEqual(Dinheiro.de_json('1500').centavos, 150000)
+        self.assertEqual(Dinheiro.de_json('1500,00').centavos, 150000)
+
+    def test_formato_brasileiro(self):
+        self.assertEqual(Dinheiro.de_json('1.234,56').centavos, 123456)
+        self.assertEqual(Dinheiro.de_json('R$ 10,05').centavos, 1005)
+        self.assertEqual(Dinheiro.de_json('-2.000,10').centavos, -200010)
+
+    def test_float_sem_erro_de_arredondamento(self):
+        self.assertEqual(Dinheiro.de_json(0.1).centavos, 10)
+        self.assertEqual(Dinheiro.de_json(1234.56).centavos, 123456)
+        self.assertEqual(Dinheiro.de_json('1234.56').centavos, 123456)
+
+    def test_vazios_resultam_em_zero(self):
+        for valor in (None, '', False):
+            self.assertEqual(Dinheiro.de_json(valor), Dinheiro())
+
+    def test_invalido(self):
+        self.assertEqual(Dinheiro.de_json('abc'), Dinheiro())
+        with self.assertRaises(ValueError):
+            Dinheiro.de_json('abc', estrito=True)
+
+    def test_estrito_recusa_formas_ambiguas(self):
+        for valor in ('1.500', '1,234.56', '12.345'):
+            with self.assertRaises(ValueError):
+                Dinheiro.de_json(valor, estrito=True)
+        self.assertEqual(Dinheiro.de_json('1.234.567,00', estrito=True).centavos, 123456700)
+
+
+class TestDeDbk(unittest.TestCase):
+    """
+    Campos de largura fixa do DBK: dígitos com duas casas decimais implícitas.
+    """
+
+    def test_centavos_implicitos(self):
+        self.assertEqual(Dinheiro.de_dbk('0000000123456').centavos, 123456)
+        self.assertEqual(Dinheiro.de_dbk('1500').centavos, 1500)
+        self.assertEqual(Dinheiro.de_dbk('   ').centavos, 0)
+
+    def test_rejeita_texto_formatado(self):
+        for campo in ('1.234,56', '12.50', '-100', '١٢٣'):
+            with self.assertRaises(ValueError):
+                Dinheiro.de_dbk(campo)
+
+    def test_ida_e_volta(self):
+        self.assertEqual(Dinheiro(123456).para_dbk(), '0000000123456')
+        self.assertEqual(Dinheiro.de_dbk(Dinheiro.de_json('1.234,56').para_dbk()).centavos, 123456)
+
+    def test_para_dbk_limites(self):
+        with self.assertRaises(ValueError):
+            Dinheiro(-1).para_dbk()
+        with self.assertRaises(ValueError):
+            Dinheiro(10 ** 13).para_dbk()
+
+
+class TestSomas(unittest.TestCase):
+
+    def test_somar_exige_dinheiro(self):
+        self.assertEqual(somar([Dinheiro(150), Dinheiro.de_dbk('0000000000050')]).centavos, 200)
+        with self.assertRaises(TypeError):
+            somar(['1500'])
+
+    def test_coluna(self):
+        coluna = ColunaDinheiro([Dinheiro(100), Dinheiro(250)])
+        coluna.append(Dinheiro.de_json('1,00'))
+        self.assertEqual(coluna.total().centavos, 450)
+        self.assertEqual(coluna[1], Dinheiro(250))
+        with self.assertRaises(TypeError):
+            coluna.append(1500)
+
+
+class TestOrigens(unittest.TestCase):
+    """
+    Cada origem converte com o método da sua representação.
+    """
+
+    def test_rendimento_pj_usa_campos_do_dbk(self):
+        rendimento = RendimentoPJ.de_dict({'nome': 'EMPRESA', 'dados': {'rendimentos': '0000000150000',
+                                                                         'previdencia': '1.234,56'}})
+        self.assertEqual(rendimento.dados, {'rendimentos': Dinheiro(150000)})
+
+    def test_leitor_local_gera_campos_do_dbk(self):
+        _, pj = _ler_rendimentos_pj(['EMPRESA LTDA 12.345.678/0001-90 1.500,00 100,00 50,00 0,00 0,00'])
+        self.assertEqual(pj[0]['dados']['rendimentos'], '0000000150000')
+        self.assertEqual(RendimentoPJ.de_dict(pj[0]).dados['previdencia'], Dinheiro(10000))
+
+
+if __name__ == '__main__':
+    unittest.main()
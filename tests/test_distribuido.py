@@ -0,0 +1,199 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+from unittest import mock
+
+import distribuido
+from config import DISTRIBUIDO_TENTATIVAS_DIR
+from distribuido import Coordenador, executar_worker, iniciar_coordenador
+
+PARES = [('a.pdf', 'a.DBK'), ('b.pdf', 'b.DBK')]
+
+
+class Relogio:
+    """
+    Substitui o módulo time em distribuido, para expirar leases sem esperar.
+    """
+
+    def __init__(self, agora: float = 1000.0):
+        self.agora = agora
+
+    def monotonic(self) -> float:
+        return self.agora
+
+    def avancar(self, segundos: float) -> None:
+        self.agora += segundos
+
+
+class TestCoordenador(unittest.TestCase):
+    """
+    Leases: o heartbeat renova, a expiração devolve a tarefa ao início da fila e o
+    resultado do dono anterior passa a ser recusado.
+    """
+
+    def setUp(self):
+        self.relogio = Relogio()
+        for patcher in (mock.patch.object(distribuido, 'time', self.relogio),
+                        mock.patch('sys.stdout', new_callable=StringIO)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.coordenador = Coordenador(PARES, lease=30, tentativas=2, tempo_maximo=100, saida=tempfile.gettempdir())
+
+    def test_entrega_em_ordem(self):
+        self.assertEqual(self.coordenador.pedir('w1').dbk, 'a.DBK')
+        self.assertEqual(self.coordenador.pedir('w2').dbk, 'b.DBK')
+        self.assertIsNone(self.coordenador.pedir('w3'))
+        self.assertEqual(self.coordenador.resumo(), {'atribuida': 2, 'workers': 3})
+
+    def test_heartbeat_renova_o_lease(self):
+        tarefa = self.coordenador.pedir('w1')
+        self.relogio.avancar(20)
+        self.assertTrue(self.coordenador.heartbeat('w1', tarefa.id))
+        self.relogio.avancar(20)
+        self.assertEqual(self.coordenador.verificar_leases(), 0)
+        self.assertEqual(tarefa.estado, 'atribuida')
+
+    def test_heartbeat_de_outro_worker_nao_renova(self):
+        tarefa = self.coordenador.pedir('w1')
+        self.assertFalse(self.coordenador.heartbeat('w2', tarefa.id))
+        self.assertTrue(self.coordenador.heartbeat('w2', None))
+        self.relogio.avancar(30)
+        self.assertEqual(self.coordenador.verificar_leases(), 1)
+
+    def test_lease_expirado_e_reatribuido(self):
+        tarefa = self.coordenador.pedir('w1')
+        self.coordenador.pedir('w2')
+        self.coordenador.concluir('w2', 1, True)
+
+        self.relogio.avancar(30)
+        self.assertEqual(self.coordenador.verificar_leases(), 1)
+        self.assertEqual((tarefa.estado, tarefa.worker), ('pendente', None))
+
+        reatribuida = self.coordenador.pedir('w3')
+        self.assertIs(reatribuida, tarefa)
+        self.assertEqual((reatribuida.worker, reatribuida.tentativas), ('w3', 2))
+
+        # O dono anterior não renova nem conclui mais a tarefa
+        self.assertFalse(self.coordenador.heartbeat('w1', tarefa.id))
+        self.assertFalse(self.coordenador.concluir('w1', tarefa.id, True))
+        self.assertFalse(self.coordenador.concluido)
+
+        self.assertTrue(self.coordenador.concluir('w3', tarefa.id, True))
+        self.assertTrue(self.coordenador.concluido)
+        self.assertEqual(self.coordenador.resumo()['concluida'], 2)
+
+    def test_reatribuicao_vai_para_o_inicio_da_fila(self):
+        coordenador = Coordenador(PARES + [('c.pdf', 'c.DBK')], lease=30, saida=tempfile.gettempdir())
+        coordenador.pedir('w1')
+        self.relogio.avancar(30)
+        coordenador.verificar_leases()
+        self.assertEqual([coordenador.pedir('w2').dbk for _ in range(3)], ['a.DBK', 'b.DBK', 'c.DBK'])
+
+    def test_tentativas_esgotadas(self):
+        for _ in range(2):
+            self.coordenador.pedir('w1')
+            self.relogio.avancar(30)
+            self.coordenador.verificar_leases()
+        tarefa = self.coordenador.tarefas[0]
+        self.assertEqual((tarefa.estado, tarefa.tentativas), ('falhou', 2))
+        self.assertEqual(self.coordenador.pedir('w2').dbk, 'b.DBK')
+        self.assertIsNone(self.coordenador.pedir('w2'))
+
+    def test_tempo_maximo_interrompe_a_renovacao(self):
+        tarefa = self.coordenador.pedir('w1')
+        for _ in range(3):
+            self.relogio.avancar(25)
+            self.assertTrue(self.coordenador.heartbeat('w1', tarefa.id))
+        self.relogio.avancar(25)
+        self.assertFalse(self.coordenador.heartbeat('w1', tarefa.id))
+        self.relogio.avancar(30)
+        self.assertEqual(self.coordenador.verificar_leases(), 1)
+        self.assertEqual(tarefa.estado, 'pendente')
+
+    def test_lote_vazio(self):
+        self.assertTrue(Coordenador([], saida=tempfile.gettempdir()).concluido)
+
+
+class TestWorkers(unittest.TestCase):
+    """
+    Coordenador e workers por TCP, com um processar falso que grava na pasta da tentativa.
+    """
+
+    def setUp(self):
+        self.saida = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.saida)
+        patcher = mock.patch('sys.stdout', new_callable=StringIO)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _iniciar(self, pares, **kwargs) -> int:
+        self.coordenador = Coordenador(pares, saida=self.saida, **kwargs)
+        servidor = iniciar_coordenador(self.coordenador, '127.0.0.1', 0)
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        return servidor.server_address[1]
+
+    @staticmethod
+    def _gravar(diretorio_saida, nome, conteudo):
+        os.makedirs(os.path.join(diretorio_saida, 'backup'), exist_ok=True)
+        with open(os.path.join(diretorio_saida, 'backup', nome), 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+
+    def _lido(self, nome):
+        with open(os.path.join(self.saida, 'backup', nome), encoding='utf-8') as f:
+            return f.read()
+
+    def test_lote_publicado(self):
+        porta = self._iniciar(PARES)
+
+        def processar(dbk, pdf, simular=False, diretorio_saida=None):
+            self._gravar(diretorio_saida, 'NEW-' + dbk, pdf)
+            return dbk != 'b.DBK'
+
+        sucessos = executar_worker('127.0.0.1', porta, processar=processar, worker='w1', limite_memoria=0)
+        self.assertEqual(sucessos, 1)
+        self.assertTrue(self.coordenador.concluido)
+        self.assertEqual(self.coordenador.resumo(), {'concluida': 1, 'falhou': 1, 'workers': 1})
+        self.assertEqual(self._lido('NEW-a.DBK'), 'a.pdf')
+        self.assertEqual(os.listdir(os.path.join(self.saida, DISTRIBUIDO_TENTATIVAS_DIR)), [])
+
+    def test_resultado_do_lease_expirado_e_descartado(self):
+        porta = self._iniciar(PARES[:1], lease=0.2)
+        iniciou = threading.Event()
+        liberar = threading.Event()
+
+        def travado(dbk, pdf, simular=False, diretorio_saida=None):
+            self._gravar(diretorio_saida, 'NEW-' + dbk, 'w1')
+            iniciou.set()
+            liberar.wait(5)
+            return True
+
+        def rapido(dbk, pdf, simular=False, diretorio_saida=None):
+            self._gravar(diretorio_saida, 'NEW-' + dbk, 'w2')
+            return True
+
+        primeiro = threading.Thread(target=executar_worker, args=('127.0.0.1', porta),
+                                    kwargs=dict(processar=travado, worker='w1', espera=0.05, limite_memoria=0))
+        primeiro.start()
+        self.assertTrue(iniciou.wait(5))
+        # O heartbeat do worker (config.DISTRIBUIDO_HEARTBEAT) é bem maior que o lease
+        time.sleep(0.3)
+        self.assertEqual(self.coordenador.verificar_leases(), 1)
+
+        sucessos = executar_worker('127.0.0.1', porta, processar=rapido, worker='w2', espera=0.05, limite_memoria=0)
+        liberar.set()
+        primeiro.join(5)
+        self.assertFalse(primeiro.is_alive())
+
+        self.assertEqual(sucessos, 1)
+        self.assertEqual(self.coordenador.tarefas[0].tentativas, 2)
+        self.assertEqual(self._lido('NEW-a.DBK'), 'w2')
+        self.assertEqual(os.listdir(os.path.join(self.saida, DISTRIBUIDO_TENTATIVAS_DIR)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
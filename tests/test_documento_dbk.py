@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from DocumentoDBK import DocumentoDBK
+from GerenciaDBK import GerenciaDBK
+from dinheiro import Dinheiro
+
+EXEMPLO = os.path.join(os.path.dirname(__file__), 'dados', 'exemplo.DBK')
+
+
+class TestDocumentoDBK(unittest.TestCase):
+    """
+    Linhas não editadas voltam exatamente com os bytes lidos.
+    """
+
+    def test_crlf_e_sem_quebra_final(self):
+        conteudo = b'16ABC\r\n21DEF\n26GHI'
+        documento = DocumentoDBK(conteudo)
+        self.assertEqual(documento.para_bytes(), conteudo)
+        self.assertEqual([documento.terminador(i) for i in range(3)], [b'\r\n', b'\n', b''])
+
+    def test_substituir_preserva_terminador(self):
+        documento = DocumentoDBK(b'16ABC\r\n21DEF\r\n26GHI')
+        documento.substituir_linha(1, '21XYZ')
+        documento.substituir_linha(2, '26XYZ')
+        self.assertEqual(documento.para_bytes(), b'16ABC\r\n21XYZ\r\n26XYZ')
+        self.assertEqual(documento.linhas_alteradas(), [1, 2])
+
+    def test_cp1252_preservado(self):
+        conteudo = '16JOSÉ DA CONCEIÇÃO\r\n21R$ 10 – 5\r\n'.encode('cp1252')
+        documento = DocumentoDBK(conteudo)
+        self.assertEqual(documento.encoding, 'cp1252')
+        self.assertEqual(documento.linha(1), '21R$ 10 – 5')
+        documento.substituir_linha(1, '21R$ 20 – 5')
+        self.assertEqual(documento.para_bytes(), conteudo.replace(b'10', b'20'))
+
+    def test_linha_reescrita_igual_nao_e_alterada(self):
+        documento = DocumentoDBK(b'16ABC\r\n21DEF\r\n')
+        documento.substituir_linha(0, '16ABC')
+        self.assertEqual(documento.linhas_alteradas(), [])
+        self.assertEqual(documento.diff_unificado('a', 'b'), '')
+
+
+class TestEditarID(unittest.TestCase):
+    """
+    O log de alterações registra exatamente o que foi gravado na linha.
+    """
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        caminho = os.path.join(pasta, 'exemplo.DBK')
+        shutil.copyfile(EXEMPLO, caminho)
+        with redirect_stdout(StringIO()):
+            self.gerenciador = GerenciaDBK(caminho)
+        self.intervalos = self.gerenciador.leiaute.intervalos['26']
+
+    def _editar(self, substituicoes):
+        with redirect_stdout(StringIO()):
+            return self.gerenciador.editarID(2, substituicoes, self.intervalos)
+
+    def test_registra_apenas_campos_alterados(self):
+        linha = self._editar({'trabalho': Dinheiro(12345), 'alugueis': Dinheiro(), 'inexistente': '1'})
+        self.assertEqual(linha[15:28], '0000000012345')
+        self.assertEqual(self.gerenciador.documento.linha(2), linha)
+        self.assertEqual([a.campo for a in self.gerenciador.alteracoes], ['trabalho'])
+        alteracao = self.gerenciador.alteracoes[0]
+        self.assertEqual((alteracao.anterior, alteracao.novo), ('0000000000000', '0000000012345'))
+        self.assertEqual((alteracao.inicio, alteracao.fim, alteracao.tipo), (15, 28, '26'))
+
+    def test_valor_invalido_nao_altera_linha_nem_log(self):
+        original = self.gerenciador.documento.linha(2)
+        with self.assertRaises(ValueError):
+            self._editar({'trabalho': Dinheiro(12345), 'alugueis': Dinheiro(-1)})
+        self.assertEqual(self.gerenciador.documento.linha(2), original)
+        self.assertEqual(self.gerenciador.documento.linhas_alteradas(), [])
+        self.assertEqual(self.gerenciador.alteracoes, [])
+
+    def test_indice_invalido(self):
+        with self.assertRaises(IndexError), redirect_stdout(StringIO()):
+            self.gerenciador.editarID(999, {'trabalho': Dinheiro(1)}, self.intervalos)
+        self.assertEqual(self.gerenciador.alteracoes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import extracao_binaria
+from extracao_binaria import AnelCompartilhado, ExtracaoBinaria, para_dict, serializar
+
+RESPOSTA = {
+    'contribuinte': {'nome': 'JOSÉ DA SILVA', 'cpf': '123.456.789-00'},
+    'rendimentosPJ': [{'cnpj': '00.000.000/0001-00', 'rendimentos': '1.234,56'}],
+    'rendimentosIsentos': None,
+    'exercicio': 2024,
+}
+
+
+class TestExtracaoBinaria(unittest.TestCase):
+    """
+    serializar -> ExtracaoBinaria devolve as mesmas seções, decodificadas sob demanda.
+    """
+
+    def test_ida_e_volta(self):
+        extracao = ExtracaoBinaria(serializar(RESPOSTA))
+        self.assertEqual(list(extracao), list(RESPOSTA))
+        self.assertEqual(para_dict(extracao), RESPOSTA)
+        self.assertIn('exercicio', extracao)
+        self.assertNotIn('bens', extracao)
+        with self.assertRaises(KeyError):
+            extracao['bens']
+
+    def test_tipo_sem_decodificar(self):
+        extracao = ExtracaoBinaria(serializar(RESPOSTA))
+        tipos = {nome: extracao.tipo_secao(nome) for nome in extracao}
+        self.assertEqual(tipos, {'contribuinte': dict, 'rendimentosPJ': list,
+                                 'rendimentosIsentos': type(None), 'exercicio': object})
+        self.assertEqual(extracao._secoes, {})
+
+        extracao['rendimentosPJ']
+        self.assertEqual(list(extracao._secoes), ['rendimentosPJ'])
+
+    def test_conteudo_regrava_os_mesmos_bytes(self):
+        dados = serializar(RESPOSTA)
+        extracao = ExtracaoBinaria(memoryview(dados))
+        self.assertEqual(extracao.conteudo, dados)
+        self.assertEqual(dict(ExtracaoBinaria(extracao.conteudo)), RESPOSTA)
+
+    def test_resposta_vazia(self):
+        self.assertEqual(len(ExtracaoBinaria(serializar({}))), 0)
+
+    def test_dados_invalidos(self):
+        with self.assertRaises(ValueError):
+            ExtracaoBinaria(b'IR')
+        with self.assertRaises(ValueError):
+            ExtracaoBinaria(b'JSON' + serializar(RESPOSTA)[4:])
+        with self.assertRaises(ValueError):
+            serializar({'x' * 256: 1})
+
+    def test_para_dict_mantem_outros_valores(self):
+        self.assertIs(para_dict(RESPOSTA), RESPOSTA)
+
+
+class TestAnelCompartilhado(unittest.TestCase):
+    """
+    Respostas gravadas no slot por outro processo são lidas sem pickle.
+    """
+
+    def setUp(self):
+        self.anel = AnelCompartilhado(slots=2, tamanho_slot=4096)
+        self.addCleanup(self.anel.fechar)
+
+    def _desanexar(self):
+        memoria = extracao_binaria._anexados.pop(self.anel.nome, None)
+        if memoria is not None:
+            memoria.close()
+
+    def test_slots_reservados_em_ordem_e_reutilizados(self):
+        self.assertEqual([self.anel.reservar(), self.anel.reservar()], [0, 1])
+        self.assertFalse(self.anel._vagas.acquire(blocking=False))
+        self.anel.liberar(0)
+        self.assertEqual(self.anel.reservar(), 0)
+
+    def test_ida_e_volta_no_mesmo_processo(self):
+        self.addCleanup(self._desanexar)
+        dados = serializar(RESPOSTA)
+        slot = self.anel.reservar()
+        self.assertEqual(slot, 0)
+        self.assertTrue(AnelCompartilhado.gravar(self.anel.nome, 1, self.anel.tamanho_slot, b'x' * 4096))
+        self.assertTrue(AnelCompartilhado.gravar(self.anel.nome, slot, self.anel.tamanho_slot, dados))
+        self.assertEqual(dict(ExtracaoBinaria(self.anel.ler(slot, len(dados)))), RESPOSTA)
+        self.assertEqual(self.anel.ler(1, 4096), b'x' * 4096)
+
+    def test_resposta_maior_que_o_slot(self):
+        self.assertFalse(AnelCompartilhado.gravar(self.anel.nome, 0, self.anel.tamanho_slot, b'x' * 4097))
+        self.assertNotIn(self.anel.nome, extracao_binaria._anexados)
+
+    def test_ida_e_volta_entre_processos(self):
+        dados = serializar(RESPOSTA)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            slots = [self.anel.reservar(), self.anel.reservar()]
+            futuros = [executor.submit(AnelCompartilhado.gravar, self.anel.nome, slot,
+                                       self.anel.tamanho_slot, dados[:len(dados) - slot])
+                       for slot in slots]
+            self.assertEqual([futuro.result() for futuro in futuros], [True, True])
+        self.assertEqual(dict(ExtracaoBinaria(self.anel.ler(0, len(dados)))), RESPOSTA)
+        self.assertEqual(self.anel.ler(1, len(dados) - 1), dados[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
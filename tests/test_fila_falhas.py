@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from fila_falhas import FilaFalhas
+
+
+class TestFilaFalhas(unittest.TestCase):
+    """
+    Ciclo de reprocessamento: retirar_todos esvazia a fila sem perder pares até
+    concluir_reprocessamento.
+    """
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta)
+        self.fila = FilaFalhas(os.path.join(pasta, 'falhas', 'fila.jsonl'))
+        self.em_reprocessamento = self.fila.caminho + '.reprocessando'
+
+    def _adicionar(self, pdf, dbk, motivo):
+        with redirect_stdout(StringIO()):
+            self.fila.adicionar(pdf, dbk, motivo)
+
+    def test_listar_mantem_a_falha_mais_recente(self):
+        self._adicionar('a.pdf', 'a.DBK', 'timeout')
+        self._adicionar('b.pdf', 'b.DBK', 'timeout')
+        self._adicionar('a.pdf', 'a.DBK', 'HTTP 500')
+        falhas = {f['dbk']: f['motivo'] for f in self.fila.listar()}
+        self.assertEqual(falhas, {'a.DBK': 'HTTP 500', 'b.DBK': 'timeout'})
+
+    def test_linha_invalida_ignorada(self):
+        self._adicionar('a.pdf', 'a.DBK', 'timeout')
+        with open(self.fila.caminho, 'a', encoding='utf-8') as f:
+            f.write('{incompleta\n\n')
+        with redirect_stdout(StringIO()):
+            self.assertEqual(len(self.fila.listar()), 1)
+
+    def test_fila_vazia(self):
+        self.assertEqual(self.fila.listar(), [])
+        os.makedirs(os.path.dirname(self.fila.caminho))
+        self.assertEqual(self.fila.retirar_todos(), [])
+        self.fila.concluir_reprocessamento()
+        self.assertFalse(os.path.exists(self.em_reprocessamento))
+
+    def test_ciclo_de_reprocessamento(self):
+        self._adicionar('a.pdf', 'a.DBK', 'timeout')
+        self._adicionar('b.pdf', 'b.DBK', 'timeout')
+
+        retirados = self.fila.retirar_todos()
+        self.assertEqual(sorted(f['dbk'] for f in retirados), ['a.DBK', 'b.DBK'])
+        self.assertFalse(os.path.exists(self.fila.caminho))
+        self.assertTrue(os.path.exists(self.em_reprocessamento))
+
+        # Durante o reprocessamento, os pares que falham de novo voltam para a fila
+        self._adicionar('b.pdf', 'b.DBK', 'HTTP 503')
+        self.fila.concluir_reprocessamento()
+        self.assertFalse(os.path.exists(self.em_reprocessamento))
+        self.assertEqual([(f['dbk'], f['motivo']) for f in self.fila.listar()], [('b.DBK', 'HTTP 503')])
+
+    def test_interrupcao_nao_perde_pares(self):
+        self._adicionar('a.pdf', 'a.DBK', 'timeout')
+        self.fila.retirar_todos()
+        # Reprocessamento interrompido: nova falha chega antes de concluir
+        self._adicionar('c.pdf', 'c.DBK', 'timeout')
+
+        retirados = self.fila.retirar_todos()
+        self.assertEqual(sorted(f['dbk'] for f in retirados), ['a.DBK', 'c.DBK'])
+        with open(self.em_reprocessamento, encoding='utf-8') as f:
+            self.assertEqual(len([json.loads(linha) for linha in f]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from GerenciaDBK import GerenciaDBK
+from JournalDBK import JournalDBK
+from dinheiro import Dinheiro
+
+EXEMPLO = os.path.join(os.path.dirname(__file__), 'dados', 'exemplo.DBK')
+
+
+class BaseJournal(unittest.TestCase):
+    """
+    Copia o DBK de exemplo para uma pasta temporária e grava um journal com uma edição.
+    """
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pasta)
+        self.caminho = os.path.join(self.pasta, 'exemplo.DBK')
+        shutil.copyfile(EXEMPLO, self.caminho)
+
+    def _gerenciador(self, caminho=None) -> GerenciaDBK:
+        with redirect_stdout(StringIO()):
+            return GerenciaDBK(caminho or self.caminho)
+
+    def _journal_editado(self) -> JournalDBK:
+        gerenciador = self._gerenciador()
+        with redirect_stdout(StringIO()):
+            gerenciador.editarID(2, {'trabalho': Dinheiro(12345)}, gerenciador.leiaute.intervalos['26'])
+            caminho = gerenciador.journal().salvar(os.path.join(self.pasta, 'exemplo.journal.jsonl'))
+        self.linha_editada = gerenciador.documento.linha(2)
+        return JournalDBK.carregar(caminho)
+
+
+class TestJournalDBK(BaseJournal):
+    """
+    Reaplicação do journal: cada campo só muda se o valor atual for o anterior registrado.
+    """
+
+    def test_salvar_e_carregar(self):
+        journal = self._journal_editado()
+        self.assertEqual(journal.arquivo_dbk, os.path.abspath(self.caminho))
+        self.assertEqual(len(journal), 1)
+        self.assertEqual((journal.entradas[0].campo, journal.entradas[0].novo), ('trabalho', '0000000012345'))
+
+    def test_reaplica_no_dbk_original(self):
+        journal = self._journal_editado()
+        gerenciador = self._gerenciador()
+        with redirect_stdout(StringIO()):
+            resultado = journal.aplicar(gerenciador)
+        self.assertEqual((resultado['aplicadas'], resultado['conflitos'], resultado['divergente']), (1, [], False))
+        self.assertEqual(gerenciador.documento.linha(2), self.linha_editada)
+        self.assertEqual(len(gerenciador.alteracoes), 1)
+
+    def test_conflito_nao_altera_o_campo(self):
+        journal = self._journal_editado()
+        gerenciador = self._gerenciador()
+        with redirect_stdout(StringIO()):
+            gerenciador.editarID(2, {'trabalho': Dinheiro(999)}, gerenciador.leiaute.intervalos['26'])
+            resultado = journal.aplicar(gerenciador)
+        self.assertEqual(resultado['aplicadas'], 0)
+        self.assertEqual(len(resultado['conflitos']), 1)
+        self.assertIn('0000000000999', gerenciador.documento.linha(2))
+
+    def test_linha_inexistente_e_conflito(self):
+        journal = self._journal_editado()
+        journal.entradas[0] = journal.entradas[0]._replace(indice_linha=999)
+        with redirect_stdout(StringIO()):
+            resultado = journal.aplicar(self._gerenciador())
+        self.assertEqual(len(resultado['conflitos']), 1)
+
+    def test_sha256_diferente_e_divergente(self):
+        journal = self._journal_editado()
+        outro = os.path.join(self.pasta, 'outro.DBK')
+        with open(self.caminho, 'rb') as f:
+            conteudo = f.read()
+        with open(outro, 'wb') as f:
+            # Altera outro registro: os campos do journal continuam conferindo
+            f.write(conteudo.replace(b'EMPRESA ALFA', b'EMPRESA BETA'))
+        with redirect_stdout(StringIO()):
+            resultado = journal.aplicar(self._gerenciador(outro))
+        self.assertTrue(resultado['divergente'])
+        self.assertEqual(resultado['aplicadas'], 1)
+
+
+class TestAplicarJournals(BaseJournal):
+    """
+    main.aplicar_journals só grava o DBK quando o journal é aplicado por inteiro no arquivo original.
+    """
+
+    def _aplicar(self) -> int:
+        from main import aplicar_journals
+
+        diretorio = os.getcwd()
+        os.chdir(self.pasta)
+        try:
+            with redirect_stdout(StringIO()):
+                return aplicar_journals(os.path.join(self.pasta, 'exemplo.journal.jsonl'))
+        finally:
+            os.chdir(diretorio)
+
+    def test_grava_quando_aplicado(self):
+        self._journal_editado()
+        self.assertEqual(self._aplicar(), 0)
+        self.assertEqual(os.listdir(os.path.join(self.pasta, 'backup')), ['NEW-exemplo.DBK'])
+
+    def test_nao_grava_dbk_divergente(self):
+        self._journal_editado()
+        with open(self.caminho, 'ab') as f:
+            f.write(b'99\r\n')
+        self.assertEqual(self._aplicar(), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.pasta, 'backup')))
+
+
+if __name__ == '__main__':
+    unittest.main()
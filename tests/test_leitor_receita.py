@@ -0,0 +1,34 @@
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from leitor_receita import COLUNAS_PF, _ler_rendimentos_pf, _ler_rendimentos_pj
+
+
+class TestRendimentosPF(unittest.TestCase):
+
+    def test_linha_completa(self):
+        valores = ' '.join(['1.000,00'] + ['0,00'] * (len(COLUNAS_PF) - 1))
+        itens = _ler_rendimentos_pf([f'JANEIRO {valores}'])
+        self.assertEqual(itens[0]['mes'], '01')
+        self.assertEqual(itens[0]['dados']['trabalho'], '0000000100000')
+
+    def test_linha_incompleta_e_ignorada(self):
+        with redirect_stdout(StringIO()) as saida:
+            itens = _ler_rendimentos_pf(['MARÇO 1.000,00 200,00'])
+        self.assertEqual(itens, [])
+        self.assertIn('ignorados', saida.getvalue())
+
+
+class TestRendimentosPJ(unittest.TestCase):
+
+    def test_linha_com_quantidade_errada_e_ignorada(self):
+        for valores in ('1.500,00 100,00', '1.500,00 100,00 50,00 0,00 0,00 9,99'):
+            with redirect_stdout(StringIO()) as saida:
+                tributaveis, pj = _ler_rendimentos_pj([f'EMPRESA LTDA 12.345.678/0001-90 {valores}'])
+            self.assertEqual((tributaveis, pj), ([], []))
+            self.assertIn('ignorados', saida.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
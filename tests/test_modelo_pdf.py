@@ -0,0 +1,48 @@
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from dinheiro import Dinheiro
+from modelo_pdf import Dependente, DividaOnus, ErroExtracao, ExtracaoPDF, RendimentoIsento
+
+
+class TestDependente(unittest.TestCase):
+
+    def test_codigo_ausente_e_rejeitado(self):
+        for item in ({'nome': 'X'}, {'nome': 'X', 'codigo': ''}, {'nome': 'X', 'codigo': 'AB'}):
+            with self.assertRaises(ErroExtracao):
+                Dependente.de_dict(item)
+
+    def test_codigo_com_dois_digitos(self):
+        self.assertEqual(Dependente.de_dict({'nome': 'Y', 'codigo': 3}).codigo, '03')
+
+    def test_dependente_sem_codigo_e_ignorado_na_secao(self):
+        extracao = ExtracaoPDF({'declarante': {'nome': 'A', 'cpf': '1'},
+                                'dependentes': [{'nome': 'X'}, {'nome': 'Z', 'codigo': '21'}]})
+        self.assertEqual([d.nome for d in extracao.dependentes], ['Z'])
+
+
+class TestValoresParaDbk(unittest.TestCase):
+    """
+    Valores gravados no DBK usam o modo estrito: inválidos, ambíguos ou negativos recusam o item.
+    """
+
+    def test_isento_com_valor_invalido(self):
+        for valor in ('abc', '1.500', '1,234.56', '-10,00'):
+            with self.assertRaises(ErroExtracao):
+                RendimentoIsento.de_dict({'fonte': 'BANCO', 'valor': valor})
+        self.assertEqual(RendimentoIsento.de_dict({'fonte': 'BANCO', 'valor': '1.500,00'}).valor, Dinheiro(150000))
+
+    def test_divida_com_situacao_invalida(self):
+        with self.assertRaises(ErroExtracao):
+            DividaOnus.de_dict({'descricao': 'X', 'situacao_31_12_2023': '2,000.00'})
+
+    def test_item_invalido_e_ignorado_na_secao(self):
+        extracao = ExtracaoPDF({'rendimentos_isentos_nao_tributaveis': [
+            {'fonte': 'A', 'valor': 'abc'}, {'fonte': 'B', 'valor': '10,00'}]})
+        with redirect_stdout(StringIO()):
+            self.assertEqual([r.fonte for r in extracao.rendimentos_isentos], ['B'])
+
+
+if __name__ == '__main__':
+    unittest.main()